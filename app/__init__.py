@@ -2,24 +2,25 @@ from flask import Flask, render_template
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_bcrypt import Bcrypt
-from flask_migrate import Migrate
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_wtf.csrf import CSRFProtect, CSRFError
 from flask_session import Session
+from app.database import init_database, ensure_schema, cli_command
+from app.passwords import PasswordHasher
+from app.ratelimit import SQLiteStorage  # registers the sqlite:// limiter storage
 from config import Config
-import logging
-from logging.handlers import RotatingFileHandler
+import click
 import os
 
 # Extensions
 db = SQLAlchemy()
 bcrypt = Bcrypt()
 login_manager = LoginManager()
-migrate = Migrate()
 limiter = Limiter(get_remote_address)
 csrf = CSRFProtect()
 session_ext = Session()
+hasher = PasswordHasher()
 
 # Login configuration
 login_manager.login_view = 'main.login'
@@ -41,53 +42,80 @@ def create_app():
     # Ensure instance folder exists
     os.makedirs(app.instance_path, exist_ok=True)
 
-    # Use SQLite in instance folder if no DB URI provided
-    if not app.config.get('SQLALCHEMY_DATABASE_URI'):
-        db_path = os.path.join(app.instance_path, 'smartbudget.db')
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + db_path
+    # Client address and scheme from the trusted proxies' X-Forwarded-* headers
+    if app.config['TRUSTED_PROXIES']:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        proxies = app.config['TRUSTED_PROXIES']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
 
-    # Flask-Session config (server-side sessions)
-    app.config['SESSION_TYPE'] = 'filesystem'
-    app.config['SESSION_FILE_DIR'] = os.path.join(app.instance_path, 'flask_session')
+    # Rate limit counters shared by all workers on this host unless configured otherwise
+    if not app.config.get('RATELIMIT_STORAGE_URI'):
+        app.config['RATELIMIT_STORAGE_URI'] = 'sqlite:///' + os.path.join(app.instance_path, 'ratelimits.db')
+
+    # Server-side sessions (backend chosen by SESSION_BACKEND)
     app.config['SESSION_PERMANENT'] = False  # session ends when browser closes
-    os.makedirs(app.config['SESSION_FILE_DIR'], exist_ok=True)
 
     # Cookie settings
     app.config['SESSION_COOKIE_SECURE'] = True
     app.config['SESSION_COOKIE_SAMESITE'] = 'None'
     app.config['SESSION_COOKIE_HTTPONLY'] = True
 
-    # Initialize extensions
-    db.init_app(app)
+    # Initialize extensions (the database with pool options and SQLite PRAGMAs)
+    init_database(app, db)
     bcrypt.init_app(app)
+    hasher.init_app(app)
     login_manager.init_app(app)
-    migrate.init_app(app, db)
     limiter.init_app(app)
     csrf.init_app(app)
-    session_ext.init_app(app)
+
+    # Cached user records for the Flask-Login user loader
+    from app.models import user_cache
+    user_cache.maxsize = app.config['USER_CACHE_SIZE']
+    user_cache.ttl = app.config['USER_CACHE_TTL']
+
+    # Cached dashboard summaries and export payloads
+    from app.response_cache import response_cache
+    response_cache.maxsize = app.config['RESPONSE_CACHE_SIZE']
+    response_cache.maxbytes = app.config['RESPONSE_CACHE_MAX_BYTES']
+    response_cache.ttl = app.config['RESPONSE_CACHE_TTL']
 
     # Register blueprints
     from app.routes import main
     app.register_blueprint(main)
 
-    # Create DB tables
-    with app.app_context():
-        db.create_all()
+    # CLI commands. Flask-Migrate imports Alembic (a fifth of the import
+    # time), and only the 'flask db' commands need it.
+    from app.commands import register_commands
+    register_commands(app)
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    # Create DB tables on an unmigrated database (DB_CREATE_ALL); the 'flask db'
+    # commands manage the schema themselves
+    if cli_command() != 'db':
+        ensure_schema(app, db)
+
+    # Sessions need the tables above when SESSION_BACKEND is 'sql'
+    from app.sessions import init_sessions
+    init_sessions(app, db, session_ext)
+
+    # Request timings, SQL counts and optional stack sampling
+    from app.profiling import init_profiling
+    init_profiling(app)
+
+    # Background job queue (worker threads start with the first request)
+    from app.jobs import init_jobs
+    init_jobs(app)
 
     # CSRF error handler
     @app.errorhandler(CSRFError)
     def handle_csrf_error(e):
         return render_template("csrf_error.html", reason=e.description), 400
 
-    # Logging
-    os.makedirs('logs', exist_ok=True)
-    log_path = os.path.join('logs', 'audit.log')
-    file_handler = RotatingFileHandler(log_path, maxBytes=10240, backupCount=3)
-    file_handler.setFormatter(logging.Formatter('[%(asctime)s] %(message)s', "%Y-%m-%d %H:%M:%S"))
-    file_handler.setLevel(logging.INFO)
-    if not app.logger.handlers:
-        app.logger.addHandler(file_handler)
-    app.logger.setLevel(logging.INFO)
+    # Audit logging (queued; written by a background listener thread)
+    from app.audit import init_audit_logging
+    init_audit_logging(app)
     app.logger.info("SmartBudget AI app started.")
 
     return app
@@ -0,0 +1,118 @@
+from app import db
+from app.models import User, BudgetEntry, Category, MonthlyRollup
+from sqlalchemy import select, func, case
+from collections import defaultdict
+
+
+def category_id_of(user_id, name):
+    """Scalar subquery for the id of the user's category called `name` (NULL if none).
+
+    Filters compare it against the integer category_id, so the name is looked
+    up once per query instead of being compared on every row.
+    """
+    return (
+        select(Category.id).where(Category.user_id == user_id, Category.name == name).scalar_subquery()
+    )
+
+
+def named_totals(totals):
+    """Join a (category_id, total) subquery to category names, largest total first."""
+    return (
+        db.session.query(Category.name, totals.c.total)
+        .join(totals, totals.c.category_id == Category.id)
+        .order_by(totals.c.total.desc())
+    )
+
+
+def entry_filters(user_id, category=None, type=None, start_date=None, end_date=None):
+    """Build the WHERE criteria shared by the dashboard queries."""
+    criteria = [BudgetEntry.user_id == user_id]
+    if category:
+        criteria.append(BudgetEntry.category_id == category_id_of(user_id, category))
+    if type:
+        criteria.append(BudgetEntry.type == type)
+    if start_date:
+        criteria.append(BudgetEntry.date >= start_date)
+    if end_date:
+        criteria.append(BudgetEntry.date <= end_date)
+    return criteria
+
+
+def summary_totals(criteria, archived=None):
+    """Return (total_income, total_expense) in a single pass over the rows.
+
+    `archived` is app.archive.totals() for the same filters; its sums are
+    added to the live ones (likewise in category_totals()).
+    """
+    income = func.coalesce(func.sum(case((BudgetEntry.type == 'income', BudgetEntry.amount), else_=0)), 0)
+    expense = func.coalesce(func.sum(case((BudgetEntry.type == 'expense', BudgetEntry.amount), else_=0)), 0)
+    total_income, total_expense = db.session.query(income, expense).filter(*criteria).one()
+    if archived:
+        # Added up in cents, like the SUM() itself
+        income_cents, expense_cents = round(total_income * 100), round(total_expense * 100)
+        for (_, _, _, type_), (cents, _) in archived.items():
+            if type_ == 'income':
+                income_cents += cents
+            else:
+                expense_cents += cents
+        total_income, total_expense = income_cents / 100, expense_cents / 100
+    return float(total_income), float(total_expense)
+
+
+def category_totals(criteria, type=None, archived=None):
+    """Return [(category, total)] ordered by total, largest first."""
+    query = db.session.query(
+        BudgetEntry.category_id, func.sum(BudgetEntry.amount).label('total')
+    ).filter(*criteria)
+    if type:
+        query = query.filter(BudgetEntry.type == type)
+    totals = query.group_by(BudgetEntry.category_id).subquery()
+    rows = [(name, float(value)) for name, value in named_totals(totals).all()]
+    if not archived:
+        return rows
+
+    extra = defaultdict(int)
+    for (_, _, category_id, type_), (cents, _) in archived.items():
+        if not type or type_ == type:
+            extra[category_id] += cents
+    names = dict(db.session.query(Category.id, Category.name).filter(Category.id.in_(list(extra))))
+    merged = {name: round(total * 100) for name, total in rows}
+    for category_id, cents in extra.items():
+        name = names.get(category_id, '')
+        merged[name] = merged.get(name, 0) + cents
+    return sorted(((name, cents / 100) for name, cents in merged.items()), key=lambda item: item[1], reverse=True)
+
+
+def daily_totals(criteria):
+    """Return {date: total} for the days that have matching entries."""
+    rows = db.session.query(BudgetEntry.date, func.sum(BudgetEntry.amount)).filter(*criteria).group_by(BudgetEntry.date)
+    return {day: float(total) for day, total in rows}
+
+
+def admin_overview(top=5):
+    """Site-wide counts for the admin dashboard, computed without loading rows.
+
+    Entries are counted from the rollup rows, which include archived ones.
+    """
+    # Count per category id first, then add up categories that share a name
+    # across users.
+    counts = (
+        db.session.query(MonthlyRollup.category_id, func.sum(MonthlyRollup.count).label('entries'))
+        .group_by(MonthlyRollup.category_id)
+        .subquery()
+    )
+    entry_count = func.sum(counts.c.entries)
+    top_categories = (
+        db.session.query(Category.name, entry_count)
+        .join(counts, counts.c.category_id == Category.id)
+        .group_by(Category.name)
+        .order_by(entry_count.desc(), Category.name)
+        .limit(top)
+        .all()
+    )
+    return {
+        "total_users": db.session.query(func.count(User.id)).scalar(),
+        "total_entries": db.session.query(func.coalesce(func.sum(MonthlyRollup.count), 0)).scalar(),
+        "total_categories": db.session.query(func.count(func.distinct(Category.name))).scalar(),
+        "top_categories": [(name, count) for name, count in top_categories],
+    }
@@ -0,0 +1,9 @@
+"""Spending forecasts and anomaly detection.
+
+'flask analytics run' (see jobs.run) builds per-category time series,
+fits the models on a process pool and stores the results in the
+spending_forecast and entry_anomaly tables. Request handlers only read
+those tables through user_insights().
+"""
+
+from app.analytics.insights import user_insights, Insights
@@ -0,0 +1,43 @@
+import numpy as np
+
+# Scales the median absolute deviation to the standard deviation of a normal distribution.
+MAD_SCALE = 0.6745
+
+
+def group_medians(values, groups, n_groups):
+    """Median of `values` within each group; `groups` are codes 0..n_groups-1.
+
+    Groups without values get NaN.
+    """
+    medians = np.full(n_groups, np.nan)
+    if len(values) == 0:
+        return medians
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    counts = np.diff(np.r_[starts, len(values)])
+    lower = sorted_values[starts + (counts - 1) // 2]
+    upper = sorted_values[starts + counts // 2]
+    medians[sorted_groups[starts]] = (lower + upper) / 2
+    return medians
+
+
+def mad_scores(values, groups, n_groups, min_samples=8):
+    """Return (scores, medians): robust z-scores of `values` within their group.
+
+    score = 0.6745 * (value - median) / MAD. Groups with fewer than
+    `min_samples` values, or whose MAD is 0, score 0 (nothing to compare to).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    groups = np.asarray(groups, dtype=np.int64)
+    medians = group_medians(values, groups, n_groups)
+    deviations = np.abs(values - medians[groups]) if len(values) else values
+    mads = group_medians(deviations, groups, n_groups)
+    counts = np.bincount(groups, minlength=n_groups)
+
+    usable = (counts >= min_samples) & (mads > 0)
+    scores = np.zeros(len(values))
+    rows = usable[groups]
+    scores[rows] = MAD_SCALE * (values[rows] - medians[groups][rows]) / mads[groups][rows]
+    return scores, medians
@@ -0,0 +1,30 @@
+import numpy as np
+
+
+def holt_forecast(series, horizon=1, alpha=0.5, beta=0.3):
+    """Forecast each row of a (series x periods) matrix `horizon` periods ahead.
+
+    Holt's linear exponential smoothing, vectorised across rows. A row starts
+    at its first non-zero period, so categories added recently are not
+    dragged down by the empty months before them. Rows with no data forecast
+    0, and forecasts never go below 0.
+    """
+    series = np.asarray(series, dtype=np.float64)
+    n_rows, n_periods = series.shape
+    level = np.zeros(n_rows)
+    trend = np.zeros(n_rows)
+    started = np.zeros(n_rows, dtype=bool)
+
+    for t in range(n_periods):
+        x = series[:, t]
+        first = ~started & (x > 0)
+        level[first] = x[first]
+        update = started.copy()
+        previous = level[update]
+        level[update] = alpha * x[update] + (1 - alpha) * (previous + trend[update])
+        trend[update] = beta * (level[update] - previous) + (1 - beta) * trend[update]
+        started |= first
+
+    forecast = np.clip(level + horizon * trend, 0, None)
+    forecast[~started] = 0
+    return forecast
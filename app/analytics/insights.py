@@ -0,0 +1,69 @@
+from app import db
+from app.models import BudgetEntry, Category, SpendingForecast, EntryAnomaly
+from calendar import month_name
+from datetime import date, datetime
+from typing import Optional
+from sqlalchemy import select, func
+import msgspec
+
+
+class Insights(msgspec.Struct, frozen=True):
+    """What the dashboard shows from the analytics tables (a Struct so it can be cached encoded)."""
+    forecast_label: Optional[str] = None
+    forecast_total: float = 0.0
+    forecast_categories: list[tuple[str, float]] = []
+    anomalies: list[tuple[date, str, float, float]] = []
+    computed_at: Optional[datetime] = None
+
+
+EMPTY = Insights()
+
+
+def user_insights(user_id, top=3, anomalies=5):
+    """Read a user's precomputed forecast and most recent anomalous entries.
+
+    Two indexed lookups; nothing is fitted here. Returns EMPTY until
+    'flask analytics run' has processed the user.
+    """
+    latest = db.session.execute(
+        select(SpendingForecast.year, SpendingForecast.month, func.max(SpendingForecast.computed_at))
+        .where(SpendingForecast.user_id == user_id)
+        .group_by(SpendingForecast.year, SpendingForecast.month)
+        .order_by(SpendingForecast.year.desc(), SpendingForecast.month.desc())
+        .limit(1)
+    ).first()
+
+    flagged = db.session.execute(
+        select(BudgetEntry.date, Category.name, BudgetEntry.amount, EntryAnomaly.typical,
+               EntryAnomaly.computed_at)
+        .join(BudgetEntry, BudgetEntry.id == EntryAnomaly.entry_id)
+        .join(Category, Category.id == BudgetEntry.category_id)
+        .where(EntryAnomaly.user_id == user_id)
+        .order_by(BudgetEntry.date.desc(), BudgetEntry.id.desc())
+        .limit(anomalies)
+    ).all()
+
+    if latest is None and not flagged:
+        return EMPTY
+
+    label, total, categories, computed_at = None, 0.0, [], None
+    if latest is not None:
+        year, month, computed_at = latest
+        rows = db.session.execute(
+            select(Category.name, SpendingForecast.amount)
+            .join(Category, Category.id == SpendingForecast.category_id)
+            .where(SpendingForecast.user_id == user_id, SpendingForecast.year == year,
+                   SpendingForecast.month == month)
+            .order_by(SpendingForecast.amount.desc())
+        ).all()
+        label = f"{month_name[month]} {year}"
+        total = sum(amount for _, amount in rows)
+        categories = [(category, amount) for category, amount in rows[:top]]
+    elif flagged:
+        computed_at = flagged[0].computed_at
+
+    return Insights(
+        label, total, categories,
+        [(day, category, amount, typical) for day, category, amount, typical, _ in flagged],
+        computed_at,
+    )
@@ -0,0 +1,154 @@
+from app import db
+from app.models import User, BudgetEntry, SpendingForecast, EntryAnomaly
+from app.analytics.series import UserHistory, monthly_series, add_months
+from app.analytics.forecast import holt_forecast
+from app.response_cache import bump_data_version
+from app.database import set_sqlite_pragmas, sqlite_pragmas
+from app.analytics.anomaly import mad_scores
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from datetime import date, datetime, timezone
+from sqlalchemy import create_engine, select, delete, insert
+import multiprocessing
+import numpy as np
+
+
+def analyse(history, today, months=12, threshold=3.5, min_samples=8):
+    """Return (user_id, forecasts, anomalies) for one UserHistory.
+
+    forecasts are (category_id, amount) for next month, fitted on the last
+    `months` complete months; anomalies are (entry_id, score, typical) for
+    entries scoring above `threshold`. Pure NumPy, so it runs in pool workers.
+    """
+    first_month = add_months(today, -months)
+    series = monthly_series(history, first_month, months)
+    # The current month is still incomplete, so next month is two steps past the data.
+    predicted = holt_forecast(series, horizon=2)
+    forecasts = [
+        (category_id, round(float(amount), 2))
+        for category_id, amount in zip(history.categories, predicted) if amount > 0
+    ]
+
+    scores, medians = mad_scores(history.amounts, history.category_codes, len(history.categories), min_samples)
+    flagged = np.flatnonzero(scores > threshold)
+    anomalies = [
+        (int(history.entry_ids[i]), float(scores[i]), float(medians[history.category_codes[i]]))
+        for i in flagged
+    ]
+    return history.user_id, forecasts, anomalies
+
+
+def analyse_chunk(histories, today, settings):
+    return [analyse(history, today, **settings) for history in histories]
+
+
+# Pool workers load their own chunks: turning rows into arrays costs more
+# than fitting the models, so it is the part worth spreading out.
+_worker_engine = None
+
+
+def _init_worker(database_uri, pragmas):
+    global _worker_engine
+    _worker_engine = create_engine(database_uri)
+    set_sqlite_pragmas(_worker_engine, pragmas)
+
+
+def _analyse_users(user_ids, since, today, settings):
+    with _worker_engine.connect() as conn:
+        histories = load_histories(conn, user_ids, since)
+    return analyse_chunk(histories, today, settings)
+
+
+def load_histories(conn, user_ids, since):
+    """UserHistory for each of `user_ids` with expenses on or after `since`, in one query."""
+    rows = conn.execute(
+        select(BudgetEntry.id, BudgetEntry.user_id, BudgetEntry.date, BudgetEntry.category_id, BudgetEntry.amount)
+        .where(BudgetEntry.user_id.in_(user_ids), BudgetEntry.type == 'expense', BudgetEntry.date >= since)
+        .order_by(BudgetEntry.user_id)
+    ).all()
+    if not rows:
+        return []
+    entry_ids, owners, days, category_ids, amounts = (np.asarray(column) for column in zip(*rows))
+    owners = owners.astype(np.int64)
+    days = np.asarray(days, dtype='datetime64[D]').astype(np.int64)
+    amounts = amounts.astype(np.float64)
+
+    histories = []
+    bounds = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1], True])
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        ids, codes = np.unique(category_ids[start:end].astype(np.int64), return_inverse=True)
+        histories.append(UserHistory(
+            int(owners[start]), entry_ids[start:end].astype(np.int64), days[start:end],
+            ids.tolist(), codes, amounts[start:end],
+        ))
+    return histories
+
+
+def store_results(user_ids, results, target_month, computed_at):
+    """Replace the stored insights of `user_ids` with `results` in one transaction."""
+    db.session.execute(delete(SpendingForecast).where(SpendingForecast.user_id.in_(user_ids)))
+    db.session.execute(delete(EntryAnomaly).where(EntryAnomaly.user_id.in_(user_ids)))
+    forecasts = [
+        dict(user_id=user_id, year=target_month.year, month=target_month.month,
+             category_id=category_id, amount=amount, computed_at=computed_at)
+        for user_id, user_forecasts, _ in results for category_id, amount in user_forecasts
+    ]
+    anomalies = [
+        dict(user_id=user_id, entry_id=entry_id, score=score, typical=typical, computed_at=computed_at)
+        for user_id, _, user_anomalies in results for entry_id, score, typical in user_anomalies
+    ]
+    if forecasts:
+        db.session.execute(insert(SpendingForecast), forecasts)
+    if anomalies:
+        db.session.execute(insert(EntryAnomaly), anomalies)
+    bump_data_version(*user_ids)
+    db.session.commit()
+
+
+def run(config, user_ids=None, today=None):
+    """Recompute forecasts and anomalies for `user_ids` (default: everyone).
+
+    Users are processed ANALYTICS_CHUNK_USERS at a time. Each chunk is
+    loaded with one query and analysed by a pool of ANALYTICS_WORKERS
+    processes; the parent writes each chunk's results as they finish (a
+    single writer, which suits SQLite). ANALYTICS_WORKERS = 0 runs everything
+    in this process. Returns the number of users processed.
+    """
+    today = today or date.today()
+    months = config['ANALYTICS_HISTORY_MONTHS']
+    settings = dict(
+        months=months,
+        threshold=config['ANALYTICS_ANOMALY_THRESHOLD'],
+        min_samples=config['ANALYTICS_MIN_SAMPLES'],
+    )
+    since = add_months(today, -months)
+    target_month = add_months(today, 1)
+    computed_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    chunk_size = config['ANALYTICS_CHUNK_USERS']
+    workers = config['ANALYTICS_WORKERS']
+
+    if user_ids is None:
+        user_ids = db.session.scalars(select(User.id).order_by(User.id)).all()
+    chunks = [list(user_ids[i:i + chunk_size]) for i in range(0, len(user_ids), chunk_size)]
+
+    if not workers:
+        for chunk in chunks:
+            histories = load_histories(db.session, chunk, since)
+            store_results(chunk, analyse_chunk(histories, today, settings), target_month, computed_at)
+        return len(user_ids)
+
+    pending = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker, initargs=(config['SQLALCHEMY_DATABASE_URI'], sqlite_pragmas(config)),
+    ) as pool:
+        for chunk in chunks:
+            # Keep a bounded number of chunks in flight so memory stays flat.
+            if len(pending) >= 2 * workers:
+                done_chunk, future = pending.popleft()
+                store_results(done_chunk, future.result(), target_month, computed_at)
+            pending.append((chunk, pool.submit(_analyse_users, chunk, since, today, settings)))
+        while pending:
+            done_chunk, future = pending.popleft()
+            store_results(done_chunk, future.result(), target_month, computed_at)
+    return len(user_ids)
@@ -0,0 +1,45 @@
+from collections import namedtuple
+from datetime import date
+import numpy as np
+
+UserHistory = namedtuple('UserHistory', ['user_id', 'entry_ids', 'days', 'categories', 'category_codes', 'amounts'])
+UserHistory.__doc__ = """One user's expense entries as parallel arrays.
+
+`days` are days since the epoch, `category_codes` index into `categories`
+(category ids).
+Plain arrays and lists only, so a history pickles cheaply to pool workers.
+"""
+
+
+def month_starts(first_month, months):
+    """Epoch days of the first day of `months` consecutive months from `first_month` (a date)."""
+    start = np.datetime64(first_month.replace(day=1), 'M')
+    return (start + np.arange(months + 1)).astype('datetime64[D]').astype(np.int64)
+
+
+def daily_series(history, start_day, end_day):
+    """(categories x days) matrix of spend per category per day for start_day <= day < end_day."""
+    n_days = end_day - start_day
+    n_categories = len(history.categories)
+    inside = (history.days >= start_day) & (history.days < end_day)
+    cells = history.category_codes[inside] * n_days + (history.days[inside] - start_day)
+    flat = np.bincount(cells, weights=history.amounts[inside], minlength=n_categories * n_days)
+    return flat.reshape(n_categories, n_days)
+
+
+def monthly_series(history, first_month, months):
+    """(categories x months) matrix of spend for `months` calendar months from `first_month`.
+
+    Built by summing the daily series over calendar month boundaries.
+    """
+    bounds = month_starts(first_month, months)
+    daily = daily_series(history, bounds[0], bounds[-1])
+    if daily.shape[1] == 0:
+        return np.zeros((len(history.categories), months))
+    return np.add.reduceat(daily, bounds[:-1] - bounds[0], axis=1)
+
+
+def add_months(day, months):
+    """The first day of the month `months` after `day`'s month."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
@@ -0,0 +1,324 @@
+from app import db
+from app.models import BudgetEntry, Category, EntryAnomaly, ENTRY_TYPE_CODES, ENTRY_TYPE_NAMES
+from app.response_cache import bump_data_version
+from flask import current_app
+from collections import namedtuple, defaultdict
+from sqlalchemy import select, delete, type_coerce, Integer, SmallInteger
+from datetime import date, timedelta
+import numpy as np
+import heapq
+import os
+import re
+import shutil
+import struct
+import zipfile
+
+# Column name -> dtype of the arrays in every year file. Rows are stored
+# newest first, ordered by (day, id) like the entry listing.
+COLUMNS = {
+    'id': np.int64,
+    'day': np.int32,            # days since 1970-01-01
+    'category_id': np.int32,
+    'type_code': np.int8,       # ENTRY_TYPE_CODES
+    'amount_cents': np.int64,
+}
+
+YEAR_FILE = re.compile(r'^(\d{4})\.npz$')
+
+ArchivedEntry = namedtuple('ArchivedEntry', ['id', 'date', 'category', 'amount', 'type'])
+ArchivedEntry.__doc__ = """An archived entry, shaped like a row of the entry listing (category is the name)."""
+
+
+def archive_root():
+    return current_app.config.get('ARCHIVE_DIR') or os.path.join(current_app.instance_path, 'archive')
+
+
+def user_dir(user_id):
+    return os.path.join(archive_root(), str(user_id))
+
+
+def years(user_id):
+    """Years the user has archived entries for, newest first."""
+    try:
+        names = os.listdir(user_dir(user_id))
+    except FileNotFoundError:
+        return []
+    return sorted((int(match.group(1)) for match in map(YEAR_FILE.match, names) if match), reverse=True)
+
+
+def archived_users():
+    try:
+        names = os.listdir(archive_root())
+    except FileNotFoundError:
+        return []
+    return sorted(int(name) for name in names if name.isdigit() and years(int(name)))
+
+
+def remove_user(user_id):
+    shutil.rmtree(user_dir(user_id), ignore_errors=True)
+
+
+# ---- Year files
+# A year file is an uncompressed .npz (np.savez): a zip of one .npy per
+# column, each stored as-is. zlib-deflated members (np.savez_compressed)
+# would have to be inflated in full on every read, so the columns are
+# "compressed" by their narrow dtypes instead (25 bytes a row, against
+# roughly 80 for a budget_entry row with its three indexes) and read
+# through memory maps, which only page in what a query touches.
+
+def _map_npz(path):
+    """Memory-map every array of an uncompressed .npz file; {name: read-only array}."""
+    columns = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as raw:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: {info.filename} is compressed and cannot be memory-mapped")
+            # The member's data follows its local header (30 bytes, then the
+            # file name and extra field, whose lengths end the header).
+            raw.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', raw.read(4))
+            raw.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(raw)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(raw)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(raw)
+            name = info.filename.removesuffix('.npy')
+            if not shape[0]:
+                columns[name] = np.zeros(shape, dtype=dtype)
+                continue
+            columns[name] = np.memmap(raw, dtype=dtype, mode='r', shape=shape, offset=raw.tell(),
+                                      order='F' if fortran_order else 'C')
+    return columns
+
+
+def load_year(user_id, year):
+    """The archived columns of one user and year, memory-mapped ({column: array})."""
+    return _map_npz(os.path.join(user_dir(user_id), f"{year}.npz"))
+
+
+def write_year(user_id, year, columns):
+    """Write (or replace) a year file; readers see either the old file or the new one."""
+    os.makedirs(user_dir(user_id), exist_ok=True)
+    path = os.path.join(user_dir(user_id), f"{year}.npz")
+    with open(path + '.part', 'wb') as out:
+        np.savez(out, **{name: np.ascontiguousarray(columns[name], dtype=dtype) for name, dtype in COLUMNS.items()})
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(path + '.part', path)
+
+
+def _newest_first(columns):
+    order = np.lexsort((columns['id'], columns['day']))[::-1]
+    return {name: np.asarray(values)[order] for name, values in columns.items()}
+
+
+def _merge_columns(old, new):
+    """Union of two column sets, newest first, keeping one row per id (the one from `new`)."""
+    merged = {name: np.concatenate([new[name], old[name]]) for name in COLUMNS}
+    _, first = np.unique(merged['id'], return_index=True)
+    return _newest_first({name: values[first] for name, values in merged.items()})
+
+
+# ---- Reads
+
+def _day(value):
+    return (value - date(1970, 1, 1)).days
+
+
+def filters(user_id, category=None, type=None, start_date=None, end_date=None):
+    """The dashboard's entry filters as keyword arguments for rows(), entries_page() and totals()."""
+    category_id = None
+    if category:
+        category_id = db.session.scalar(
+            select(Category.id).where(Category.user_id == user_id, Category.name == category)
+        )
+        category_id = -1 if category_id is None else category_id
+    return dict(category_id=category_id, type=type, start_date=start_date, end_date=end_date)
+
+
+def _mask(columns, category_id=None, type=None, start_date=None, end_date=None, before=None):
+    """Boolean row mask for the filters, or None when every row matches.
+
+    `before` is a (date, id) cursor: only rows strictly older are kept.
+    """
+    mask = None
+
+    def narrow(condition):
+        nonlocal mask
+        mask = condition if mask is None else mask & condition
+
+    if category_id is not None:
+        narrow(columns['category_id'] == category_id)
+    if type:
+        narrow(columns['type_code'] == ENTRY_TYPE_CODES.get(type, 0))
+    if start_date:
+        narrow(columns['day'] >= _day(start_date))
+    if end_date:
+        narrow(columns['day'] <= _day(end_date))
+    if before:
+        last_day, last_id = _day(before[0]), before[1]
+        narrow((columns['day'] < last_day) | ((columns['day'] == last_day) & (columns['id'] < last_id)))
+    return mask
+
+
+def _selected_years(user_id, start_date=None, end_date=None, before=None):
+    for year in years(user_id):
+        if end_date and year > end_date.year or before and year > before[0].year:
+            continue
+        if start_date and year < start_date.year:
+            break
+        yield year
+
+
+def _selected(user_id, category_id=None, type=None, start_date=None, end_date=None, before=None):
+    """Yield (year, columns) with the matching rows of each year that has any, newest first."""
+    for year in _selected_years(user_id, start_date, end_date, before):
+        columns = load_year(user_id, year)
+        mask = _mask(columns, category_id, type, start_date, end_date, before)
+        if mask is not None:
+            columns = {name: values[mask] for name, values in columns.items()}
+        if len(columns['id']):
+            yield year, columns
+
+
+def rows(user_id, category_id=None, type=None, start_date=None, end_date=None, before=None):
+    """Yield lists of (date, id, category_id, type, amount) archived rows, newest first, one list per year."""
+    for _, columns in _selected(user_id, category_id, type, start_date, end_date, before):
+        yield list(zip(
+            columns['day'].astype('datetime64[D]').tolist(),
+            columns['id'].tolist(),
+            columns['category_id'].tolist(),
+            [ENTRY_TYPE_NAMES[code] for code in columns['type_code'].tolist()],
+            (columns['amount_cents'] / 100).tolist(),
+        ))
+
+
+def merge(live, archived):
+    """Merge two streams of (date, id, ...) rows that are both newest first.
+
+    A row found in both (an archival run that stopped between writing the
+    year file and committing the delete) is yielded once.
+    """
+    last_id = None
+    for row in heapq.merge(live, archived, key=lambda row: (row[0], row[1]), reverse=True):
+        if row[1] != last_id:
+            yield row
+        last_id = row[1]
+
+
+def entries_page(user_id, category_id=None, type=None, start_date=None, end_date=None, before=None, limit=50):
+    """Up to `limit` archived entries older than the `before` cursor, as ArchivedEntry rows."""
+    page = []
+    for batch in rows(user_id, category_id, type, start_date, end_date, before):
+        page.extend(batch[:limit - len(page)])
+        if len(page) == limit:
+            break
+    if not page:
+        return []
+    names = dict(db.session.query(Category.id, Category.name).filter(Category.user_id == user_id))
+    return [ArchivedEntry(entry_id, day, names.get(category_id, ''), amount, type_)
+            for day, entry_id, category_id, type_, amount in page]
+
+
+def totals(user_id, category_id=None, type=None, start_date=None, end_date=None):
+    """Archived sums per month: {(year, month, category_id, type): (cents, count)}."""
+    grouped = defaultdict(lambda: [0, 0])
+    for year, columns in _selected(user_id, category_id, type, start_date, end_date):
+        months = columns['day'].astype('datetime64[D]').astype('datetime64[M]').astype(np.int64) % 12 + 1
+        keys = np.stack([months, columns['category_id'], columns['type_code']])
+        unique, inverse = np.unique(keys, axis=1, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        cents = np.bincount(inverse, weights=columns['amount_cents'], minlength=unique.shape[1])
+        counts = np.bincount(inverse, minlength=unique.shape[1])
+        for (month, category, code), total, count in zip(unique.T.tolist(), cents.tolist(), counts.tolist()):
+            key = (year, month, category, ENTRY_TYPE_NAMES[code])
+            grouped[key][0] += round(total)
+            grouped[key][1] += count
+    return {key: tuple(value) for key, value in grouped.items()}
+
+
+def daily_totals(user_id, category_id=None, type=None, start_date=None, end_date=None):
+    """Archived sums per day: {date: cents}."""
+    grouped = {}
+    for _, columns in _selected(user_id, category_id, type, start_date, end_date):
+        days, inverse = np.unique(columns['day'], return_inverse=True)
+        cents = np.bincount(inverse.reshape(-1), weights=columns['amount_cents'], minlength=len(days))
+        grouped.update(zip(days.astype('datetime64[D]').tolist(), (round(total) for total in cents.tolist())))
+    return grouped
+
+
+# ---- Archiving
+
+def cutoff_year(after_days, today=None):
+    """Entries dated before January 1st of this year are archived."""
+    return ((today or date.today()) - timedelta(days=after_days)).year
+
+
+def archive_user(user_id, before_year):
+    """Move the user's entries dated before `before_year` into their year files.
+
+    One year at a time: the year's rows are deleted (RETURNING their
+    columns), merged into the year file, and the delete commits once the
+    file is on disk, so a failed write leaves the rows in budget_entry.
+    Rollup rows are left alone: they keep counting archived entries.
+    Returns the number of entries archived.
+    """
+    first = db.session.scalar(
+        select(BudgetEntry.date).where(BudgetEntry.user_id == user_id, BudgetEntry.date < date(before_year, 1, 1))
+        .order_by(BudgetEntry.date).limit(1)
+    )
+    if first is None:
+        return 0
+
+    archived = 0
+    for year in range(first.year, before_year):
+        in_year = (BudgetEntry.user_id == user_id, BudgetEntry.date >= date(year, 1, 1),
+                   BudgetEntry.date < date(year + 1, 1, 1))
+        db.session.execute(
+            delete(EntryAnomaly).where(EntryAnomaly.entry_id.in_(select(BudgetEntry.id).where(*in_year)))
+        )
+        returned = db.session.execute(
+            delete(BudgetEntry).where(*in_year).returning(
+                BudgetEntry.id, BudgetEntry.date, BudgetEntry.category_id,
+                type_coerce(BudgetEntry.type, SmallInteger), type_coerce(BudgetEntry.amount, Integer),
+            ).execution_options(synchronize_session=False)
+        ).all()
+        if not returned:
+            db.session.rollback()
+            continue
+        ids, days, category_ids, type_codes, cents = zip(*returned)
+        columns = _newest_first(dict(
+            id=np.asarray(ids, dtype=np.int64),
+            day=np.asarray(days, dtype='datetime64[D]').astype(np.int64),
+            category_id=np.asarray(category_ids, dtype=np.int64),
+            type_code=np.asarray(type_codes, dtype=np.int64),
+            amount_cents=np.asarray(cents, dtype=np.int64),
+        ))
+        if year in years(user_id):
+            columns = _merge_columns(load_year(user_id, year), columns)
+        try:
+            write_year(user_id, year, columns)
+        except Exception:
+            db.session.rollback()
+            raise
+        bump_data_version(user_id)
+        db.session.commit()
+        archived += len(returned)
+    return archived
+
+
+def run(after_days, user_ids=None, today=None):
+    """Archive every user's (or `user_ids`') old entries; returns {user_id: entries archived}."""
+    before_year = cutoff_year(after_days, today)
+    if user_ids is None:
+        user_ids = db.session.scalars(
+            select(BudgetEntry.user_id).where(BudgetEntry.date < date(before_year, 1, 1)).distinct()
+        ).all()
+    archived = {}
+    for user_id in user_ids:
+        count = archive_user(user_id, before_year)
+        if count:
+            archived[user_id] = count
+            current_app.logger.info(f"[ARCHIVE] user {user_id}: {count} entries before {before_year}")
+    return archived
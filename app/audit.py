@@ -0,0 +1,113 @@
+from flask import g, request, has_request_context
+from flask_login import current_user
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from datetime import datetime
+import msgspec
+import logging
+import atexit
+import queue
+import time
+import os
+
+TEXT_FORMAT = '[%(asctime)s] %(levelname)s %(message)s'
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach user_id, route and latency_ms to records logged during a request.
+
+    Runs on the request thread, before the record is queued, so the values
+    reflect the request that logged the message.
+    """
+
+    def filter(self, record):
+        record.user_id = None
+        record.route = None
+        record.latency_ms = None
+        if has_request_context():
+            record.route = request.endpoint or request.path
+            if current_user and current_user.is_authenticated:
+                record.user_id = current_user.get_id()
+            started = g.get('audit_started')
+            if started is not None:
+                record.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line with the request fields added by RequestContextFilter."""
+
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created).strftime(DATE_FORMAT),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "user_id": getattr(record, 'user_id', None),
+            "route": getattr(record, 'route', None),
+            "latency_ms": getattr(record, 'latency_ms', None),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return msgspec.json.encode(payload).decode()
+
+
+# One queue handler and listener per log file for the whole process, so a
+# second create_app() reuses them instead of opening the file twice.
+_pipelines = {}
+
+
+def _start_pipeline(path, max_bytes, backup_count, formatter):
+    log_queue = queue.Queue(-1)
+    file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count)
+    file_handler.setFormatter(formatter)
+    file_handler.setLevel(logging.INFO)
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.setLevel(logging.INFO)
+    return queue_handler, listener
+
+
+def _restart_pipelines_after_fork():
+    # Threads do not survive fork(), and the inherited queue may still hold
+    # the parent listener's wait lock. With gunicorn --preload, give each
+    # worker a fresh queue and listener thread.
+    for queue_handler, listener in _pipelines.values():
+        fresh = queue.Queue(-1)
+        queue_handler.queue = fresh
+        listener.queue = fresh
+        listener._thread = None
+        listener.start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_pipelines_after_fork)
+
+
+def init_audit_logging(app):
+    """Route app.logger through a queue so file writes and rotation happen off the request thread."""
+    path = app.config['AUDIT_LOG_PATH']
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    if app.config['AUDIT_LOG_FORMAT'] == 'json':
+        formatter = JsonLinesFormatter()
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT, DATE_FORMAT)
+
+    if path not in _pipelines:
+        _pipelines[path] = _start_pipeline(
+            path, app.config['AUDIT_LOG_MAX_BYTES'], app.config['AUDIT_LOG_BACKUP_COUNT'], formatter
+        )
+    queue_handler, _ = _pipelines[path]
+
+    # Flask installs its own stderr handler, so look for ours specifically.
+    if queue_handler not in app.logger.handlers:
+        app.logger.addHandler(queue_handler)
+    app.logger.setLevel(logging.INFO)
+
+    @app.before_request
+    def start_audit_timer():
+        g.audit_started = time.perf_counter()
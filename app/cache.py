@@ -0,0 +1,75 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class TTLCache:
+    """A small thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    A `ttl` of 0 or None keeps entries until they are evicted for space.
+    With `maxbytes`, least recently used entries are also evicted once the
+    values' total `sizeof` (default len) exceeds it; a single value larger
+    than `maxbytes` is not stored at all.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, maxbytes=None, sizeof=len):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.currbytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires, size = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                self.currbytes -= size
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        size = self.sizeof(value) if self.maxbytes else 0
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.currbytes -= old[2]
+            if self.maxbytes and size > self.maxbytes:
+                return
+            self._data[key] = (value, expires, size)
+            self.currbytes += size
+            while len(self._data) > self.maxsize or (self.maxbytes and self.currbytes > self.maxbytes):
+                _, evicted = self._data.popitem(last=False)
+                self.currbytes -= evicted[2]
+
+    def get_or_set(self, key, factory):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is not None:
+                self.currbytes -= item[2]
+        return default if item is None else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.currbytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+_MISSING = object()
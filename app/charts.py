@@ -0,0 +1,115 @@
+from app import rollups
+from app.aggregates import entry_filters, daily_totals
+from collections import defaultdict
+from datetime import date, timedelta
+from calendar import month_name
+import msgspec
+
+GRANULARITIES = ('day', 'week', 'month')
+
+# Buckets shown when no start date is given, ending with the current one
+DEFAULT_BUCKETS = {'day': 30, 'week': 12, 'month': 6}
+
+
+class ChartBucket(msgspec.Struct, frozen=True):
+    start: date
+    label: str
+    total: float
+
+
+class ChartSeries(msgspec.Struct):
+    """Totals over contiguous calendar buckets, oldest first; a bucket without entries is 0."""
+    granularity: str
+    buckets: list[ChartBucket]
+
+
+def bucket_start(day, granularity):
+    """First day of the bucket holding `day` (weeks start on Monday)."""
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def next_bucket(start, granularity):
+    if granularity == 'month':
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=7 if granularity == 'week' else 1)
+
+
+def previous_bucket(start, granularity):
+    if granularity == 'month':
+        return (start - timedelta(days=1)).replace(day=1)
+    return start - timedelta(days=7 if granularity == 'week' else 1)
+
+
+def bucket_count(first, last, granularity):
+    if granularity == 'month':
+        return (last.year - first.year) * 12 + last.month - first.month + 1
+    return (last - first).days // (7 if granularity == 'week' else 1) + 1
+
+
+def bucket_label(start, granularity):
+    if granularity == 'month':
+        return f"{month_name[start.month]} {start.year}"
+    if granularity == 'week':
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02d}"
+    return start.isoformat()
+
+
+def bucket_range(granularity, start_date=None, end_date=None, today=None, max_buckets=None):
+    """(first, last) bucket starts of the buckets covering start_date..end_date.
+
+    end_date defaults to today; without start_date the range is the last
+    DEFAULT_BUCKETS[granularity] buckets. Raises ValueError for a range
+    that ends before it starts or needs more than `max_buckets` buckets.
+    """
+    last = bucket_start(end_date or today or date.today(), granularity)
+    if start_date:
+        first = bucket_start(start_date, granularity)
+    else:
+        first = last
+        for _ in range(DEFAULT_BUCKETS[granularity] - 1):
+            first = previous_bucket(first, granularity)
+    if first > last:
+        raise ValueError("The date range ends before it starts.")
+    if max_buckets and bucket_count(first, last, granularity) > max_buckets:
+        raise ValueError(f"The date range needs more than {max_buckets} {granularity} buckets.")
+    return first, last
+
+
+def series(user_id, granularity, first, last, category=None, type='expense'):
+    """The user's totals of `type` entries per bucket from `first` to `last` (bucket starts).
+
+    Months are read from the rollup rows (archived entries included); days
+    and weeks add up the live entries per day and the archive's day sums.
+    """
+    cents = defaultdict(int)
+    if granularity == 'month':
+        totals = rollups.monthly_totals(rollups.rollup_filters(user_id, category, type), first, last)
+        for (year, month), total in totals.items():
+            cents[date(year, month, 1)] += round(total * 100)
+    else:
+        from app import archive  # NumPy; imported on first use
+
+        end = next_bucket(last, granularity) - timedelta(days=1)
+        for day, total in daily_totals(entry_filters(user_id, category, type, first, end)).items():
+            cents[bucket_start(day, granularity)] += round(total * 100)
+        if archive.years(user_id):
+            filters = archive.filters(user_id, category, type, first, end)
+            for day, total in archive.daily_totals(user_id, **filters).items():
+                cents[bucket_start(day, granularity)] += total
+
+    buckets = []
+    start = first
+    while start <= last:
+        buckets.append(ChartBucket(start, bucket_label(start, granularity), cents.get(start, 0) / 100))
+        start = next_bucket(start, granularity)
+    return ChartSeries(granularity, buckets)
+
+
+def changed_buckets(old, new):
+    """Buckets of `new` whose total differs from `old` (a series over the same buckets)."""
+    return [bucket for previous, bucket in zip(old.buckets, new.buckets) if bucket.total != previous.total]
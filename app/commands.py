@@ -0,0 +1,257 @@
+import click
+import threading
+import time
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event
+from datetime import date, timedelta
+from app import db, hasher
+from app.models import User, BudgetEntry, Category, Job
+from app.aggregates import (
+    entry_filters, summary_totals, category_totals, daily_totals
+)
+from app.pagination import keyset_page
+from app.exports import entry_batches
+from app import rollups
+from app import jobs
+from app.analytics import user_insights
+
+# Commands that need NumPy (tips, analytics, seed, archive) import it when they run,
+# so loading the CLI (and the app, which registers it) stays quick.
+
+
+def _route_queries(user_id):
+    """(label, callable) pairs that run the same queries as the routes do."""
+    from app.tips import EntryFrame
+
+    unfiltered = entry_filters(user_id)
+    filtered = entry_filters(user_id, type="expense", start_date=date.today() - timedelta(days=90))
+    by_category = entry_filters(user_id, category="Food")
+    rollup_criteria = rollups.rollup_filters(user_id)
+    return [
+        ("dashboard: categories", lambda: Category.query.filter_by(user_id=user_id).all()),
+        ("dashboard: entries page", lambda: keyset_page(BudgetEntry.query.filter(*unfiltered))),
+        ("dashboard: entries page (category)", lambda: keyset_page(BudgetEntry.query.filter(*by_category))),
+        ("dashboard: totals (rollups)", lambda: rollups.summary_totals(rollup_criteria)),
+        ("dashboard: category totals (rollups)", lambda: rollups.category_totals(rollup_criteria, type="expense")),
+        ("api/chart: months (rollups)",
+         lambda: rollups.monthly_totals(rollup_criteria, date.today() - timedelta(days=180), date.today())),
+        ("dashboard: totals (type + date)", lambda: summary_totals(filtered)),
+        ("dashboard: category totals (date)", lambda: category_totals(filtered, type="expense")),
+        ("api/chart: days (date)", lambda: daily_totals(filtered)),
+        ("dashboard: tips", lambda: EntryFrame.load([user_id])),
+        ("dashboard: insights", lambda: user_insights(user_id)),
+        ("add_category: exists check",
+         lambda: Category.query.filter_by(name="Food", user_id=user_id).first()),
+        ("download_csv: first batch", lambda: next(entry_batches(user_id), None)),
+        ("download_csv: first batch (date)",
+         lambda: next(entry_batches(user_id, start_date=date.today() - timedelta(days=90)), None)),
+    ]
+
+
+@click.command("explain-queries")
+@click.option("--user-id", default=1, show_default=True, help="User whose data the queries target.")
+@with_appcontext
+def explain_queries(user_id):
+    """Print EXPLAIN QUERY PLAN for every query the routes issue."""
+    engine = db.engine
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    for label, run in _route_queries(user_id):
+        captured.clear()
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            run()
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+        click.secho(f"== {label}", bold=True)
+        for statement, parameters in captured:
+            click.echo(" ".join(statement.split()))
+            plan = db.session.connection().exec_driver_sql(prefix + statement, parameters)
+            for row in plan:
+                click.echo(f"    {row[-1]}")
+        click.echo()
+
+
+rollups_cli = click.Group("rollups", help="Maintain the monthly rollup table.")
+
+
+@rollups_cli.command("rebuild")
+@click.option("--user-id", type=int, default=None, help="Only rebuild this user's rollups.")
+@with_appcontext
+def rollups_rebuild(user_id):
+    """Recompute rollups from BudgetEntry."""
+    rollups.rebuild(user_id)
+    db.session.commit()
+    click.echo("Rollups rebuilt.")
+
+
+@rollups_cli.command("check")
+@click.option("--user-id", type=int, default=None, help="Only check this user's rollups.")
+@with_appcontext
+def rollups_check(user_id):
+    """Compare rollups with BudgetEntry and report mismatches."""
+    mismatches = rollups.check(user_id)
+    for key, expected, actual in mismatches:
+        click.echo(f"{key}: expected total={expected[0]:.2f} count={expected[1]}, "
+                   f"found total={actual[0]:.2f} count={actual[1]}")
+    if mismatches:
+        raise click.ClickException(f"{len(mismatches)} rollup rows out of date; run 'flask rollups rebuild'.")
+    click.echo("Rollups are consistent.")
+
+
+@click.command("tips-digest")
+@with_appcontext
+def tips_digest():
+    """Print every user's current tips, evaluated for all users in one pass."""
+    from app.tips import tips_for_users
+
+    digest = tips_for_users()
+    emails = dict(db.session.query(User.id, User.email).filter(User.id.in_(digest)).all())
+    for user_id, tips in digest.items():
+        if tips:
+            click.echo(f"{emails.get(user_id, user_id)}:")
+            for tip in tips:
+                click.echo(f"    {tip}")
+    click.echo(f"{sum(bool(t) for t in digest.values())} of {len(digest)} active users have tips.")
+
+
+analytics_cli = click.Group("analytics", help="Precompute spending forecasts and anomalies.")
+
+
+@analytics_cli.command("run")
+@click.option("--user-id", type=int, multiple=True, help="Only process these users (repeatable).")
+@click.option("--workers", type=int, default=None, help="Override ANALYTICS_WORKERS.")
+@with_appcontext
+def analytics_run(user_id, workers):
+    """Fit forecasts and flag anomalous entries; run it from cron, e.g. nightly."""
+    from app.analytics import jobs as analytics_jobs
+
+    config = dict(current_app.config)
+    if workers is not None:
+        config['ANALYTICS_WORKERS'] = workers
+    started = time.perf_counter()
+    count = analytics_jobs.run(config, list(user_id) or None)
+    click.echo(f"Analysed {count} users in {time.perf_counter() - started:.1f}s.")
+
+
+@click.command("seed")
+@click.option("--users", default=10, show_default=True, help="Users to create.")
+@click.option("--entries", default=1000, show_default=True, help="Entries per user.")
+@click.option("--days", default=730, show_default=True, help="Days of history to spread entries over.")
+@click.option("--password", default="password", show_default=True, help="Password for every seeded user.")
+@click.option("--prefix", default="seed", show_default=True, help="Email prefix (seed0@example.com, ...).")
+@click.option("--random-seed", default=0, show_default=True, help="Seed for reproducible data.")
+@with_appcontext
+def seed_command(users, entries, days, password, prefix, random_seed):
+    """Generate users with realistic entries for development and benchmarks."""
+    from app import seed
+
+    started = time.perf_counter()
+    user_ids = seed.seed(
+        users, entries, hasher.hash(password), days=days, email_prefix=prefix,
+        random_seed=random_seed, batch_size=current_app.config['IMPORT_BATCH_SIZE']
+    )
+    click.echo(f"Created {len(user_ids)} users with {entries} entries each "
+               f"in {time.perf_counter() - started:.1f}s.")
+
+
+jobs_cli = click.Group("jobs", help="Run and inspect background jobs.")
+
+
+@jobs_cli.command("worker")
+@click.option("--threads", default=1, show_default=True, help="Jobs to run at the same time.")
+@click.option("--burst", is_flag=True, help="Exit once the queue is empty instead of waiting for more.")
+@with_appcontext
+def jobs_worker(threads, burst):
+    """Run queued jobs in this process (set JOB_WORKERS=0 on the web processes to leave them here)."""
+    app = current_app._get_current_object()
+    stop = threading.Event()
+    workers = [
+        threading.Thread(target=jobs.work, args=(app, stop), kwargs=dict(burst=burst), name=f"job-worker-{n}")
+        for n in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    click.echo(f"Job worker running with {threads} thread(s); Ctrl+C to stop.")
+    try:
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(timeout=1)
+    except KeyboardInterrupt:
+        click.echo("Finishing running jobs...")
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+
+@jobs_cli.command("enqueue")
+@click.argument("kind", type=click.Choice(["rebuild_rollups", "analytics", "archive", "purge_account"]))
+@click.option("--user-id", type=int, default=None, help="User the job works on (required for purge_account).")
+@with_appcontext
+def jobs_enqueue(kind, user_id):
+    """Queue a maintenance job for the workers."""
+    if kind == "purge_account" and user_id is None:
+        raise click.BadParameter("purge_account needs --user-id.")
+    job = jobs.enqueue(kind, user_id=user_id)
+    click.echo(f"Queued job #{job.id} ({job.kind}).")
+
+
+@jobs_cli.command("list")
+@click.option("--status", type=click.Choice(["queued", "running", "done", "failed"]), default=None)
+@click.option("--limit", default=20, show_default=True)
+@with_appcontext
+def jobs_list(status, limit):
+    """Show the most recent jobs."""
+    query = Job.query
+    if status:
+        query = query.filter(Job.status == status)
+    for job in query.order_by(Job.id.desc()).limit(limit):
+        finished = job.finished_at.strftime('%Y-%m-%d %H:%M:%S') if job.finished_at else "-"
+        click.echo(f"#{job.id:<6} {job.kind:<16} {job.status:<8} user={job.user_id or '-':<6} "
+                   f"attempts={job.attempts} finished={finished} {job.error or ''}")
+
+
+archive_cli = click.Group("archive", help="Move old entries to cold storage (app/archive.py).")
+
+
+@archive_cli.command("run")
+@click.option("--user-id", type=int, multiple=True, help="Only archive these users (repeatable).")
+@click.option("--after-days", type=int, default=None, help="Override ARCHIVE_AFTER_DAYS.")
+@with_appcontext
+def archive_run(user_id, after_days):
+    """Archive entries from years that ended more than ARCHIVE_AFTER_DAYS ago."""
+    from app import archive
+
+    after_days = current_app.config['ARCHIVE_AFTER_DAYS'] if after_days is None else after_days
+    started = time.perf_counter()
+    archived = archive.run(after_days, list(user_id) or None)
+    click.echo(f"Archived {sum(archived.values())} entries of {len(archived)} users dated before "
+               f"{archive.cutoff_year(after_days)} in {time.perf_counter() - started:.1f}s.")
+
+
+@archive_cli.command("list")
+@click.option("--user-id", type=int, default=None, help="Only this user.")
+@with_appcontext
+def archive_list(user_id):
+    """Show the archived years and entry counts per user."""
+    from app import archive
+
+    for owner in ([user_id] if user_id else archive.archived_users()):
+        for year in archive.years(owner):
+            click.echo(f"user={owner:<6} {year} entries={len(archive.load_year(owner, year)['id'])}")
+
+
+def register_commands(app):
+    app.cli.add_command(explain_queries)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(tips_digest)
+    app.cli.add_command(analytics_cli)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(archive_cli)
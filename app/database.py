@@ -0,0 +1,194 @@
+from sqlalchemy import event, inspect, Column, MetaData, String, Table
+from sqlalchemy.engine import make_url
+import weakref
+import re
+import sys
+import os
+
+# Engines whose inherited connections are dropped in forked children
+_engines = weakref.WeakSet()
+
+REVISION = re.compile(r"^revision\s*=\s*['\"](\w+)['\"]", re.M)
+DOWN_REVISION = re.compile(r"^down_revision\s*=\s*(.+)$", re.M)
+
+
+def normalize_uri(uri):
+    """Accept the postgres:// scheme that Heroku-style DATABASE_URL values use.
+
+    SQLAlchemy only knows the dialect as postgresql://.
+    """
+    if uri and uri.startswith('postgres://'):
+        return 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def is_memory_sqlite(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def sqlite_pragmas(config):
+    """PRAGMAs run on every new SQLite connection, in order."""
+    return [
+        ('journal_mode', config['SQLITE_JOURNAL_MODE']),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('busy_timeout', config['SQLITE_BUSY_TIMEOUT']),
+        ('cache_size', config['SQLITE_CACHE_SIZE']),
+        ('mmap_size', config['SQLITE_MMAP_SIZE']),
+    ]
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database.
+
+    Pool sizing applies to PostgreSQL and to file-backed SQLite (both use a
+    QueuePool); an in-memory SQLite database is a single shared connection
+    and keeps SQLAlchemy's defaults.
+    """
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if is_memory_sqlite(uri):
+        return {}
+    options = dict(
+        pool_size=config['DB_POOL_SIZE'],
+        max_overflow=config['DB_MAX_OVERFLOW'],
+        pool_timeout=config['DB_POOL_TIMEOUT'],
+        pool_recycle=config['DB_POOL_RECYCLE'],
+        pool_pre_ping=config['DB_POOL_PRE_PING'],
+    )
+    if make_url(uri).get_backend_name() == 'sqlite':
+        # The driver's own lock wait, in seconds; busy_timeout below sets the same.
+        options['connect_args'] = {'timeout': config['SQLITE_BUSY_TIMEOUT'] / 1000}
+    return options
+
+
+def set_sqlite_pragmas(engine, pragmas):
+    """Run `pragmas` on each new connection of `engine` (a no-op for other databases)."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def dialect_insert(engine):
+    """The INSERT construct with ON CONFLICT support for `engine`'s dialect.
+
+    Imported on demand: loading the PostgreSQL dialect takes about as long
+    as building the rest of the app, and SQLite deployments never need it.
+    """
+    if engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _dispose_after_fork():
+    # Pooled connections must not be shared with the parent (gunicorn
+    # --preload); close=False leaves the parent's sockets/files alone.
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_after_fork)
+
+
+def init_database(app, db):
+    """Resolve the database URI and engine options, then bind `db` to the app."""
+    app.config['SQLALCHEMY_DATABASE_URI'] = normalize_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(app.config), **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+    db.init_app(app)
+    with app.app_context():
+        set_sqlite_pragmas(db.engine, sqlite_pragmas(app.config))
+        _engines.add(db.engine)
+
+
+def alembic_head(migrations_dir):
+    """The single head revision of the scripts in `migrations_dir`/versions, or None.
+
+    Read with a regex rather than through Alembic, which would cost more
+    to import than the whole check saves.
+    """
+    versions = os.path.join(migrations_dir, 'versions')
+    if not os.path.isdir(versions):
+        return None
+    revisions, parents = set(), set()
+    for name in os.listdir(versions):
+        if not name.endswith('.py'):
+            continue
+        with open(os.path.join(versions, name), encoding='utf-8') as f:
+            source = f.read()
+        revision = REVISION.search(source)
+        down_revision = DOWN_REVISION.search(source)
+        if revision:
+            revisions.add(revision.group(1))
+        if down_revision:
+            parents.update(re.findall(r"['\"](\w+)['\"]", down_revision.group(1)))
+    heads = revisions - parents
+    return heads.pop() if len(heads) == 1 else None
+
+
+def stamp_head(conn, migrations_dir):
+    """Record the head revision in alembic_version, as 'flask db stamp head' would."""
+    head = alembic_head(migrations_dir)
+    if head is None:
+        return
+    version = Table(
+        'alembic_version', MetaData(),
+        Column('version_num', String(32), primary_key=True),
+    )
+    version.create(conn)
+    conn.execute(version.insert().values(version_num=head))
+
+
+def cli_command():
+    """The 'flask' subcommand being run (e.g. 'db'), or None.
+
+    Taken from the command line: the app is loaded while the subcommand is
+    looked up, before click's context records which one it is.
+    """
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
+        if arg in ('--app', '-A', '--env-file', '-e'):
+            args = args[1:]
+        elif not arg.startswith('-'):
+            return arg
+    return None
+
+
+def ensure_schema(app, db):
+    """Create missing tables at startup, as DB_CREATE_ALL says.
+
+    'always' runs db.create_all(), which inspects every table on every
+    boot; 'never' leaves the schema to 'flask db upgrade'; 'auto' only
+    creates the tables of a database Alembic has never seen (no
+    alembic_version table) and, if it was empty, stamps it at the head
+    revision. A database that is merely behind head is left to
+    'flask db upgrade', which would otherwise find its new tables already
+    there. Connections opened here are closed again, so none is inherited
+    by forked workers (an in-memory database keeps its one connection).
+    """
+    mode = app.config['DB_CREATE_ALL']
+    migrations_dir = os.path.join(os.path.dirname(app.root_path), 'migrations')
+    with app.app_context():
+        if mode == 'always':
+            db.create_all()
+        elif mode == 'auto':
+            with db.engine.begin() as conn:
+                tables = inspect(conn).get_table_names()
+                if 'alembic_version' not in tables:
+                    db.metadata.create_all(conn)
+                    if not tables:
+                        stamp_head(conn, migrations_dir)
+        if not is_memory_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+            db.engine.dispose()
@@ -0,0 +1,149 @@
+from app import db
+from app.models import BudgetEntry, Category
+from sqlalchemy import select
+from datetime import date
+from itertools import islice
+import msgspec
+import csv
+import io
+import zlib
+
+CSV_HEADER = ["Date", "Category", "Amount", "Type"]
+
+
+class EntryRecord(msgspec.Struct):
+    """Wire schema for exported entries (same keys as the original JSON export)."""
+    date: date
+    category: str
+    amount: float
+    type: str
+
+
+def entry_batches(user_id, start_date=None, end_date=None, batch_size=1000):
+    """Yield lists of (date, category, amount, type) rows, newest first.
+
+    Only the exported columns are selected, and rows are streamed from the
+    cursor `batch_size` at a time rather than materialised as ORM objects.
+    Users with archived years get those rows merged in (see app.archive).
+    """
+    from app import archive  # NumPy; only needed once a user has archived entries
+
+    archived_years = archive.years(user_id)
+    columns = [BudgetEntry.date, Category.name, BudgetEntry.amount, BudgetEntry.type]
+    if archived_years:
+        columns.insert(1, BudgetEntry.id)
+    stmt = (
+        select(*columns)
+        .join(Category, Category.id == BudgetEntry.category_id)
+        .where(BudgetEntry.user_id == user_id)
+    )
+    if start_date:
+        stmt = stmt.where(BudgetEntry.date >= start_date)
+    if end_date:
+        stmt = stmt.where(BudgetEntry.date <= end_date)
+    stmt = stmt.order_by(BudgetEntry.date.desc(), BudgetEntry.id.desc())
+
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    if not archived_years:
+        yield from result.partitions()
+        return
+
+    names = dict(db.session.query(Category.id, Category.name).filter(Category.user_id == user_id))
+    archived = (
+        (day, entry_id, names.get(category_id, ''), amount, type_)
+        for batch in archive.rows(user_id, start_date=start_date, end_date=end_date)
+        for day, entry_id, category_id, type_, amount in batch
+    )
+    rows = archive.merge(result, archived)
+    while batch := [(day, category, amount, type_) for day, _, category, amount, type_ in islice(rows, batch_size)]:
+        yield batch
+
+
+def entry_rows(user_id, start_date=None, end_date=None, batch_size=1000):
+    """Yield (date, category, amount, type) rows one at a time; see entry_batches()."""
+    for batch in entry_batches(user_id, start_date, end_date, batch_size):
+        yield from batch
+
+
+def csv_chunks(rows, chunk_size=64 * 1024):
+    """Encode rows as CSV and yield it in chunks of roughly `chunk_size` bytes."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for day, category, amount, type_ in rows:
+        writer.writerow([day.strftime('%Y-%m-%d'), category, amount, type_])
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a stream of byte chunks into a gzip stream."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def json_chunks(batches):
+    """Encode row batches as one JSON array, yielding one chunk per batch."""
+    encoder = msgspec.json.Encoder()
+    yield b"["
+    first = True
+    for batch in batches:
+        body = encoder.encode([EntryRecord(*row) for row in batch])[1:-1]
+        if not body:
+            continue
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
+
+
+def ndjson_chunks(batches):
+    """Encode row batches as newline-delimited JSON."""
+    encoder = msgspec.json.Encoder()
+    for batch in batches:
+        yield encoder.encode_lines([EntryRecord(*row) for row in batch])
+
+
+def msgpack_chunks(batches):
+    """Encode row batches as a stream of concatenated MessagePack maps.
+
+    A streaming unpacker (e.g. msgpack.Unpacker) reads the records back one
+    by one; a leading array header would need the row count up front.
+    """
+    encoder = msgspec.msgpack.Encoder()
+    buffer = bytearray()
+    for batch in batches:
+        for row in batch:
+            encoder.encode_into(EntryRecord(*row), buffer, -1)
+        yield bytes(buffer)
+        buffer.clear()
+
+
+EXPORT_FORMATS = {
+    "json": (json_chunks, "application/json", "budget_entries.json"),
+    "ndjson": (ndjson_chunks, "application/x-ndjson", "budget_entries.ndjson"),
+    "msgpack": (msgpack_chunks, "application/msgpack", "budget_entries.msgpack"),
+}
+
+
+def export_chunks(export_format, user_id, start_date=None, end_date=None, compress=False, batch_size=1000):
+    """Encoded chunks of one export: 'csv' (gzipped if `compress`) or a key of EXPORT_FORMATS."""
+    if export_format == "csv":
+        chunks = csv_chunks(entry_rows(user_id, start_date, end_date, batch_size))
+        return gzip_chunks(chunks) if compress else chunks
+    encode = EXPORT_FORMATS[export_format][0]
+    return encode(entry_batches(user_id, start_date, end_date, batch_size))
+
+
+def export_file(export_format, compress=False):
+    """(mimetype, filename) for an export made by export_chunks()."""
+    if export_format == "csv":
+        return ("application/gzip", "budget_entries.csv.gz") if compress else ("text/csv", "budget_entries.csv")
+    return EXPORT_FORMATS[export_format][1:]
@@ -1,7 +1,8 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, FloatField, SelectField, DateField
 from wtforms.validators import DataRequired, Email, EqualTo
-from wtforms.validators import DataRequired, Length
+from wtforms.validators import DataRequired, Length, NumberRange
+from app.models import MAX_AMOUNT
 from wtforms import SubmitField
 
 class RegisterForm(FlaskForm):
@@ -28,7 +29,7 @@ class BudgetForm(FlaskForm):
     # ✅ Leave choices empty; they are loaded dynamically
     category = SelectField('Category', choices=[], validators=[DataRequired()])
     
-    amount = FloatField('Amount', validators=[DataRequired()])
+    amount = FloatField('Amount', validators=[DataRequired(), NumberRange(min=0.01, max=MAX_AMOUNT)])
     type = SelectField('Type', choices=[('income', 'Income'), ('expense', 'Expense')], validators=[DataRequired()])
     submit = SubmitField('Add Entry')
 # Delete account form
@@ -0,0 +1,215 @@
+from app import db
+from app.models import BudgetEntry, Category, MAX_AMOUNT
+from app import rollups
+from app.response_cache import bump_data_version
+from sqlalchemy import insert
+from datetime import date
+import msgspec
+import csv
+import math
+import io
+import re
+
+ENTRY_TYPES = ('income', 'expense')
+
+# Bytes read from a JSON array upload at a time, and the largest item kept
+# in memory while looking for its end
+CHUNK_SIZE = 256 * 1024
+MAX_ITEM_SIZE = 64 * 1024
+
+# Characters that open, close or separate JSON values, the rest of a string
+# after its opening quote, and the end of an object followed by another item
+JSON_STRUCTURE = re.compile(rb'["\[\]{},]')
+STRING_REST = re.compile(rb'(?:[^"\\]|\\.)*"', re.S)
+OBJECT_END = re.compile(rb'}\s*,')
+
+
+class ImportFileError(ValueError):
+    """Raised when an uploaded file cannot be read at all (as opposed to a bad row)."""
+
+
+def csv_records(stream):
+    """Yield (line_number, record) from a CSV laid out like download_csv writes it."""
+    reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    header = [name.strip().lower() for name in next(reader, [])]
+    missing = {'date', 'category', 'amount', 'type'} - set(header)
+    if missing:
+        raise ImportFileError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+    for row in reader:
+        if not any(row):
+            continue
+        yield reader.line_num, dict(zip(header, row))
+
+
+def split_items(buffer):
+    """Split `buffer`, which starts at the top level of a JSON array, into its complete items.
+
+    Returns (items, rest, closed): the encoded items, the unfinished item
+    the buffer ends with, and whether the array's closing bracket was reached.
+    """
+    items, start, pos, depth = [], 0, 0, 1
+    while True:
+        match = JSON_STRUCTURE.search(buffer, pos)
+        if match is None:
+            return items, buffer[start:], False
+        if match.group() == b'"':
+            string = STRING_REST.match(buffer, match.end())
+            if string is None:
+                return items, buffer[start:], False
+            pos = string.end()
+            continue
+        char, pos = match.group(), match.end()
+        if char in b'[{':
+            depth += 1
+        elif char in b']}':
+            depth -= 1
+        if depth == 0 or (char == b',' and depth == 1):
+            item = buffer[start:match.start()]
+            if item.strip() or char == b',':
+                items.append(item)
+            if depth == 0:
+                return items, b'', True
+            start = pos
+
+
+def decode_objects(buffer, attempts=3):
+    """Decode the complete object items at the start of `buffer` with one call.
+
+    Tries the last `attempts` places where an object is followed by a comma.
+    One inside a string or a nested object leaves an unfinished array, which
+    does not decode. Returns (records, rest) or None.
+    """
+    end = len(buffer)
+    for _ in range(attempts):
+        end = buffer.rfind(b'}', 0, end)
+        if end < 0:
+            return None
+        comma = OBJECT_END.match(buffer, end)
+        if comma is None:
+            continue
+        try:
+            return msgspec.json.decode(b'[' + buffer[:end + 1] + b']'), buffer[comma.end():]
+        except msgspec.DecodeError:
+            continue
+    return None
+
+
+def array_records(stream):
+    """Yield the items of a JSON array, `stream` being just past its opening bracket.
+
+    The upload is read CHUNK_SIZE bytes at a time and each chunk's complete
+    items decoded, so it is never held in memory as a whole. Items that are
+    not valid JSON, and an unfinished or over-large item ending the array
+    (after which nothing more is read), are yielded as None.
+    """
+    rest = b''
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        buffer = rest + chunk
+        if chunk:
+            decoded = decode_objects(buffer)
+            if decoded is not None:
+                records, rest = decoded
+                yield from records
+                continue
+        items, rest, closed = split_items(buffer)
+        for item in items:
+            try:
+                yield msgspec.json.decode(item)
+            except msgspec.DecodeError:
+                yield None
+        if closed:
+            return
+        if not chunk or len(rest) > MAX_ITEM_SIZE:
+            if rest.strip():
+                yield None
+            return
+
+
+def json_records(stream):
+    """Yield (row_number, record) from a JSON array (as download_json writes it) or NDJSON.
+
+    Records that are not valid JSON are yielded as None.
+    """
+    first = stream.read(1)
+    while first.isspace():
+        first = stream.read(1)
+
+    if first == b'[':
+        yield from enumerate(array_records(stream), start=1)
+        return
+
+    stream.seek(0)
+    for number, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8-sig'), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, msgspec.json.decode(line)
+        except msgspec.DecodeError:
+            yield number, None
+
+
+def _validate(record, user_id, categories):
+    """Return the insert parameters for a record, or raise ValueError describing the problem."""
+    if not isinstance(record, dict):
+        raise ValueError("Not a JSON object")
+    record = {str(key).lower(): value for key, value in record.items()}
+
+    try:
+        day = date.fromisoformat(str(record.get('date', '')).strip())
+    except ValueError:
+        raise ValueError("Invalid date, expected YYYY-MM-DD")
+
+    category_id = categories.get(str(record.get('category', '')).strip().lower())
+    if category_id is None:
+        raise ValueError(f"Unknown category: {record.get('category')!r}")
+
+    try:
+        amount = float(record.get('amount'))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid amount")
+    if not math.isfinite(amount):
+        raise ValueError("Invalid amount")
+    if not amount > 0:
+        raise ValueError("Amount must be greater than zero")
+    if amount > MAX_AMOUNT:
+        raise ValueError(f"Amount must not exceed {MAX_AMOUNT:,}")
+
+    type_ = str(record.get('type', '')).strip().lower()
+    if type_ not in ENTRY_TYPES:
+        raise ValueError("Type must be 'income' or 'expense'")
+
+    return dict(user_id=user_id, date=day, category_id=category_id, amount=amount, type=type_)
+
+
+def import_entries(user_id, records, batch_size=5000, max_errors=1000):
+    """Validate and insert records, committing once per batch.
+
+    Returns a report dict with the number of inserted and failed rows and up
+    to `max_errors` per-row errors.
+    """
+    categories = {c.name.lower(): c.id for c in Category.query.filter_by(user_id=user_id)}
+    report = {"inserted": 0, "failed": 0, "errors": []}
+    batch = []
+
+    def flush():
+        db.session.execute(insert(BudgetEntry.__table__), batch)
+        rollups.apply_rows((p['user_id'], p['date'], p['category_id'], p['type'], p['amount']) for p in batch)
+        bump_data_version(user_id)
+        db.session.commit()
+        report["inserted"] += len(batch)
+        batch.clear()
+
+    for number, record in records:
+        try:
+            batch.append(_validate(record, user_id, categories))
+        except ValueError as exc:
+            report["failed"] += 1
+            if len(report["errors"]) < max_errors:
+                report["errors"].append({"row": number, "error": str(exc)})
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return report
@@ -0,0 +1,359 @@
+from app import db, rollups
+from app.models import User, BudgetEntry, Category, MonthlyRollup, SpendingForecast, EntryAnomaly, Job
+from app.exports import export_chunks, export_file
+from flask import current_app, url_for
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import select, update, delete, func
+import msgspec
+import threading
+import atexit
+import time
+import os
+
+# Seconds between a worker's housekeeping passes (see maintain())
+MAINTENANCE_INTERVAL = 60
+
+# kind -> fn(job, **params); filled in by @handler below
+HANDLERS = {}
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def handler(kind):
+    """Register `fn(job, **params)` as the runner of jobs of `kind`.
+
+    It runs inside an app context and may return the name of a file it
+    wrote to JOB_ARTIFACT_DIR, which the owner can then download.
+    """
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def params_of(job):
+    return msgspec.json.decode(job.params)
+
+
+def artifact_path(job):
+    return os.path.join(current_app.config['JOB_ARTIFACT_DIR'], job.artifact)
+
+
+def remove_artifact(job):
+    if job.artifact:
+        try:
+            os.remove(artifact_path(job))
+        except FileNotFoundError:
+            pass
+
+
+def describe(job):
+    """The polling endpoint's view of a job."""
+    info = dict(
+        id=job.id, kind=job.kind, status=job.status, error=job.error,
+        created_at=job.created_at.isoformat(),
+        started_at=job.started_at.isoformat() if job.started_at else None,
+        finished_at=job.finished_at.isoformat() if job.finished_at else None,
+    )
+    if job.status == 'done' and job.artifact:
+        info['download'] = url_for('main.job_download', job_id=job.id)
+    return info
+
+
+def exceeds(user_id, threshold):
+    """True if the user has more than `threshold` entries (a threshold of 0 never trips)."""
+    return bool(threshold) and rollups.entry_count(user_id) > threshold
+
+
+def enqueue(kind, owner_id=None, **params):
+    """Queue a job and wake this process's workers; commits.
+
+    `owner_id` is the user allowed to poll the job and download its file.
+    An identical job (kind, owner and params) that is still queued or
+    running, or that finished and whose file is still there, is returned
+    instead of doing the work twice.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind!r}")
+    encoded = msgspec.json.encode(params, order='sorted').decode()
+    existing = (
+        Job.query.filter(Job.user_id == owner_id, Job.kind == kind, Job.params == encoded,
+                         Job.status.in_(('queued', 'running', 'done')))
+        .order_by(Job.id.desc()).first()
+    )
+    if existing is not None and (
+        existing.status != 'done' or (existing.artifact and os.path.exists(artifact_path(existing)))
+    ):
+        return existing
+
+    job = Job(user_id=owner_id, kind=kind, params=encoded, status='queued', attempts=0, created_at=_utcnow())
+    db.session.add(job)
+    db.session.commit()
+    pool.wake()
+    return job
+
+
+def claim():
+    """Mark the oldest queued job running and return it, or None if there is none.
+
+    The candidate is found with a plain read, so an idle poll never takes
+    SQLite's write lock; the update then only succeeds for one worker.
+    """
+    job_id = db.session.scalar(select(Job.id).where(Job.status == 'queued').order_by(Job.id).limit(1))
+    if job_id is None:
+        db.session.rollback()
+        return None
+    claimed = db.session.execute(
+        update(Job).where(Job.id == job_id, Job.status == 'queued')
+        .values(status='running', started_at=_utcnow(), heartbeat_at=_utcnow(), attempts=Job.attempts + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return db.session.get(Job, job_id) if claimed else None
+
+
+def heartbeat(engine, job_id, interval, stop, logger):
+    """Touch the job's heartbeat_at every `interval` seconds until `stop` is set.
+
+    Runs on a thread of its own with its own connections, so a handler busy
+    in a long statement still shows as alive to maintain().
+    """
+    table = Job.__table__
+    while not stop.wait(interval):
+        try:
+            with engine.begin() as conn:
+                conn.execute(update(table).where(table.c.id == job_id).values(heartbeat_at=_utcnow()))
+        except Exception:
+            # e.g. "database is locked" by the job itself; the next beat tries again
+            logger.warning(f"[JOB] #{job_id} heartbeat failed", exc_info=True)
+
+
+def execute(job):
+    """Run a claimed job, keeping its heartbeat fresh, and record whether it succeeded."""
+    started = time.perf_counter()
+    stop = threading.Event()
+    beat = threading.Thread(
+        target=heartbeat, name=f"job-{job.id}-heartbeat", daemon=True,
+        args=(db.engine, job.id, current_app.config['JOB_HEARTBEAT_INTERVAL'], stop, current_app.logger),
+    )
+    beat.start()
+    try:
+        fn = HANDLERS.get(job.kind)
+        if fn is None:
+            raise LookupError(f"No handler for job kind {job.kind!r}")
+        artifact = fn(job, **params_of(job))
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.exception(f"[JOB] #{job.id} {job.kind} failed")
+        job.status = 'failed'
+        job.error = f"{type(exc).__name__}: {exc}"
+    else:
+        job.status = 'done'
+        job.artifact = artifact
+        current_app.logger.info(f"[JOB] #{job.id} {job.kind} done in {time.perf_counter() - started:.1f}s")
+    finally:
+        stop.set()
+        beat.join()
+    job.finished_at = _utcnow()
+    db.session.commit()
+
+
+def maintain(config):
+    """Requeue jobs whose worker vanished and drop finished jobs past JOB_ARTIFACT_TTL.
+
+    A running job whose heartbeat is older than JOB_TIMEOUT is assumed lost
+    (its process died) and queued again, or failed once it has had
+    JOB_MAX_ATTEMPTS runs. A job that is merely slow keeps its heartbeat
+    fresh and is left alone.
+    """
+    now = _utcnow()
+    last_seen = func.coalesce(Job.heartbeat_at, Job.started_at)
+    stale = (Job.status == 'running', last_seen < now - timedelta(seconds=config['JOB_TIMEOUT']))
+    db.session.execute(
+        update(Job).where(*stale, Job.attempts < config['JOB_MAX_ATTEMPTS']).values(status='queued')
+    )
+    db.session.execute(
+        update(Job).where(*stale).values(status='failed', error='Timed out', finished_at=now)
+    )
+    expired = Job.query.filter(
+        Job.status.in_(('done', 'failed')), Job.finished_at < now - timedelta(seconds=config['JOB_ARTIFACT_TTL'])
+    ).all()
+    for job in expired:
+        remove_artifact(job)
+    if expired:
+        db.session.execute(delete(Job).where(Job.id.in_([job.id for job in expired])))
+    db.session.commit()
+
+
+def work(app, stop, wakeup=None, burst=False):
+    """Claim and run jobs until `stop` is set, or with `burst` until the queue is empty.
+
+    Each job runs in a fresh app context, so its session (and identity
+    map) is discarded afterwards. `wakeup` cuts the idle wait short.
+    """
+    interval = app.config['JOB_POLL_INTERVAL']
+    next_maintenance = 0
+    while not stop.is_set():
+        with app.app_context():
+            try:
+                if time.monotonic() >= next_maintenance:
+                    maintain(app.config)
+                    next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+                job = claim()
+                if job is not None:
+                    execute(job)
+                    continue
+            except Exception:
+                # e.g. "database is locked" or tables not migrated yet; try again later
+                db.session.rollback()
+                app.logger.exception("[JOB] Worker error")
+        if burst:
+            return
+        if wakeup is None:
+            stop.wait(interval)
+        else:
+            wakeup.wait(interval)
+            wakeup.clear()
+
+
+class WorkerPool:
+    """JOB_WORKERS daemon threads running work() inside an app process.
+
+    They start with the first request a process serves, so every forked
+    gunicorn worker gets its own; enqueue() wakes them straight away.
+    """
+
+    def __init__(self):
+        self.threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+
+    def ensure_started(self, app, count):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            # Threads do not survive fork(); start new ones in each process.
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            self._wakeup = threading.Event()
+            self.threads = [
+                threading.Thread(target=work, args=(app, self._stop, self._wakeup),
+                                 name=f"job-worker-{n}", daemon=True)
+                for n in range(count)
+            ]
+            for thread in self.threads:
+                thread.start()
+
+    def wake(self):
+        self._wakeup.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+
+pool = WorkerPool()
+
+
+def init_jobs(app):
+    """Resolve JOB_ARTIFACT_DIR and start JOB_WORKERS threads per process on first request."""
+    if not app.config.get('JOB_ARTIFACT_DIR'):
+        app.config['JOB_ARTIFACT_DIR'] = os.path.join(app.instance_path, 'exports')
+    os.makedirs(app.config['JOB_ARTIFACT_DIR'], exist_ok=True)
+
+    workers = app.config['JOB_WORKERS']
+    if not workers:
+        return
+
+    @app.before_request
+    def start_job_workers():
+        pool.ensure_started(app, workers)
+
+    atexit.register(pool.stop)
+
+
+# ---- Job kinds
+
+@handler('export')
+def run_export(job, format, start_date=None, end_date=None, compress=False, data_version=0):
+    """Write the owner's export to JOB_ARTIFACT_DIR (data_version only keeps enqueue() from reusing stale files)."""
+    _, filename = export_file(format, compress)
+    artifact = f"{job.id}-{filename}"
+    path = os.path.join(current_app.config['JOB_ARTIFACT_DIR'], artifact)
+    chunks = export_chunks(
+        format, job.user_id,
+        date.fromisoformat(start_date) if start_date else None,
+        date.fromisoformat(end_date) if end_date else None,
+        compress, current_app.config['EXPORT_BATCH_SIZE'],
+    )
+    # Written under a temporary name so a crash never leaves a truncated file behind
+    with open(path + '.part', 'wb') as out:
+        for chunk in chunks:
+            out.write(chunk)
+    os.replace(path + '.part', path)
+    db.session.rollback()
+    return artifact
+
+
+def purge_user(user_id, batch_size=None):
+    """Delete a user with their entries (archived ones too), categories, derived rows and jobs.
+
+    Without `batch_size` it all happens in the caller's transaction. With
+    it, entries go `batch_size` at a time, each batch committed on its own,
+    so a large account never holds SQLite's write lock for long.
+    """
+    EntryAnomaly.query.filter_by(user_id=user_id).delete()
+    SpendingForecast.query.filter_by(user_id=user_id).delete()
+    MonthlyRollup.query.filter_by(user_id=user_id).delete()
+    if batch_size:
+        db.session.commit()
+        while True:
+            ids = db.session.scalars(
+                select(BudgetEntry.id).where(BudgetEntry.user_id == user_id).limit(batch_size)
+            ).all()
+            if not ids:
+                break
+            BudgetEntry.query.filter(BudgetEntry.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+    else:
+        BudgetEntry.query.filter_by(user_id=user_id).delete()
+    Category.query.filter_by(user_id=user_id).delete()
+    owned = Job.query.filter_by(user_id=user_id).all()
+    for job in owned:
+        remove_artifact(job)
+        db.session.delete(job)
+    user = db.session.get(User, user_id)
+    if user is not None:
+        db.session.delete(user)
+    from app import archive  # NumPy; imported on first use
+    archive.remove_user(user_id)
+
+
+@handler('purge_account')
+def purge_account(job, user_id):
+    purge_user(user_id, current_app.config['JOB_PURGE_BATCH_SIZE'])
+    db.session.commit()
+
+
+@handler('rebuild_rollups')
+def rebuild_rollups(job, user_id=None):
+    rollups.rebuild(user_id)
+    db.session.commit()
+
+
+@handler('analytics')
+def run_analytics(job, user_id=None):
+    from app.analytics import jobs as analytics_jobs  # NumPy; only workers need it
+    analytics_jobs.run(dict(current_app.config), [user_id] if user_id else None)
+
+
+@handler('archive')
+def run_archive(job, user_id=None):
+    from app import archive
+    archive.run(current_app.config['ARCHIVE_AFTER_DAYS'], [user_id] if user_id else None)
@@ -0,0 +1,127 @@
+from collections import namedtuple
+from datetime import datetime
+import json
+import os
+import re
+
+LogLine = namedtuple('LogLine', ['timestamp', 'level', 'message', 'raw'])
+
+LINE_PATTERN = re.compile(
+    r'^\[(?P<ts>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] '
+    r'(?:(?P<level>DEBUG|INFO|WARNING|ERROR|CRITICAL) )?(?P<message>.*)$'
+)
+
+
+def parse_line(raw):
+    """Split a text or JSON-lines audit log line into a LogLine (fields are None if unparsable)."""
+    if raw.startswith('{'):
+        try:
+            record = json.loads(raw)
+            timestamp = datetime.strptime(record['ts'], '%Y-%m-%d %H:%M:%S')
+            return LogLine(timestamp, record.get('level'), record.get('message', ''), raw)
+        except (ValueError, KeyError, TypeError):
+            return LogLine(None, None, raw, raw)
+    match = LINE_PATTERN.match(raw)
+    if not match:
+        return LogLine(None, None, raw, raw)
+    timestamp = datetime.strptime(match.group('ts'), '%Y-%m-%d %H:%M:%S')
+    return LogLine(timestamp, match.group('level'), match.group('message'), raw)
+
+
+def log_files(path):
+    """The live log followed by RotatingFileHandler backups, newest first."""
+    files = []
+    candidate, index = path, 0
+    while os.path.exists(candidate):
+        files.append(candidate)
+        index += 1
+        candidate = f"{path}.{index}"
+    return files
+
+
+def _reverse_lines(file, end, block_size):
+    """Yield (start_offset, line) for the lines of `file` ending at or before `end`, last first."""
+    position = end
+    remainder = b''
+    while position > 0:
+        read_size = min(block_size, position)
+        position -= read_size
+        file.seek(position)
+        chunk = file.read(read_size) + remainder
+        lines = chunk.split(b'\n')
+        # The first piece may be a partial line; keep it for the next block.
+        remainder = lines.pop(0)
+        offset = position + len(remainder) + 1
+        starts = []
+        for line in lines:
+            starts.append(offset)
+            offset += len(line) + 1
+        for start, line in reversed(list(zip(starts, lines))):
+            if line:
+                yield start, line
+    if remainder:
+        yield 0, remainder
+
+
+def encode_cursor(inode, offset):
+    return f"{inode}-{offset}"
+
+
+def decode_cursor(cursor):
+    try:
+        inode, offset = cursor.split('-')
+        return int(inode), int(offset)
+    except (AttributeError, ValueError) as exc:
+        raise ValueError("Invalid log cursor") from exc
+
+
+def read_tail(path, limit=200, cursor=None, level=None, tag=None, since=None, until=None,
+              block_size=64 * 1024):
+    """Return (lines, next_cursor) for the newest `limit` matching lines, newest first.
+
+    Files are read backwards in `block_size` blocks, so the cost depends on how
+    far back the page is, not on the size of the logs. The cursor pins the
+    file by inode and byte offset, which stays valid across rotations since
+    RotatingFileHandler renames the files. Filtering by `level`, `tag`
+    (substring such as "[LOGIN]") and `since`/`until` datetimes happens while
+    reading; reading stops as soon as lines are older than `since`.
+    """
+    files = log_files(path)
+    start_index, end = 0, None
+    if cursor:
+        inode, end = decode_cursor(cursor)
+        for index, name in enumerate(files):
+            if os.stat(name).st_ino == inode:
+                start_index = index
+                break
+        else:
+            return [], None
+
+    lines = []
+    for name in files[start_index:]:
+        with open(name, 'rb') as file:
+            inode = os.fstat(file.fileno()).st_ino
+            file_end = os.fstat(file.fileno()).st_size if end is None else end
+            end = None
+            for start, raw in _reverse_lines(file, file_end, block_size):
+                line = parse_line(raw.rstrip(b'\r').decode('utf-8', errors='replace'))
+                if since and line.timestamp and line.timestamp < since:
+                    return lines, None
+                if not _matches(line, level, tag, since, until):
+                    continue
+                lines.append(line)
+                if len(lines) >= limit:
+                    return lines, (encode_cursor(inode, start) if start > 0 or name != files[-1] else None)
+    return lines, None
+
+
+def _matches(line, level, tag, since, until):
+    if level and line.level != level:
+        return False
+    if tag and tag not in line.message:
+        return False
+    if (since or until) and line.timestamp is None:
+        return False
+    if until and line.timestamp > until:
+        return False
+    return True
@@ -1,11 +1,44 @@
 from app import db, login_manager
+from app.cache import TTLCache
+from flask import g, has_app_context
 from flask_login import UserMixin
+from sqlalchemy import event
+import math
+
+# Per-process cache of CachedUser records, sized and timed by create_app
+# (USER_CACHE_SIZE / USER_CACHE_TTL). Other workers see changes after the TTL.
+user_cache = TTLCache(maxsize=10000, ttl=30)
+
+class CachedUser(UserMixin):
+    """Detached id/email/role/data_version record used as current_user instead of a User row."""
+
+    def __init__(self, id, email, role, data_version=0):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.data_version = data_version
+
+    def __repr__(self):
+        return f"<CachedUser {self.email}>"
 
 # User loader for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
-    """Return user by ID for Flask-Login."""
-    return User.query.get(int(user_id))
+    """Return user by ID for Flask-Login, from the request memo or the user cache if possible."""
+    user_id = int(user_id)
+    loaded = g.setdefault('loaded_users', {})
+    if user_id in loaded:
+        return loaded[user_id]
+
+    user = user_cache.get(user_id)
+    if user is None:
+        row = db.session.query(User.id, User.email, User.role, User.data_version).filter(User.id == user_id).first()
+        # Accounts being purged in the background are already signed out
+        if row is not None and row.role != 'deleted':
+            user = CachedUser(*row)
+            user_cache.set(user_id, user)
+    loaded[user_id] = user
+    return user
 
 # User Model
 class User(db.Model, UserMixin):
@@ -13,9 +46,13 @@ class User(db.Model, UserMixin):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(60), nullable=False)
     
-    # Role: 'user' (default) or 'admin'
+    # Role: 'user' (default), 'admin', or 'deleted' while a purge job runs
     role = db.Column(db.String(10), nullable=False, default='user')
 
+    # Bumped whenever the user's entries or categories change; part of the
+    # response cache keys and ETags (see app/response_cache.py)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
     # Relationships
     categories = db.relationship('Category', backref='owner', lazy=True)
     entries = db.relationship('BudgetEntry', backref='owner', lazy=True)
@@ -23,23 +60,185 @@ class User(db.Model, UserMixin):
     def __repr__(self):
         return f"<User {self.email}>"
 
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(mapper, connection, target):
+    """Drop a user's cached record when the row changes (e.g. role) or is deleted."""
+    user_cache.pop(target.id)
+    if has_app_context():
+        g.get('loaded_users', {}).pop(target.id, None)
+
 # Category Model
 class Category(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    __table_args__ = (
+        db.Index('uq_category_user_name', 'user_id', 'name', unique=True),
+    )
+
     def __repr__(self):
         return f"<Category {self.name}>"
 
+# Entry types are stored as small integers; the codes must never be reused.
+ENTRY_TYPE_CODES = {'income': 1, 'expense': 2}
+ENTRY_TYPE_NAMES = {code: name for name, code in ENTRY_TYPE_CODES.items()}
+
+class EntryType(db.TypeDecorator):
+    """'income' / 'expense' in Python, a SMALLINT code (ENTRY_TYPE_CODES) in the database."""
+    impl = db.SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return ENTRY_TYPE_CODES[value]
+        except KeyError:
+            raise ValueError(f"Unknown entry type: {value!r}") from None
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else ENTRY_TYPE_NAMES[value]
+
+# Largest amount of a single entry, in euros; well inside a 32-bit INTEGER of
+# cents. Sums of many entries (the monthly rollups) are stored as BIGINT.
+MAX_AMOUNT = 1_000_000
+
+# The INTEGER range shared by SQLite and PostgreSQL
+MAX_CENTS = 2**31 - 1
+
+class Cents(db.TypeDecorator):
+    """Money as euros (float) in Python and whole cents (INTEGER) in the database.
+
+    SUM() over a Cents column is therefore exact integer arithmetic; only the
+    result is converted back to euros.
+    """
+    impl = db.Integer
+    cache_ok = True
+    max_cents = MAX_CENTS
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not math.isfinite(value) or abs(value) * 100 > self.max_cents:
+            raise ValueError(
+                f"Amount out of range: {value!r} (at most {self.max_cents / 100:,.2f} in either direction)"
+            )
+        return round(value * 100)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else value / 100
+
+class BigCents(Cents):
+    """Cents in a BIGINT column, for totals that add up many entries."""
+    impl = db.BigInteger
+    cache_ok = True
+    max_cents = 2**63 - 1
+
 # Budget Entry Model
 class BudgetEntry(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     date = db.Column(db.Date, nullable=False)
-    category = db.Column(db.String(50), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
+    amount = db.Column('amount_cents', Cents, key='amount', nullable=False)
+    type = db.Column('type_code', EntryType, key='type', nullable=False)  # 'income' or 'expense'
+
+    # Loaded with the entry (a primary key join) wherever whole entries are read
+    category = db.relationship('Category', lazy='joined', innerjoin=True)
+
+    # Every query is scoped to one user; these cover the dashboard listing,
+    # the type/date summaries (amount included so sums are index-only) and
+    # the category filter.
+    __table_args__ = (
+        db.Index('ix_budget_entry_user_date', 'user_id', 'date'),
+        db.Index('ix_budget_entry_user_type_date', 'user_id', 'type', 'date', 'amount'),
+        db.Index('ix_budget_entry_user_category_date', 'user_id', 'category_id', 'date'),
+    )
+
+    def __repr__(self):
+        return f"<BudgetEntry {self.date} - {self.category_id} - {self.amount}€>"
+
+# Monthly Rollup Model (per user, month, category and type)
+class MonthlyRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
+    type = db.Column('type_code', EntryType, key='type', nullable=False)
+    total = db.Column('total_cents', BigCents, key='total', nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('uq_monthly_rollup_key', 'user_id', 'year', 'month', 'category_id', 'type', unique=True),
+    )
+
+    def __repr__(self):
+        return f"<MonthlyRollup {self.year}-{self.month:02d} {self.category_id} {self.type} {self.total}>"
+
+# Precomputed analytics (written by 'flask analytics run', read by the dashboard)
+class SpendingForecast(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
     amount = db.Column(db.Float, nullable=False)
-    type = db.Column(db.String(10), nullable=False)  # 'income' or 'expense'
+    computed_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('uq_spending_forecast_key', 'user_id', 'year', 'month', 'category_id', unique=True),
+    )
+
+    def __repr__(self):
+        return f"<SpendingForecast {self.year}-{self.month:02d} {self.category_id} {self.amount}>"
+
+class EntryAnomaly(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    entry_id = db.Column(db.Integer, db.ForeignKey('budget_entry.id'), nullable=False, unique=True)
+    score = db.Column(db.Float, nullable=False)     # robust z-score within the category
+    typical = db.Column(db.Float, nullable=False)   # the category's median amount
+    computed_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<EntryAnomaly entry={self.entry_id} score={self.score:.1f}>"
+
+# Background jobs (app/jobs.py): queued by the routes and the CLI, run by
+# worker threads in the app processes or by 'flask jobs worker'
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # Nullable: an account purge outlives the user it deletes
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    kind = db.Column(db.String(30), nullable=False)
+    params = db.Column(db.Text, nullable=False, default='{}')   # JSON object
+    status = db.Column(db.String(10), nullable=False, default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    artifact = db.Column(db.String(255), nullable=True)  # file name under JOB_ARTIFACT_DIR
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # touched by the worker while running
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # Workers claim the oldest queued job; users poll their own
+    __table_args__ = (
+        db.Index('ix_job_status_id', 'status', 'id'),
+        db.Index('ix_job_user_id', 'user_id', 'id'),
+    )
+
+    def __repr__(self):
+        return f"<Job #{self.id} {self.kind} {self.status}>"
+
+# Server-side session storage (SESSION_BACKEND = 'sql')
+class SessionRecord(db.Model):
+    __tablename__ = 'session_store'
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(255), unique=True, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    expiry = db.Column(db.DateTime, nullable=False, index=True)
 
     def __repr__(self):
-        return f"<BudgetEntry {self.date} - {self.category} - {self.amount}€>"
+        return f"<SessionRecord {self.session_id} until {self.expiry}>"
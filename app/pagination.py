@@ -0,0 +1,61 @@
+from app.models import BudgetEntry
+from sqlalchemy import or_, and_
+from datetime import date
+from itertools import islice
+import base64
+import heapq
+
+
+def encode_cursor(entry_date, entry_id):
+    """Encode the (date, id) of the last row on a page into an opaque token."""
+    raw = f"{entry_date.isoformat()}:{entry_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Decode a cursor token back into (date, id). Raises ValueError if malformed."""
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        day, entry_id = raw.split(":")
+        return date.fromisoformat(day), int(entry_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def keyset_page(query, cursor=None, limit=50):
+    """Return (entries, next_cursor) for a BudgetEntry query, newest first.
+
+    Rows are ordered by (date, id) descending and the cursor marks the last row
+    already seen, so every page is a bounded index range scan with no OFFSET.
+    """
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            BudgetEntry.date < last_date,
+            and_(BudgetEntry.date == last_date, BudgetEntry.id < last_id)
+        ))
+    rows = query.order_by(BudgetEntry.date.desc(), BudgetEntry.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].date, rows[-1].id)
+    return rows, next_cursor
+
+
+def merge_page(rows, next_cursor, more_rows, limit=50):
+    """Merge a keyset_page() result with other rows past the same cursor (e.g. archived entries).
+
+    Both lists are newest first; `more_rows` should hold up to limit + 1 rows
+    so it is known whether another page follows. Returns (rows, next_cursor).
+    """
+    if not more_rows:
+        return rows, next_cursor
+    seen = {row.id for row in rows}
+    merged = heapq.merge(rows, [row for row in more_rows if row.id not in seen],
+                         key=lambda row: (row.date, row.id), reverse=True)
+    merged = list(islice(merged, limit + 1))
+    if len(merged) > limit or next_cursor:
+        merged = merged[:limit]
+        next_cursor = encode_cursor(merged[-1].date, merged[-1].id)
+    return merged, next_cursor
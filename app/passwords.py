@@ -0,0 +1,105 @@
+from app.profiling import timed
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+import multiprocessing
+import threading
+import atexit
+import bcrypt
+import os
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool already has as much work queued as it accepts,
+    or a hash takes longer than PASSWORD_HASH_TIMEOUT."""
+
+
+class PasswordHasher:
+    """bcrypt hashing and verification on a bounded process pool.
+
+    Requests beyond PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_DEPTH in flight
+    are rejected with HashingBusy instead of piling up behind each other.
+    PASSWORD_HASH_WORKERS = 0 hashes inline (useful for tests and the CLI).
+    The work factor comes from BCRYPT_LOG_ROUNDS; hashes made with another
+    cost report needs_rehash() so login can upgrade them.
+    """
+
+    def __init__(self, app=None):
+        self.rounds = 12
+        self.workers = 0
+        self.timeout = None
+        self._dummy = None
+        self._slots = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.rounds = app.config['BCRYPT_LOG_ROUNDS']
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        self._dummy = None
+        self._slots = threading.BoundedSemaphore(self.workers + app.config['PASSWORD_HASH_QUEUE_DEPTH'])
+        self._shutdown()
+        atexit.register(self._shutdown)
+
+    def _pool(self):
+        with self._lock:
+            # A pool inherited through fork() is unusable; start a new one per worker.
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _shutdown(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def _run(self, fn, *args):
+        with timed('hash'):
+            if not self.workers:
+                return fn(*args)
+            if not self._slots.acquire(blocking=False):
+                raise HashingBusy()
+            try:
+                future = self._pool().submit(fn, *args)
+            except BaseException:
+                self._slots.release()
+                raise
+            # The slot is held until the work is done, even if we stop waiting for it
+            future.add_done_callback(lambda _: self._slots.release())
+            try:
+                return future.result(timeout=self.timeout)
+            except TimeoutError:
+                future.cancel()  # only drops it if no worker has started it yet
+                raise HashingBusy() from None
+
+    def hash(self, password):
+        """Return a bcrypt hash of `password` as text."""
+        salt = bcrypt.gensalt(self.rounds)
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def verify(self, hashed, password):
+        """Check `password` against a stored bcrypt hash."""
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def dummy_hash(self):
+        """A hash of no known password at the configured work factor.
+
+        Verifying against it when no account matches costs as much as a
+        real check, so response times do not tell which emails exist.
+        """
+        if self._dummy is None:
+            self._dummy = bcrypt.hashpw(os.urandom(16).hex().encode(), bcrypt.gensalt(self.rounds)).decode('utf-8')
+        return self._dummy
+
+    def needs_rehash(self, hashed):
+        """True if `hashed` was made with a different work factor than configured."""
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
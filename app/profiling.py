@@ -0,0 +1,289 @@
+from flask import g, request, has_request_context, before_render_template, template_rendered
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import Counter
+from contextlib import contextmanager
+import threading
+import bisect
+import time
+import sys
+import os
+
+# Upper bounds of the histogram buckets: seconds for durations, statements
+# for query counts.
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+# Server-Timing metric names and descriptions of the phases timed in a request
+PHASES = {
+    'sql': 'SQL',
+    'template': 'Templates',
+    'hash': 'Password hashing',
+    'session_open': 'Session load',
+}
+
+
+class RequestProfile:
+    """Timings collected for the current request (stored on g)."""
+
+    __slots__ = ('started', 'queries', 'phases', 'template_started', 'sampler')
+
+    def __init__(self, started=None):
+        self.started = started or time.perf_counter()
+        self.queries = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.template_started = []
+        self.sampler = None
+
+
+def current_profile():
+    """The profile of the current request, or None outside a request or with profiling off."""
+    if not has_request_context():
+        return None
+    return g.get('_profile')
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to `phase` of the current request's profile."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile = current_profile()
+        if profile is not None:
+            profile.phases[phase] += time.perf_counter() - started
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Per-endpoint histograms and response counters for this process.
+
+    Every worker process keeps its own; a scrape of /admin/metrics sees the
+    process that served it, identified by the `pid` label.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.durations = {}
+            self.queries = {}
+            self.phases = {}
+            self.responses = Counter()
+
+    def observe(self, endpoint, method, status, duration, profile):
+        with self._lock:
+            key = (endpoint, method)
+            self.durations.setdefault(key, Histogram(DURATION_BUCKETS)).observe(duration)
+            self.queries.setdefault(key, Histogram(QUERY_BUCKETS)).observe(profile.queries)
+            for phase, seconds in profile.phases.items():
+                if seconds:
+                    self.phases.setdefault((endpoint, method, phase), Histogram(DURATION_BUCKETS)).observe(seconds)
+            self.responses[(endpoint, method, status)] += 1
+
+    def render(self):
+        """The metrics in the Prometheus text exposition format."""
+        pid = os.getpid()
+        lines = []
+
+        def histogram(name, help_text, series, label_names):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in sorted(series.items()):
+                labels = _labels(dict(zip(label_names, key), pid=pid))
+                cumulative = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"{name}_sum{{{labels}}} {hist.sum:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+        with self._lock:
+            histogram("smartbudget_request_duration_seconds", "Time from request start to response.",
+                      self.durations, ("endpoint", "method"))
+            histogram("smartbudget_request_sql_queries", "SQL statements executed per request.",
+                      self.queries, ("endpoint", "method"))
+            histogram("smartbudget_request_phase_duration_seconds",
+                      "Time per request spent in SQL, template rendering, password hashing and session loading.",
+                      self.phases, ("endpoint", "method", "phase"))
+            lines.append("# HELP smartbudget_responses_total Responses by endpoint and status code.")
+            lines.append("# TYPE smartbudget_responses_total counter")
+            for (endpoint, method, status), count in sorted(self.responses.items()):
+                labels = _labels(dict(endpoint=endpoint, method=method, status=status, pid=pid))
+                lines.append(f"smartbudget_responses_total{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(values):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ",".join(f'{name}="{escape(value)}"' for name, value in values.items())
+
+
+metrics = Metrics()
+
+
+class StackSampler(threading.Thread):
+    """Sample one thread's stack every `interval` seconds into folded-stack counts.
+
+    The output (one "frame;frame;frame count" line per distinct stack) is
+    what flamegraph.pl, speedscope and inferno read.
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return self.stacks
+
+
+def write_folded(directory, endpoint, stacks):
+    """Append `stacks` to <directory>/<endpoint>.folded; tools sum repeated stacks."""
+    if not stacks:
+        return
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{endpoint}.folded"), 'a') as f:
+        f.writelines(f"{stack} {count}\n" for stack, count in stacks.items())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile() is not None:
+        conn.info['_profile_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile()
+    started = conn.info.pop('_profile_started', None)
+    if profile is not None and started is not None:
+        profile.queries += 1
+        profile.phases['sql'] += time.perf_counter() - started
+
+
+def _before_render_template(app, template, context, **extra):
+    profile = current_profile()
+    if profile is not None:
+        profile.template_started.append(time.perf_counter())
+
+
+def _template_rendered(app, template, context, **extra):
+    profile = current_profile()
+    if profile is not None and profile.template_started:
+        profile.phases['template'] += time.perf_counter() - profile.template_started.pop()
+
+
+def _timed_open_session(open_session):
+    def wrapper(app, request):
+        started = time.perf_counter()
+        session = open_session(app, request)
+        # Sessions are opened before any before_request hook, so the
+        # profile starts here to include the load.
+        g._profile = RequestProfile(started)
+        g._profile.phases['session_open'] = time.perf_counter() - started
+        return session
+    return wrapper
+
+
+def init_profiling(app):
+    """Time every request and record per-endpoint metrics (and Server-Timing headers for admins).
+
+    SQL statements are counted through engine events, template rendering
+    through Flask's template signals and password hashing by
+    PasswordHasher. Endpoints listed in PROFILE_ENDPOINTS are additionally
+    sampled every PROFILE_INTERVAL seconds into folded stacks under
+    PROFILE_DIR.
+    """
+    if not app.config['PROFILING_ENABLED']:
+        return
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render_template, app)
+    template_rendered.connect(_template_rendered, app)
+
+    interface = app.session_interface
+    interface.open_session = _timed_open_session(interface.open_session)
+
+    sampled = set(app.config['PROFILE_ENDPOINTS'])
+    interval = app.config['PROFILE_INTERVAL']
+    profile_dir = app.config['PROFILE_DIR']
+    server_timing = app.config['SERVER_TIMING_ENABLED']
+
+    @app.before_request
+    def start_profile():
+        profile = g.get('_profile')
+        if profile is None:
+            profile = g._profile = RequestProfile()
+        if request.endpoint in sampled:
+            profile.sampler = StackSampler(threading.get_ident(), interval)
+            profile.sampler.start()
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.get('_profile')
+        if profile is None:
+            return response
+        duration = time.perf_counter() - profile.started
+        endpoint = request.endpoint or 'unmatched'
+        if profile.sampler is not None:
+            write_folded(profile_dir, endpoint, profile.sampler.stop())
+            profile.sampler = None
+        metrics.observe(endpoint, request.method, response.status_code, duration, profile)
+        if server_timing and current_user.is_authenticated and current_user.role == 'admin':
+            entries = [f'app;dur={duration * 1000:.1f}']
+            for phase, description in PHASES.items():
+                seconds = profile.phases[phase]
+                if phase == 'sql':
+                    description = f"{description} ({profile.queries} queries)"
+                elif not seconds:
+                    continue
+                entries.append(f'{phase};dur={seconds * 1000:.1f};desc="{description}"')
+            response.headers.add('Server-Timing', ", ".join(entries))
+        return response
+
+    @app.teardown_request
+    def stop_sampler(exc):
+        # after_request does not run when a view raises; don't leave the thread behind.
+        profile = g.pop('_profile', None)
+        if profile is not None and profile.sampler is not None:
+            profile.sampler.stop()
+            profile.sampler = None
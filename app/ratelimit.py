@@ -0,0 +1,125 @@
+from flask_login import current_user
+from flask_limiter.util import get_remote_address
+from limits.storage import Storage
+import threading
+import sqlite3
+import time
+import os
+
+
+class SQLiteStorage(Storage):
+    """Fixed-window rate limit counters in a SQLite file shared by every worker on a host.
+
+    Configure with RATELIMIT_STORAGE_URI = 'sqlite:////abs/path/ratelimits.db'
+    (three slashes for a relative path, as with SQLAlchemy). Each increment is
+    one atomic upsert, so concurrent gunicorn workers see the same counters.
+    The database runs in WAL mode with a memory-mapped read path (mmap_size),
+    which keeps lookups off the read() syscall path. Expired keys are deleted
+    in small batches every `cleanup_every` increments.
+
+    Only the fixed-window strategy (Flask-Limiter's default) is supported.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, timeout=5.0, mmap_size=64 * 1024 * 1024,
+                 cleanup_every=1000, **options):
+        path = uri.split('://', 1)[1][1:]
+        if not path:
+            raise ValueError("sqlite:// rate limit storage needs a file path")
+        self.path = path
+        self.timeout = float(timeout)
+        self.mmap_size = int(mmap_size)
+        self.cleanup_every = int(cleanup_every)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                " key TEXT PRIMARY KEY, value INTEGER NOT NULL, expiry REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limits_expiry ON rate_limits (expiry)")
+        finally:
+            conn.close()
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        return conn
+
+    @property
+    def _conn(self):
+        # One connection per thread, reopened in forked workers.
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.conn = self._connect()
+            local.pid = os.getpid()
+            local.calls = 0
+        return local.conn
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        conn = self._conn
+        value = conn.execute(
+            "INSERT INTO rate_limits (key, value, expiry) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            " value = CASE WHEN rate_limits.expiry <= ? THEN excluded.value"
+            "              ELSE rate_limits.value + excluded.value END,"
+            " expiry = CASE WHEN rate_limits.expiry <= ? THEN excluded.expiry"
+            "               ELSE rate_limits.expiry END "
+            "RETURNING value",
+            (key, amount, now + expiry, now, now),
+        ).fetchone()[0]
+        self._local.calls += 1
+        if self.cleanup_every and self._local.calls % self.cleanup_every == 0:
+            self._delete_expired(now)
+        return value
+
+    def get(self, key):
+        row = self._conn.execute(
+            "SELECT value FROM rate_limits WHERE key = ? AND expiry > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT expiry FROM rate_limits WHERE key = ? AND expiry > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def check(self):
+        try:
+            self._conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._conn.execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key):
+        self._conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    def _delete_expired(self, now, batch_size=1000):
+        self._conn.execute(
+            "DELETE FROM rate_limits WHERE key IN "
+            "(SELECT key FROM rate_limits WHERE expiry <= ? LIMIT ?)",
+            (now, batch_size),
+        )
+
+
+def user_or_ip():
+    """Rate limit key: the logged-in user's id, or the client address for anonymous requests."""
+    if current_user and current_user.is_authenticated:
+        return f"user:{current_user.get_id()}"
+    return get_remote_address()
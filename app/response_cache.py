@@ -0,0 +1,103 @@
+from app import db
+from app.cache import TTLCache
+from app.models import User, user_cache
+from flask import current_app, request, session, has_request_context
+from flask_login import current_user
+from flask_wtf.csrf import generate_csrf
+from sqlalchemy import update
+import hashlib
+import time
+
+# Encoded dashboard summaries and export payloads keyed by (user, data
+# version, view, filters). Sized by create_app (RESPONSE_CACHE_*); a change
+# to the user's data bumps the version, so old entries are never read again
+# and simply age out of the LRU.
+response_cache = TTLCache(maxsize=1000, ttl=600, maxbytes=64 * 1024 * 1024)
+
+
+def bump_data_version(*user_ids):
+    """Invalidate the cached responses of `user_ids`. Call inside the transaction that changes their data.
+
+    The user's own session remembers the new version, so the redirect after
+    a write sees it even if another worker (with an older cached user record)
+    serves it. Other sessions pick it up within USER_CACHE_TTL.
+    """
+    table = User.__table__
+    stmt = update(table).where(table.c.id.in_(user_ids)).values(data_version=table.c.data_version + 1)
+    own = (
+        has_request_context() and current_user.is_authenticated
+        and list(user_ids) == [int(current_user.get_id())]
+    )
+    if own:
+        version = db.session.execute(stmt.returning(table.c.data_version)).scalar()
+        session['data_version'] = [user_ids[0], version]
+    else:
+        db.session.execute(stmt)
+    for user_id in user_ids:
+        user_cache.pop(user_id)
+
+
+def data_version():
+    """The current user's data version, without touching the database."""
+    version = getattr(current_user, 'data_version', 0) or 0
+    owner, written = session.get('data_version') or (None, 0)
+    if owner == int(current_user.get_id()):
+        version = max(version, written)
+    return version
+
+
+def cache_key(*parts):
+    """Key for a response of the current user at their current data version."""
+    return (int(current_user.get_id()), data_version()) + parts
+
+
+def etag_for(key):
+    return hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()
+
+
+def page_etag(key):
+    """ETag for an HTML page built from `key` that embeds a CSRF token.
+
+    The session id and the session's CSRF token are part of it, so a page
+    kept from before a logout and login is not revalidated with a stale
+    token, and it changes every half hour so a revalidated page never
+    carries a token older than WTF_CSRF_TIME_LIMIT.
+    """
+    generate_csrf()  # the token the page will embed, created now if the session has none
+    token = session.get(current_app.config['WTF_CSRF_FIELD_NAME'])
+    return etag_for(key + (getattr(session, 'sid', None), token, int(time.time() // 1800)))
+
+
+def not_modified(etag):
+    """A 304 response if the client already has `etag`, else None."""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = current_app.response_class(status=304)
+    return with_etag(response, etag)
+
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Cookie")
+    return response
+
+
+def cached_chunks(key, chunks):
+    """Yield `chunks` and store their concatenation under `key` once complete.
+
+    Payloads larger than RESPONSE_CACHE_MAX_ENTRY_BYTES are streamed but not
+    kept; an abandoned download stores nothing.
+    """
+    limit = current_app.config['RESPONSE_CACHE_MAX_ENTRY_BYTES']
+    parts, size = [], 0
+    for chunk in chunks:
+        if parts is not None:
+            size += len(chunk)
+            if size <= limit:
+                parts.append(chunk)
+            else:
+                parts = None
+        yield chunk
+    if parts is not None:
+        response_cache.set(key, b"".join(parts))
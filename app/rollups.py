@@ -0,0 +1,174 @@
+from app import db
+from app.models import BudgetEntry, MonthlyRollup
+from app.aggregates import category_id_of, named_totals
+from sqlalchemy import func, case, insert
+from app.database import dialect_insert
+from collections import defaultdict
+
+ROLLUP_KEY = ['user_id', 'year', 'month', 'category_id', 'type']
+
+
+def _dialect_insert():
+    return dialect_insert(db.session.get_bind())
+
+
+def apply_rows(rows, sign=1):
+    """Add (or with sign=-1, remove) entry rows from the rollup table.
+
+    `rows` is an iterable of (user_id, date, category_id, type, amount). Deltas
+    are merged per rollup key first (in whole cents) and written with one upsert,
+    inside the caller's transaction, so the rollup commits or rolls back with
+    the entries themselves.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for user_id, day, category_id, type_, amount in rows:
+        delta = deltas[(user_id, day.year, day.month, category_id, type_)]
+        delta[0] += sign * round(amount * 100)
+        delta[1] += sign
+    if not deltas:
+        return
+
+    _upsert(deltas)
+    if sign < 0:
+        user_ids = {key[0] for key in deltas}
+        MonthlyRollup.query.filter(
+            MonthlyRollup.user_id.in_(user_ids), MonthlyRollup.count <= 0
+        ).delete(synchronize_session=False)
+
+
+def _upsert(deltas, batch_size=1000):
+    """Add {rollup key: (cents, count)} to the rollup rows, one upsert per `batch_size` keys."""
+    values = [
+        dict(zip(ROLLUP_KEY, key), total=cents / 100, count=count)
+        for key, (cents, count) in deltas.items()
+    ]
+    for start in range(0, len(values), batch_size):
+        stmt = _dialect_insert()(MonthlyRollup).values(values[start:start + batch_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MonthlyRollup.__table__.c[key] for key in ROLLUP_KEY],
+            set_={
+                'total': MonthlyRollup.total + stmt.excluded.total,
+                'count': MonthlyRollup.count + stmt.excluded.count,
+            }
+        )
+        db.session.execute(stmt)
+
+
+def record_entry(entry):
+    apply_rows([(entry.user_id, entry.date, entry.category_id, entry.type, entry.amount)])
+
+
+def remove_entry(entry):
+    apply_rows([(entry.user_id, entry.date, entry.category_id, entry.type, entry.amount)], sign=-1)
+
+
+def _grouped_entries(user_id=None):
+    year = db.extract('year', BudgetEntry.date)
+    month = db.extract('month', BudgetEntry.date)
+    query = db.session.query(
+        BudgetEntry.user_id, year, month, BudgetEntry.category_id, BudgetEntry.type,
+        func.sum(BudgetEntry.amount), func.count(BudgetEntry.id)
+    )
+    if user_id is not None:
+        query = query.filter(BudgetEntry.user_id == user_id)
+    return query.group_by(BudgetEntry.user_id, year, month, BudgetEntry.category_id, BudgetEntry.type)
+
+
+def _archived_totals(user_id=None):
+    """{rollup key: (cents, count)} of archived entries (app.archive)."""
+    from app import archive  # NumPy; only needed once entries have been archived
+
+    user_ids = archive.archived_users() if user_id is None else [user_id]
+    return {
+        (owner,) + key: value
+        for owner in user_ids
+        for key, value in archive.totals(owner).items()
+    }
+
+
+def rebuild(user_id=None):
+    """Recompute rollups from BudgetEntry and the archive for one user, or for everyone."""
+    delete = MonthlyRollup.query
+    if user_id is not None:
+        delete = delete.filter(MonthlyRollup.user_id == user_id)
+    delete.delete(synchronize_session=False)
+    db.session.execute(
+        insert(MonthlyRollup).from_select(ROLLUP_KEY + ['total', 'count'], _grouped_entries(user_id))
+    )
+    archived = _archived_totals(user_id)
+    if archived:
+        _upsert(archived)
+
+
+def check(user_id=None, tolerance=0):
+    """Return [(key, expected, actual)] for rollup rows that disagree with BudgetEntry and the archive."""
+    expected = {
+        (u, int(y), int(m), c, t): (float(total), count)
+        for u, y, m, c, t, total, count in _grouped_entries(user_id).all()
+    }
+    for key, (cents, count) in _archived_totals(user_id).items():
+        total, entries = expected.get(key, (0.0, 0))
+        expected[key] = ((round(total * 100) + cents) / 100, entries + count)
+    query = MonthlyRollup.query
+    if user_id is not None:
+        query = query.filter(MonthlyRollup.user_id == user_id)
+    actual = {
+        (r.user_id, r.year, r.month, r.category_id, r.type): (r.total, r.count)
+        for r in query.all()
+    }
+
+    mismatches = []
+    for key in expected.keys() | actual.keys():
+        want = expected.get(key, (0.0, 0))
+        got = actual.get(key, (0.0, 0))
+        if want[1] != got[1] or abs(want[0] - got[0]) > tolerance:
+            mismatches.append((key, want, got))
+    return sorted(mismatches)
+
+
+# ---- Reads used by the dashboard when no date range is selected.
+# They mirror app.aggregates but read the rollup rows instead of entries.
+
+def rollup_filters(user_id, category=None, type=None):
+    criteria = [MonthlyRollup.user_id == user_id]
+    if category:
+        criteria.append(MonthlyRollup.category_id == category_id_of(user_id, category))
+    if type:
+        criteria.append(MonthlyRollup.type == type)
+    return criteria
+
+
+def summary_totals(criteria):
+    income = func.coalesce(func.sum(case((MonthlyRollup.type == 'income', MonthlyRollup.total), else_=0)), 0)
+    expense = func.coalesce(func.sum(case((MonthlyRollup.type == 'expense', MonthlyRollup.total), else_=0)), 0)
+    total_income, total_expense = db.session.query(income, expense).filter(*criteria).one()
+    return float(total_income), float(total_expense)
+
+
+def category_totals(criteria, type=None):
+    query = db.session.query(
+        MonthlyRollup.category_id, func.sum(MonthlyRollup.total).label('total')
+    ).filter(*criteria)
+    if type:
+        query = query.filter(MonthlyRollup.type == type)
+    totals = query.group_by(MonthlyRollup.category_id).subquery()
+    return [(name, float(value)) for name, value in named_totals(totals).all()]
+
+
+def entry_count(user_id):
+    """The user's number of entries, summed from their rollup rows."""
+    return db.session.query(func.coalesce(func.sum(MonthlyRollup.count), 0)).filter(
+        MonthlyRollup.user_id == user_id
+    ).scalar()
+
+
+def monthly_totals(criteria, first, last):
+    """Return {(year, month): total} for the months from `first` to `last` (dates, inclusive)."""
+    index = MonthlyRollup.year * 12 + MonthlyRollup.month
+    rows = (
+        db.session.query(MonthlyRollup.year, MonthlyRollup.month, func.sum(MonthlyRollup.total))
+        .filter(*criteria, MonthlyRollup.year.between(first.year, last.year),
+                index.between(first.year * 12 + first.month, last.year * 12 + last.month))
+        .group_by(MonthlyRollup.year, MonthlyRollup.month)
+    )
+    return {(year, month): float(total) for year, month, total in rows}
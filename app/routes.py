@@ -2,28 +2,88 @@
 
 from flask import (
     Blueprint, render_template, redirect, url_for, flash, request, make_response,
-    jsonify, current_app, abort, session
+    jsonify, current_app, abort, session, Response, stream_with_context, send_file
 )
-from app import db, bcrypt, limiter
+from app import db, hasher, limiter
+from app.passwords import HashingBusy
+from app.ratelimit import user_or_ip
 from app.forms import RegistrationForm, LoginForm, BudgetForm, DeleteAccountForm
-from app.models import User, BudgetEntry, Category
+from app.models import User, BudgetEntry, Category, EntryAnomaly, Job
 from flask_login import login_user, current_user, logout_user, login_required
-from datetime import datetime, timedelta
-from collections import defaultdict, Counter
-from calendar import month_name
+from datetime import datetime, date
+from typing import Optional
 from app.utils import admin_required
+from app.aggregates import (
+    entry_filters, summary_totals, category_totals, admin_overview
+)
+from app.cache import TTLCache
+from app.pagination import keyset_page, decode_cursor, merge_page
+from app.profiling import metrics
+from app.analytics import user_insights, Insights
+from app.response_cache import (
+    response_cache, bump_data_version, data_version, cache_key, etag_for, page_etag, not_modified, with_etag, cached_chunks
+)
+from app import rollups
+from app import jobs
+from app import charts
+from app.exports import export_chunks, export_file, EXPORT_FORMATS
 from sqlalchemy.exc import IntegrityError
-import csv
-import io
+import importlib
+import msgspec
+import os
 
 main = Blueprint('main', __name__)
 
+# Views used by few requests (admin pages, bulk import) and the NumPy-backed
+# tips and archive reads import their modules on first use, which keeps them out of the
+# worker's startup; preload_views() imports them ahead of time instead.
+DEFERRED_MODULES = ('app.tips', 'app.imports', 'app.logreader', 'app.archive')
+
+def preload_views():
+    for name in DEFERRED_MODULES:
+        importlib.import_module(name)
+
+# One export budget per user, shared by every export format (304s are free)
+export_limit = limiter.shared_limit(
+    lambda: current_app.config['RATELIMIT_EXPORT'], scope="export", key_func=user_or_ip,
+    deduct_when=lambda response: response.status_code != 304
+)
+
+# Site-wide admin statistics, shared by every admin within this process
+admin_stats_cache = TTLCache(maxsize=1)
+
+def parse_datetime(value):
+    """Parse a YYYY-MM-DDTHH:MM query parameter (as sent by datetime-local inputs)."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        abort(400)
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD query parameter, aborting with 400 if malformed."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        abort(400)
+
 @main.app_errorhandler(429)
 def ratelimit_handler(e):
     if request.path == "/login":
         return render_template("429.html"), 429
     return jsonify(error="Too many requests. Please try again later."), 429
 
+def server_busy(template, form):
+    """Render `template` with a 503 when the password hashing pool is saturated."""
+    current_app.logger.warning(f"[BUSY] Password hashing pool saturated on {request.endpoint}")
+    flash("The server is busy. Please try again in a moment.", "warning")
+    response = make_response(render_template(template, form=form), 503)
+    response.headers["Retry-After"] = "2"
+    return response
+
 # ---- Debug: who is logged in?
 @main.route("/_whoami")
 def whoami():
@@ -38,10 +98,14 @@ def home():
     return redirect(url_for('main.login'))
 
 @main.route("/register", methods=['GET', 'POST'])
+@limiter.limit(lambda: current_app.config['RATELIMIT_REGISTER'], methods=['POST'])
 def register():
     form = RegistrationForm()
     if form.validate_on_submit():
-        hashed_pw = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
+        try:
+            hashed_pw = hasher.hash(form.password.data)
+        except HashingBusy:
+            return server_busy('register.html', form)
         user = User(email=form.email.data, password=hashed_pw, role='user')
         db.session.add(user)
         db.session.commit()
@@ -62,18 +126,32 @@ def register():
     return render_template('register.html', form=form)
 
 @main.route("/login", methods=['GET', 'POST'])
-@limiter.exempt   # ⬅️ disable rate limit during debugging
+@limiter.limit(lambda: current_app.config['RATELIMIT_LOGIN'], methods=['POST'])
 def login():
     form = LoginForm()
     if form.validate_on_submit():
-        user = User.query.filter_by(email=form.email.data).first()
+        user = User.query.filter_by(email=form.email.data).filter(User.role != 'deleted').first()
 
         if user:
             current_app.logger.info(f"[LOGIN] User found in DB: {user.email} (ID: {user.id})")
         else:
             current_app.logger.warning(f"[LOGIN] No user found with email: {form.email.data}")
 
-        if user and bcrypt.check_password_hash(user.password, form.password.data):
+        try:
+            # Unknown emails are checked against a dummy hash, so both cost the same
+            stored = user.password if user is not None else hasher.dummy_hash()
+            valid = hasher.verify(stored, form.password.data) and user is not None
+        except HashingBusy:
+            return server_busy('login.html', form)
+
+        if valid:
+            if hasher.needs_rehash(user.password):
+                try:
+                    user.password = hasher.hash(form.password.data)
+                    db.session.commit()
+                    current_app.logger.info(f"[LOGIN] Rehashed password for {user.email}")
+                except HashingBusy:
+                    pass  # upgrade on a later login
             login_user(user)
             current_app.logger.info(f"[LOGIN] SUCCESS for {user.email}")
             return redirect(url_for('main.dashboard'))
@@ -93,7 +171,95 @@ def logout():
     logout_user()
     session.clear()  # ⬅️ ensure no stale session data remains
     flash("Logged out successfully.", "info")
-    return redirect(url_for('main.login'))
+    response = redirect(url_for('main.login'))
+    # Drop what the pages cached in the browser (e.g. chart.js's series)
+    response.headers["Clear-Site-Data"] = '"storage"'
+    return response
+
+class EntryRow(msgspec.Struct, frozen=True):
+    id: int
+    date: date
+    category: str
+    amount: float
+    type: str
+    archived: bool = False  # moved to cold storage (app/archive.py); read-only
+
+def entries_page(user_id, category, type, start_date, end_date, cursor, limit):
+    """One keyset page of the user's entries as EntryRows, archived ones merged in.
+
+    Returns (rows, next_cursor); raises ValueError for a malformed cursor.
+    """
+    from app import archive  # NumPy; imported on first use (see DEFERRED_MODULES)
+
+    criteria = entry_filters(user_id, category=category, type=type, start_date=start_date, end_date=end_date)
+    query = db.session.query(
+        BudgetEntry.id, BudgetEntry.date, Category.name.label('category'), BudgetEntry.amount, BudgetEntry.type
+    ).join(Category, Category.id == BudgetEntry.category_id).filter(*criteria)
+    rows, next_cursor = keyset_page(query, cursor, limit)
+
+    archived_years = archive.years(user_id)
+    # Archived rows can only belong on this page if it ends in an archived year
+    if archived_years and (next_cursor is None or rows[-1].date.year <= archived_years[0]):
+        archived = archive.entries_page(
+            user_id, **archive.filters(user_id, category, type, start_date, end_date),
+            before=decode_cursor(cursor) if cursor else None, limit=limit + 1,
+        )
+        rows, next_cursor = merge_page(rows, next_cursor, archived, limit)
+    return [
+        EntryRow(e.id, e.date, e.category, e.amount, e.type, isinstance(e, archive.ArchivedEntry)) for e in rows
+    ], next_cursor
+
+class DashboardSummary(msgspec.Struct):
+    """Everything the dashboard reads from the database, cached msgpack-encoded per data version."""
+    categories: list[str]
+    entries: list[EntryRow]
+    next_cursor: Optional[str]
+    total_income: float
+    total_expense: float
+    category_breakdown: list[tuple[str, float]]
+    tips: list[str]
+    insights: Insights
+
+def build_dashboard_summary(user_id, selected_category, selected_type, start_date, end_date, cursor):
+    from app import archive, tips  # NumPy; imported on first use (see DEFERRED_MODULES)
+
+    start_date, end_date = parse_date(start_date), parse_date(end_date)
+    try:
+        entries, next_cursor = entries_page(
+            user_id, selected_category, selected_type, start_date, end_date,
+            cursor, current_app.config['ENTRIES_PER_PAGE']
+        )
+    except ValueError:
+        abort(400)
+
+    # Summary (rollups cover everything, archived entries included, except
+    # arbitrary date ranges; those add up the live rows and the archive)
+    if start_date or end_date:
+        criteria = entry_filters(
+            user_id, category=selected_category, type=selected_type, start_date=start_date, end_date=end_date
+        )
+        archived = archive.totals(
+            user_id, **archive.filters(user_id, selected_category, selected_type, start_date, end_date)
+        )
+        total_income, total_expense = summary_totals(criteria, archived)
+        category_breakdown = category_totals(criteria, type="expense", archived=archived)
+    else:
+        rollup_criteria = rollups.rollup_filters(user_id, selected_category, selected_type)
+        total_income, total_expense = rollups.summary_totals(rollup_criteria)
+        category_breakdown = rollups.category_totals(rollup_criteria, type="expense")
+
+    return DashboardSummary(
+        categories=[c.name for c in Category.query.filter_by(user_id=user_id)],
+        entries=entries,
+        next_cursor=next_cursor,
+        total_income=total_income,
+        total_expense=total_expense,
+        category_breakdown=[(name, total) for name, total in category_breakdown],
+        # AI Tips (rule table in app/tips.py, over the user's last 30 days)
+        tips=tips.tips_for_user(user_id),
+        # Forecast and unusual entries, precomputed by 'flask analytics run'
+        insights=user_insights(user_id),
+    )
 
 @main.route("/dashboard", methods=["GET", "POST"])
 @login_required
@@ -101,22 +267,23 @@ def dashboard():
     form = BudgetForm()
     delete_form = DeleteAccountForm()
 
-    # Load user's categories for form
-    categories = Category.query.filter_by(user_id=current_user.id).all()
-    form.category.choices = [(c.name, c.name) for c in categories]
-
     # Process BudgetForm submission
+    if request.method == "POST":
+        category_ids = {c.name: c.id for c in Category.query.filter_by(user_id=current_user.id)}
+        form.category.choices = [(name, name) for name in category_ids]
     if form.validate_on_submit():
         entry = BudgetEntry(
             date=form.date.data,
-            category=form.category.data,
+            category_id=category_ids[form.category.data],
             amount=form.amount.data,
             type=form.type.data,
             user_id=current_user.id
         )
         db.session.add(entry)
+        rollups.record_entry(entry)
+        bump_data_version(current_user.id)
         db.session.commit()
-        current_app.logger.info(f"{current_user.email} added {entry.type}: {entry.category} - ₹{entry.amount}")
+        current_app.logger.info(f"{current_user.email} added {entry.type}: {form.category.data} - ₹{entry.amount}")
         flash("Entry added successfully!", "success")
         return redirect(url_for('main.dashboard'))
 
@@ -125,60 +292,49 @@ def dashboard():
     selected_type = request.args.get("type", default=None, type=str)
     start_date = request.args.get("start_date", type=str)
     end_date = request.args.get("end_date", type=str)
+    cursor = request.args.get("cursor", type=str)
+
+    # Repeat views of unchanged data are served from the response cache (or
+    # answered with 304) without querying. Tips depend on the day; the page
+    # embeds a CSRF token, which page_etag accounts for.
+    key = cache_key("dashboard", date.today(), selected_category, selected_type, start_date, end_date, cursor)
+    etag = page_etag(key)
+    cacheable = request.method == "GET" and not session.get("_flashes")
+    if cacheable:
+        response = not_modified(etag)
+        if response is not None:
+            return response
+
+    payload = response_cache.get(key)
+    if payload is None:
+        summary = build_dashboard_summary(
+            current_user.id, selected_category, selected_type, start_date, end_date, cursor
+        )
+        response_cache.set(key, msgspec.msgpack.encode(summary))
+    else:
+        summary = msgspec.msgpack.decode(payload, type=DashboardSummary)
+    form.category.choices = [(name, name) for name in summary.categories]
 
-    query = BudgetEntry.query.filter_by(user_id=current_user.id)
-    if selected_category:
-        query = query.filter_by(category=selected_category)
-    if selected_type:
-        query = query.filter_by(type=selected_type)
-    if start_date:
-        query = query.filter(BudgetEntry.date >= datetime.strptime(start_date, "%Y-%m-%d").date())
-    if end_date:
-        query = query.filter(BudgetEntry.date <= datetime.strptime(end_date, "%Y-%m-%d").date())
-
-    entries = query.order_by(BudgetEntry.date.desc()).all()
-
-    # Summary
-    total_income = sum(e.amount for e in entries if e.type == "income")
-    total_expense = sum(e.amount for e in entries if e.type == "expense")
-    balance = total_income - total_expense
-
-    # AI Tips
-    tips = []
-    recent_entries = [e for e in entries if e.date >= datetime.today().date() - timedelta(days=30)]
-    if total_income > 0 and total_expense > total_income * 0.5:
-        tips.append("⚠️ You’ve spent more than 50% of your income in the last 30 days.")
-    food_expenses = sum(e.amount for e in recent_entries if e.category.lower() == "food")
-    if food_expenses > 150:
-        tips.append("🍔 Your food expenses are high. Consider meal planning.")
-
-    # Chart Data (last 6 months of expenses)
-    monthly_data = defaultdict(float)
-    for e in entries:
-        if e.type == "expense":
-            key = f"{month_name[e.date.month]} {e.date.year}"
-            monthly_data[key] += e.amount
-
-    chart_labels = list(monthly_data.keys())[-6:]
-    chart_data = list(monthly_data.values())[-6:]
-
-    return render_template(
+    response = make_response(render_template(
         "dashboard.html",
         form=form,
         delete_form=delete_form,
-        entries=entries,
-        tips=tips,
-        total_income=total_income,
-        total_expense=total_expense,
-        balance=balance,
-        chart_labels=chart_labels,
-        chart_data=chart_data,
-        categories=categories,
+        entries=summary.entries,
+        next_cursor=summary.next_cursor,
+        cursor=cursor,
+        tips=summary.tips,
+        insights=summary.insights,
+        total_income=summary.total_income,
+        total_expense=summary.total_expense,
+        balance=summary.total_income - summary.total_expense,
+        category_breakdown=summary.category_breakdown,
+        categories=summary.categories,
         selected_category=selected_category,
         selected_type=selected_type,
         start_date=start_date,
         end_date=end_date
-    )
+    ))
+    return with_etag(response, etag) if cacheable else response
 
 @main.route("/edit/<int:entry_id>", methods=["GET", "POST"])
 @login_required
@@ -189,13 +345,19 @@ def edit_entry(entry_id):
         return redirect(url_for("main.dashboard"))
 
     form = BudgetForm(obj=entry)
-    form.category.choices = [(c.name, c.name) for c in Category.query.filter_by(user_id=current_user.id)]
+    category_ids = {c.name: c.id for c in Category.query.filter_by(user_id=current_user.id)}
+    form.category.choices = [(name, name) for name in category_ids]
+    if request.method == "GET":
+        form.category.data = entry.category.name
 
     if form.validate_on_submit():
+        rollups.remove_entry(entry)
         entry.date = form.date.data
-        entry.category = form.category.data
+        entry.category_id = category_ids[form.category.data]
         entry.amount = form.amount.data
         entry.type = form.type.data
+        rollups.record_entry(entry)
+        bump_data_version(current_user.id)
         db.session.commit()
         current_app.logger.info(f"{current_user.email} edited entry #{entry.id}")
         flash("Entry updated successfully.", "success")
@@ -211,42 +373,212 @@ def delete_entry(entry_id):
         flash("You are not authorized to delete this entry.", "danger")
         return redirect(url_for("main.dashboard"))
 
+    rollups.remove_entry(entry)
+    EntryAnomaly.query.filter_by(entry_id=entry.id).delete()
     db.session.delete(entry)
+    bump_data_version(current_user.id)
     db.session.commit()
     current_app.logger.info(f"{current_user.email} deleted entry #{entry.id}")
     flash("Entry deleted successfully.", "success")
     return redirect(url_for("main.dashboard"))
 
+def queue_export(export_format, start_date, end_date, compress=False):
+    """Hand a large export to the job queue instead of streaming it from this worker.
+
+    Browsers are sent to the job's page, which polls until the file is
+    ready; API clients get 202 with the job and its URL in Location.
+    """
+    job = jobs.enqueue(
+        "export", current_user.id, format=export_format, compress=compress,
+        start_date=start_date.isoformat() if start_date else None,
+        end_date=end_date.isoformat() if end_date else None,
+        data_version=data_version(),
+    )
+    current_app.logger.info(f"{current_user.email} queued {export_format.upper()} export as job #{job.id}")
+    status_url = url_for("main.job_status", job_id=job.id)
+    if request.accept_mimetypes.best_match(["application/json", "text/html"]) == "text/html":
+        return redirect(status_url)
+    response = jsonify(jobs.describe(job))
+    response.status_code = 202
+    response.headers["Location"] = status_url
+    return response
+
 @main.route("/download_csv")
 @login_required
+@export_limit
 def download_csv():
-    entries = BudgetEntry.query.filter_by(user_id=current_user.id).order_by(BudgetEntry.date.desc()).all()
-    si = io.StringIO()
-    writer = csv.writer(si)
-    writer.writerow(["Date", "Category", "Amount", "Type"])
-    for e in entries:
-        writer.writerow([e.date.strftime('%Y-%m-%d'), e.category, e.amount, e.type])
-    output = make_response(si.getvalue())
-    output.headers["Content-Disposition"] = "attachment; filename=budget_entries.csv"
-    output.headers["Content-type"] = "text/csv"
+    start_date = parse_date(request.args.get("start_date", type=str))
+    end_date = parse_date(request.args.get("end_date", type=str))
+    compress = request.args.get("gzip", "") in ("1", "true", "yes")
+    mimetype, filename = export_file("csv", compress)
+
+    key = cache_key("csv", start_date, end_date, compress)
+    etag = etag_for(key)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+
+    payload = response_cache.get(key)
+    if payload is not None:
+        output = Response(payload, mimetype=mimetype)
+    elif jobs.exceeds(current_user.id, current_app.config['JOB_EXPORT_THRESHOLD']):
+        return queue_export("csv", start_date, end_date, compress)
+    else:
+        chunks = export_chunks("csv", current_user.id, start_date, end_date, compress,
+                               current_app.config['EXPORT_BATCH_SIZE'])
+        output = Response(stream_with_context(cached_chunks(key, chunks)), mimetype=mimetype)
     current_app.logger.info(f"{current_user.email} downloaded budget CSV")
-    return output
+    output.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return with_etag(output, etag)
 
 @main.route("/download_json")
 @login_required
+@export_limit
 def download_json():
-    entries = BudgetEntry.query.filter_by(user_id=current_user.id).all()
-    data = [
-        {
-            "date": e.date.strftime('%Y-%m-%d'),
-            "category": e.category,
-            "amount": e.amount,
-            "type": e.type
-        }
-        for e in entries
-    ]
-    current_app.logger.info(f"{current_user.email} downloaded JSON data")
-    return jsonify(data)
+    export_format = request.args.get("format", default="json", type=str)
+    if export_format not in EXPORT_FORMATS:
+        return jsonify(error=f"Unsupported format: {export_format}"), 400
+    mimetype, filename = export_file(export_format)
+    start_date = parse_date(request.args.get("start_date", type=str))
+    end_date = parse_date(request.args.get("end_date", type=str))
+
+    key = cache_key(export_format, start_date, end_date)
+    etag = etag_for(key)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+
+    payload = response_cache.get(key)
+    if payload is not None:
+        output = Response(payload, mimetype=mimetype)
+    elif jobs.exceeds(current_user.id, current_app.config['JOB_EXPORT_THRESHOLD']):
+        return queue_export(export_format, start_date, end_date)
+    else:
+        chunks = export_chunks(export_format, current_user.id, start_date, end_date,
+                               batch_size=current_app.config['EXPORT_BATCH_SIZE'])
+        output = Response(stream_with_context(cached_chunks(key, chunks)), mimetype=mimetype)
+    current_app.logger.info(f"{current_user.email} downloaded {export_format.upper()} data")
+    if export_format != "json":
+        output.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return with_etag(output, etag)
+
+@main.route("/import", methods=["POST"])
+@login_required
+def import_entries():
+    from app import imports
+
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        return jsonify(error="No file uploaded."), 400
+
+    file_format = request.form.get("format") or upload.filename.rsplit(".", 1)[-1].lower()
+    if file_format == "csv":
+        records = imports.csv_records(upload.stream)
+    elif file_format in ("json", "ndjson"):
+        records = imports.json_records(upload.stream)
+    else:
+        return jsonify(error=f"Unsupported format: {file_format}"), 400
+
+    try:
+        report = imports.import_entries(current_user.id, records, current_app.config['IMPORT_BATCH_SIZE'])
+    except imports.ImportFileError as exc:
+        db.session.rollback()
+        return jsonify(error=str(exc)), 400
+    current_app.logger.info(
+        f"{current_user.email} imported {report['inserted']} entries ({report['failed']} rejected)"
+    )
+
+    if request.accept_mimetypes.best_match(["application/json", "text/html"]) == "text/html":
+        flash(f"Imported {report['inserted']} entries, {report['failed']} rejected.",
+              "success" if not report["failed"] else "warning")
+        for error in report["errors"][:5]:
+            flash(f"Row {error['row']}: {error['error']}", "danger")
+        return redirect(url_for("main.dashboard"))
+    return jsonify(report)
+
+@main.route("/api/entries")
+@login_required
+def api_entries():
+    limit = min(request.args.get("limit", default=current_app.config['ENTRIES_PER_PAGE'], type=int),
+                current_app.config['ENTRIES_MAX_PAGE_SIZE'])
+    try:
+        entries, next_cursor = entries_page(
+            current_user.id,
+            request.args.get("category", type=str),
+            request.args.get("type", type=str),
+            parse_date(request.args.get("start_date", type=str)),
+            parse_date(request.args.get("end_date", type=str)),
+            request.args.get("cursor", type=str),
+            max(limit, 1)
+        )
+    except ValueError:
+        return jsonify(error="Invalid cursor."), 400
+    return jsonify(
+        entries=[
+            {
+                "id": e.id,
+                "date": e.date.strftime('%Y-%m-%d'),
+                "category": e.category,
+                "amount": e.amount,
+                "type": e.type,
+                "archived": e.archived
+            }
+            for e in entries
+        ],
+        next_cursor=next_cursor
+    )
+
+@main.route("/api/chart")
+@login_required
+def api_chart():
+    """Totals per day, week or month for the dashboard chart (static/chart.js).
+
+    Query: granularity (day/week/month), type (expense/income), category,
+    start_date, end_date and since. A client holding the series of data
+    version `since` gets a 304 for its ETag if nothing changed, otherwise
+    only the changed buckets when this process still has that version
+    cached, else the full series.
+    """
+    granularity = request.args.get("granularity", default="month", type=str)
+    type_ = request.args.get("type", default="expense", type=str)
+    if granularity not in charts.GRANULARITIES or type_ not in ("income", "expense"):
+        return jsonify(error="granularity must be day, week or month; type income or expense."), 400
+    category = request.args.get("category", type=str) or None
+    try:
+        first, last = charts.bucket_range(
+            granularity,
+            parse_date(request.args.get("start_date", type=str)),
+            parse_date(request.args.get("end_date", type=str)),
+            date.today(),
+            current_app.config['CHART_MAX_BUCKETS']
+        )
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+
+    parts = ("chart", granularity, first, last, category, type_)
+    key = cache_key(*parts)
+    etag = etag_for(key)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+
+    payload = response_cache.get(key)
+    if payload is None:
+        series = charts.series(current_user.id, granularity, first, last, category, type_)
+        response_cache.set(key, msgspec.msgpack.encode(series))
+    else:
+        series = msgspec.msgpack.decode(payload, type=charts.ChartSeries)
+
+    body = dict(version=key[1], granularity=granularity, start=first, end=last)
+    since = request.args.get("since", type=int)
+    previous = response_cache.get((current_user.id, since) + parts) if since is not None else None
+    if previous is not None:
+        previous = msgspec.msgpack.decode(previous, type=charts.ChartSeries)
+        body.update(full=False, since=since, changes=charts.changed_buckets(previous, series))
+    else:
+        body.update(full=True, buckets=series.buckets)
+    response = current_app.response_class(msgspec.json.encode(body), mimetype="application/json")
+    return with_etag(response, etag)
 
 @main.route("/add_category", methods=["POST"])
 @login_required
@@ -256,6 +588,7 @@ def add_category():
         exists = Category.query.filter_by(name=category_name, user_id=current_user.id).first()
         if not exists:
             db.session.add(Category(name=category_name, user_id=current_user.id))
+            bump_data_version(current_user.id)
             db.session.commit()
             current_app.logger.info(f"{current_user.email} added new category: {category_name}")
             flash("Category added!", "success")
@@ -268,27 +601,82 @@ def add_category():
 def delete_account():
     form = DeleteAccountForm()
     if form.validate_on_submit():
-        user = current_user
-        BudgetEntry.query.filter_by(user_id=user.id).delete()
-        Category.query.filter_by(user_id=user.id).delete()
-        db.session.delete(user)
-        db.session.commit()
+        user_id = current_user.id
+        if jobs.exceeds(user_id, current_app.config['JOB_PURGE_THRESHOLD']):
+            # Sign the account out everywhere now; the entries go in the background
+            db.session.get(User, user_id).role = 'deleted'
+            job = jobs.enqueue("purge_account", user_id=user_id)
+            current_app.logger.info(f"{current_user.email} deleted their account (purge job #{job.id})")
+            message = "Your account has been deleted. Your data is being removed in the background."
+        else:
+            jobs.purge_user(user_id)
+            db.session.commit()
+            current_app.logger.info(f"{current_user.email} deleted their account")
+            message = "Your account and data have been deleted."
         logout_user()
-        flash("Your account and data have been deleted.", "info")
+        flash(message, "info")
         return redirect(url_for("main.login"))
     flash("Invalid CSRF token or form submission.", "danger")
     return redirect(url_for("main.dashboard"))
 
+@main.route("/jobs/<int:job_id>")
+@login_required
+def job_status(job_id):
+    job = db.session.get(Job, job_id)
+    if job is None or job.user_id != current_user.id:
+        abort(404)
+    if request.accept_mimetypes.best_match(["application/json", "text/html"]) == "text/html":
+        return render_template("job.html", job=job)
+    response = jsonify(jobs.describe(job))
+    if job.status in ("queued", "running"):
+        response.headers["Retry-After"] = str(int(current_app.config['JOB_POLL_INTERVAL']) or 1)
+    return response
+
+@main.route("/jobs/<int:job_id>/download")
+@login_required
+def job_download(job_id):
+    job = db.session.get(Job, job_id)
+    if job is None or job.user_id != current_user.id:
+        abort(404)
+    if job.status != "done" or not job.artifact:
+        return jsonify(error="This job has no file to download yet."), 409
+    path = jobs.artifact_path(job)
+    if not os.path.exists(path):
+        return jsonify(error="This file has expired; please export again."), 410
+    params = jobs.params_of(job)
+    mimetype, filename = export_file(params["format"], params.get("compress", False))
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=filename)
+
 @main.route("/admin/logs")
 @login_required
 @admin_required
 def view_logs():
+    from app.logreader import read_tail
+
+    level = request.args.get("level", type=str) or None
+    tag = request.args.get("tag", type=str) or None
+    since = parse_datetime(request.args.get("since", type=str))
+    until = parse_datetime(request.args.get("until", type=str))
+    limit = min(request.args.get("limit", default=200, type=int), 1000)
     try:
-        with open('logs/audit.log', 'r') as file:
-            log_data = file.read()
-    except FileNotFoundError:
-        log_data = "No logs found."
-    return render_template('admin_logs.html', logs=log_data)
+        lines, next_cursor = read_tail(
+            current_app.config['AUDIT_LOG_PATH'], limit=max(limit, 1),
+            cursor=request.args.get("cursor", type=str),
+            level=level, tag=tag, since=since, until=until
+        )
+    except ValueError:
+        abort(400)
+    return render_template(
+        'admin_logs.html', lines=lines, next_cursor=next_cursor,
+        level=level, tag=tag, since=request.args.get("since", ""), until=request.args.get("until", ""),
+        limit=limit
+    )
+
+@main.route("/admin/metrics")
+@login_required
+@admin_required
+def admin_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 @main.app_errorhandler(403)
 def forbidden(e):
@@ -298,27 +686,25 @@ def forbidden(e):
 @login_required
 @admin_required
 def admin_dashboard():
-    users = User.query.all()
-    entries = BudgetEntry.query.all()
-    categories = Category.query.distinct(Category.name).count()
+    from app.logreader import read_tail
 
-    category_counts = Counter([e.category for e in entries])
-    top_categories = category_counts.most_common(5)
+    ttl = current_app.config['ADMIN_STATS_TTL']
+    if ttl:
+        admin_stats_cache.ttl = ttl
+        stats = admin_stats_cache.get_or_set("overview", admin_overview)
+    else:
+        stats = admin_overview()
     recent_users = User.query.order_by(User.id.desc()).limit(5).all()
 
-    log_data = ""
-    try:
-        with open('logs/audit.log', 'r') as file:
-            log_data = file.read().strip()
-    except FileNotFoundError:
-        log_data = "No logs found."
+    lines, _ = read_tail(current_app.config['AUDIT_LOG_PATH'], limit=50)
+    log_data = "\n".join(line.raw for line in reversed(lines))
 
     return render_template(
         "admin_dashboard.html",
-        total_users=len(users),
-        total_entries=len(entries),
-        total_categories=categories,
-        top_categories=top_categories,
+        total_users=stats["total_users"],
+        total_entries=stats["total_entries"],
+        total_categories=stats["total_categories"],
+        top_categories=stats["top_categories"],
         recent_users=recent_users,
         logs=log_data
     )
@@ -1,11 +1,4 @@
-# app/run.py
-from app import create_app, db
-
-app = create_app()
-
-# Auto-create tables on first boot (works on Render free tier)
-with app.app_context():
-    db.create_all()
-
-if __name__ == "__main__":
-    app.run(debug=True)
+# app/run.py: kept for deployments that still start `gunicorn app.run:app`.
+# It reuses the app built by run.py instead of creating (and create_all-ing)
+# a second one.
+from run import app  # noqa: F401
@@ -0,0 +1,106 @@
+from app import db
+from app.models import User, BudgetEntry, Category
+from app import rollups
+from sqlalchemy import insert, select
+from datetime import date, timedelta
+import numpy as np
+
+DEFAULT_CATEGORIES = ['Food', 'Rent', 'Utilities', 'Salary', 'Entertainment', 'Other']
+
+# Day-to-day spending: (category, share of entries, median amount, spread)
+# with log-normal amounts, so most entries are small and a few are large.
+EVERYDAY = [
+    ('Food', 0.6, 18.0, 0.6),
+    ('Entertainment', 0.2, 35.0, 0.8),
+    ('Other', 0.2, 25.0, 1.0),
+]
+
+
+def generate_entries(rng, user_id, category_ids, count, end, days):
+    """Return `count` entry dicts for one user spread over the `days` days before `end`.
+
+    `category_ids` maps the DEFAULT_CATEGORIES names to the user's category ids.
+
+    Each month has a salary (income) on the 1st and rent and utilities in the
+    first week; the remaining entries are everyday spending, with
+    entertainment leaning towards weekends.
+    """
+    start = end - timedelta(days=days - 1)
+    rows = []
+
+    salary = rng.normal(3000, 600)
+    rent = rng.normal(900, 200)
+    month = date(start.year, start.month, 1)
+    while month <= end and len(rows) + 3 <= count:
+        if month >= start:
+            rows.append(('Salary', month, round(salary * rng.uniform(0.98, 1.05), 2), 'income'))
+        for category, amount, offset in (('Rent', rent, 0), ('Utilities', rng.normal(120, 30), 4)):
+            day = month + timedelta(days=offset + int(rng.integers(0, 3)))
+            if start <= day <= end:
+                rows.append((category, day, round(max(amount, 10.0), 2), 'expense'))
+        month = (month + timedelta(days=32)).replace(day=1)
+
+    remaining = count - len(rows)
+    if remaining > 0:
+        names = [name for name, _, _, _ in EVERYDAY]
+        shares = np.array([share for _, share, _, _ in EVERYDAY])
+        picks = rng.choice(len(EVERYDAY), size=remaining, p=shares / shares.sum())
+        medians = np.array([median for _, _, median, _ in EVERYDAY])[picks]
+        spreads = np.array([spread for _, _, _, spread in EVERYDAY])[picks]
+        amounts = np.round(medians * np.exp(rng.normal(0, spreads)), 2)
+        offsets = rng.integers(0, days, size=remaining)
+        # Move most entertainment to the nearest Saturday.
+        weekday = (np.datetime64(start, 'D') + offsets).astype('datetime64[D]').astype(np.int64) % 7
+        weekend = (np.array(names)[picks] == 'Entertainment') & (rng.random(remaining) < 0.7)
+        shift = (2 - weekday) % 7  # 1970-01-01 was a Thursday, so weekday 2 is a Saturday
+        offsets = np.where(weekend & (offsets + shift < days), offsets + shift, offsets)
+        for pick, offset, amount in zip(picks, offsets, amounts):
+            rows.append((names[pick], start + timedelta(days=int(offset)), max(float(amount), 0.5), 'expense'))
+
+    return [
+        dict(user_id=user_id, date=day, category_id=category_ids[category], amount=amount, type=type_)
+        for category, day, amount, type_ in rows[:count]
+    ]
+
+
+def seed(users, entries, password_hash, days=730, end=None, email_prefix='seed', random_seed=0, batch_size=5000):
+    """Create `users` users with `entries` entries each and return their ids.
+
+    Users, categories and entries are written with executemany inserts,
+    `batch_size` entries per transaction, and rollups are kept in step.
+    """
+    rng = np.random.default_rng(random_seed)
+    end = end or date.today()
+    taken = db.session.scalar(select(db.func.count()).select_from(User).where(User.email.like(f'{email_prefix}%')))
+    emails = [f'{email_prefix}{taken + i}@example.com' for i in range(users)]
+
+    db.session.execute(insert(User), [
+        dict(email=email, password=password_hash, role='user') for email in emails
+    ])
+    user_ids = db.session.scalars(select(User.id).where(User.email.in_(emails)).order_by(User.id)).all()
+    db.session.execute(insert(Category), [
+        dict(name=name, user_id=user_id) for user_id in user_ids for name in DEFAULT_CATEGORIES
+    ])
+    db.session.commit()
+
+    category_ids = {user_id: {} for user_id in user_ids}
+    for category_id, user_id, name in db.session.execute(
+        select(Category.id, Category.user_id, Category.name).where(Category.user_id.in_(user_ids))
+    ):
+        category_ids[user_id][name] = category_id
+
+    batch = []
+    for user_id in user_ids:
+        batch.extend(generate_entries(rng, user_id, category_ids[user_id], entries, end, days))
+        if len(batch) >= batch_size:
+            _flush(batch)
+    if batch:
+        _flush(batch)
+    return user_ids
+
+
+def _flush(batch):
+    db.session.execute(insert(BudgetEntry.__table__), batch)
+    rollups.apply_rows((p['user_id'], p['date'], p['category_id'], p['type'], p['amount']) for p in batch)
+    db.session.commit()
+    batch.clear()
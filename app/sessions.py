@@ -0,0 +1,224 @@
+from flask_session.base import ServerSideSession, ServerSideSessionInterface
+from collections import OrderedDict
+from datetime import datetime, timezone
+from sqlalchemy import select, delete
+from app.database import dialect_insert
+import threading
+import random
+import time
+import os
+
+SESSION_BACKENDS = ('sql', 'memory', 'redis', 'filesystem')
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class SqlSessionInterface(ServerSideSessionInterface):
+    """Sessions in the app database (SessionRecord), with an indexed expiry column.
+
+    Saving is a single upsert and loading a single indexed lookup that ignores
+    expired rows, so neither needs a read-modify-write. Expired rows are
+    removed in bounded batches, either by 'flask session_cleanup' or on
+    roughly one request in SESSION_CLEANUP_N_REQUESTS.
+    """
+
+    session_class = ServerSideSession
+    ttl = False
+
+    def __init__(self, app, db, cleanup_batch_size=1000, **kwargs):
+        from app.models import SessionRecord
+        self.db = db
+        self.model = SessionRecord
+        self.cleanup_batch_size = cleanup_batch_size
+        super().__init__(app, **kwargs)
+        if self.cleanup_n_requests:
+            # The base class only registers the CLI command without request cleanup.
+            self._register_cleanup_app_command()
+
+    def _retrieve_session_data(self, store_id):
+        with self.db.engine.connect() as conn:
+            data = conn.execute(
+                select(self.model.data).where(
+                    self.model.session_id == store_id, self.model.expiry > _utcnow()
+                )
+            ).scalar()
+        return self.serializer.decode(data) if data is not None else None
+
+    def _delete_session(self, store_id):
+        with self.db.engine.begin() as conn:
+            conn.execute(delete(self.model).where(self.model.session_id == store_id))
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        values = dict(
+            session_id=store_id,
+            data=self.serializer.encode(session),
+            expiry=_utcnow() + session_lifetime,
+        )
+        stmt = dialect_insert(self.db.engine)(self.model).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['session_id'],
+            set_={'data': stmt.excluded.data, 'expiry': stmt.excluded.expiry},
+        )
+        with self.db.engine.begin() as conn:
+            conn.execute(stmt)
+
+    def _delete_expired_sessions(self, max_batches=None):
+        """Delete expired sessions `cleanup_batch_size` rows per transaction."""
+        deleted, batches = 0, 0
+        while max_batches is None or batches < max_batches:
+            expired = (
+                select(self.model.id)
+                .where(self.model.expiry <= _utcnow())
+                .limit(self.cleanup_batch_size)
+                .scalar_subquery()
+            )
+            with self.db.engine.begin() as conn:
+                count = conn.execute(delete(self.model).where(self.model.id.in_(expired))).rowcount
+            deleted += count
+            batches += 1
+            if count < self.cleanup_batch_size:
+                break
+        return deleted
+
+    def _cleanup_n_requests(self):
+        # Keep the cost on the request path bounded to one batch.
+        if self.cleanup_n_requests and random.randint(0, self.cleanup_n_requests) == 0:
+            self._delete_expired_sessions(max_batches=1)
+
+
+class LRUSessionInterface(ServerSideSessionInterface):
+    """Sessions in an in-process LRU dict. Only for a single worker (e.g. local development)."""
+
+    session_class = ServerSideSession
+    ttl = True
+
+    def __init__(self, app, maxsize=10000, **kwargs):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        super().__init__(app, **kwargs)
+
+    def _retrieve_session_data(self, store_id):
+        with self._lock:
+            item = self._data.get(store_id)
+            if item is None:
+                return None
+            expires, data = item
+            if expires <= time.monotonic():
+                del self._data[store_id]
+                return None
+            self._data.move_to_end(store_id)
+        return self.serializer.decode(data)
+
+    def _delete_session(self, store_id):
+        with self._lock:
+            self._data.pop(store_id, None)
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        data = self.serializer.encode(session)
+        expires = time.monotonic() + session_lifetime.total_seconds()
+        with self._lock:
+            self._data[store_id] = (expires, data)
+            self._data.move_to_end(store_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class RedisSessionInterface(ServerSideSessionInterface):
+    """Sessions in any client speaking the redis-py get/set(ex=)/delete API.
+
+    Expiry is left to the store's own TTL, so no cleanup is needed.
+    """
+
+    session_class = ServerSideSession
+    ttl = True
+
+    def __init__(self, app, client, **kwargs):
+        self.client = client
+        super().__init__(app, **kwargs)
+
+    def _retrieve_session_data(self, store_id):
+        data = self.client.get(store_id)
+        return self.serializer.decode(data) if data is not None else None
+
+    def _delete_session(self, store_id):
+        self.client.delete(store_id)
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        self.client.set(
+            store_id, self.serializer.encode(session),
+            ex=max(int(session_lifetime.total_seconds()), 1)
+        )
+
+
+class LocalRedis:
+    """In-process stand-in for a Redis server, implementing the subset of the
+    redis-py client API the session store uses. For tests and benchmarks."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            item = self._data.get(name)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires <= time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            self._data[name] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+
+def _redis_client(app):
+    client = app.config.get('SESSION_REDIS')
+    if client is not None:
+        return client
+    url = app.config.get('SESSION_REDIS_URL')
+    if url == 'local://':
+        return LocalRedis()
+    try:
+        import redis
+    except ImportError as exc:
+        raise RuntimeError("SESSION_BACKEND='redis' needs the 'redis' package or SESSION_REDIS_URL='local://'") from exc
+    return redis.Redis.from_url(url)
+
+
+def init_sessions(app, db, session_ext):
+    """Install the session interface selected by SESSION_BACKEND."""
+    backend = app.config['SESSION_BACKEND']
+    if backend not in SESSION_BACKENDS:
+        raise ValueError(f"Unknown SESSION_BACKEND {backend!r}; expected one of {SESSION_BACKENDS}")
+
+    if backend == 'filesystem':
+        app.config['SESSION_TYPE'] = 'filesystem'
+        app.config.setdefault('SESSION_FILE_DIR', os.path.join(app.instance_path, 'flask_session'))
+        os.makedirs(app.config['SESSION_FILE_DIR'], exist_ok=True)
+        session_ext.init_app(app)
+        return
+
+    common = dict(
+        key_prefix=app.config.get('SESSION_KEY_PREFIX', 'session:'),
+        permanent=app.config.get('SESSION_PERMANENT', True),
+    )
+    if backend == 'sql':
+        app.session_interface = SqlSessionInterface(
+            app, db, cleanup_batch_size=app.config['SESSION_CLEANUP_BATCH_SIZE'],
+            cleanup_n_requests=app.config.get('SESSION_CLEANUP_N_REQUESTS'), **common
+        )
+    elif backend == 'memory':
+        app.session_interface = LRUSessionInterface(app, maxsize=app.config['SESSION_LRU_SIZE'], **common)
+    else:
+        app.session_interface = RedisSessionInterface(app, _redis_client(app), **common)
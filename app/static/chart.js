@@ -1,27 +1,149 @@
-<script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-<script>
-const ctx = document.getElementById('breakdownChart').getContext('2d');
-const breakdownChart = new Chart(ctx, {
-    type: 'bar',
-    data: {
-        labels: {{ chart_labels | tojson }},
-        datasets: [{
-            label: 'Expenses (€)',
-            data: {{ chart_data | tojson }},
-            backgroundColor: 'rgba(54, 162, 235, 0.6)',
-            barThickness: 25  // 👈 makes bars thinner
-        }]
-    },
-    options: {
-        responsive: true,
-        plugins: {
-            title: {
-                display: true,
-                text: 'Monthly Expense Breakdown'
-            },
-            legend: { display: false }
+// Dashboard expense chart, fed by /api/chart.
+//
+// The buckets of every query are kept in sessionStorage with the data
+// version and ETag they came with. Asking again sends both back: the server
+// answers 304 when nothing changed, or just the buckets that changed since
+// that version, so coming back to the dashboard after adding an entry, or
+// switching between filters already seen, costs one small request. The
+// cache belongs to the logged-in user: another account in the same tab
+// starts from scratch (and logging out clears it, see routes.logout).
+(function () {
+    const canvas = document.getElementById('breakdownChart');
+    if (!canvas || typeof Chart === 'undefined') {
+        return;
+    }
+    const STORAGE_PREFIX = 'chartSeries:';
+    const STORAGE_KEY = STORAGE_PREFIX + canvas.dataset.user;
+    try {
+        for (const key of Object.keys(sessionStorage)) {
+            if (key.startsWith(STORAGE_PREFIX) && key !== STORAGE_KEY) {
+                sessionStorage.removeItem(key);
+            }
+        }
+        sessionStorage.removeItem('chartSeries');  // unkeyed cache of earlier versions
+    } catch (e) {
+        // Storage disabled: nothing is cached either
+    }
+    const TITLES = {month: 'Monthly', week: 'Weekly', day: 'Daily'};
+    const controls = {
+        granularity: document.getElementById('chartGranularity'),
+        category: document.getElementById('category'),
+        start_date: document.getElementById('start_date'),
+        end_date: document.getElementById('end_date'),
+    };
+
+    const chart = new Chart(canvas.getContext('2d'), {
+        type: 'bar',
+        data: {
+            labels: [],
+            datasets: [{
+                label: 'Expenses (€)',
+                data: [],
+                backgroundColor: 'rgba(54, 162, 235, 0.7)',
+                borderRadius: 5,
+                maxBarThickness: 40
+            }]
         },
-        maintainAspectRatio: false
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                title: {display: true, text: 'Monthly Expense Breakdown'},
+                legend: {display: false}
+            },
+            scales: {
+                y: {beginAtZero: true}
+            }
+        }
+    });
+
+    function load() {
+        try {
+            return JSON.parse(sessionStorage.getItem(STORAGE_KEY)) || {};
+        } catch (e) {
+            return {};
+        }
+    }
+
+    function save(cache) {
+        try {
+            sessionStorage.setItem(STORAGE_KEY, JSON.stringify(cache));
+        } catch (e) {
+            // Storage full or disabled: the next visit fetches the full series
+        }
+    }
+
+    function query() {
+        const params = new URLSearchParams();
+        for (const [name, control] of Object.entries(controls)) {
+            if (control && control.value) {
+                params.set(name, control.value);
+            }
+        }
+        return params;
+    }
+
+    function draw(series) {
+        chart.options.plugins.title.text = `${TITLES[series.granularity]} Expense Breakdown`;
+        chart.data.labels = series.buckets.map(bucket => bucket.label);
+        chart.data.datasets[0].data = series.buckets.map(bucket => bucket.total);
+        chart.update();
+    }
+
+    let latest = 0;
+
+    async function refresh() {
+        const params = query();
+        const key = params.toString();
+        const cache = load();
+        const known = cache[key];
+        const headers = {Accept: 'application/json'};
+        if (known) {
+            params.set('since', known.version);
+            headers['If-None-Match'] = known.etag;
+        }
+        const request = ++latest;
+        let response;
+        try {
+            response = await fetch(`${canvas.dataset.url}?${params}`, {headers, cache: 'no-store'});
+        } catch (e) {
+            return;
+        }
+        if (request !== latest) {
+            return;  // the filters changed again while this was in flight
+        }
+        if (response.status === 304 && known) {
+            draw(known);
+            return;
+        }
+        if (!response.ok) {
+            return;
+        }
+        const body = await response.json();
+        let buckets = body.buckets;
+        if (!body.full) {
+            if (body.start !== known.start || body.end !== known.end) {
+                // A default range moved on (a new day or month began): start over
+                delete cache[key];
+                save(cache);
+                return refresh();
+            }
+            const changed = new Map(body.changes.map(bucket => [bucket.start, bucket]));
+            buckets = known.buckets.map(bucket => changed.get(bucket.start) || bucket);
+        }
+        const series = {
+            version: body.version, etag: response.headers.get('ETag'),
+            granularity: body.granularity, start: body.start, end: body.end, buckets
+        };
+        cache[key] = series;
+        save(cache);
+        draw(series);
+    }
+
+    for (const control of Object.values(controls)) {
+        if (control) {
+            control.addEventListener('change', refresh);
+        }
     }
-});
-</script>
+    refresh();
+})();
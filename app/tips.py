@@ -0,0 +1,142 @@
+from app import db
+from app.models import BudgetEntry, Category, ENTRY_TYPE_CODES
+from collections import namedtuple
+from sqlalchemy import select, func, type_coerce, SmallInteger
+from datetime import date, timedelta
+import numpy as np
+
+# The longest lookback any rule uses; entries older than this are never loaded.
+WINDOW_DAYS = 30
+
+TYPE_CODES = ENTRY_TYPE_CODES
+
+Rule = namedtuple('Rule', ['name', 'message', 'when'])
+Rule.__doc__ = """A tip shown when `when(frame)` is true.
+
+`when` receives an EntryFrame and returns one boolean per user in the frame,
+built from frame.total() reductions so every rule shares the same arrays.
+"""
+
+RULES = [
+    Rule(
+        "overspending",
+        "⚠️ You’ve spent more than 50% of your income in the last 30 days.",
+        lambda f: (f.total('income', 30) > 0) & (f.total('expense', 30) > 0.5 * f.total('income', 30)),
+    ),
+    Rule(
+        "food",
+        "🍔 Your food expenses are high. Consider meal planning.",
+        lambda f: f.total('expense', 30, category='food') > 150,
+    ),
+]
+
+
+class EntryFrame:
+    """Recent entries of one or more users as parallel NumPy arrays.
+
+    Columns are amount, type code, category code (one code per lowercased
+    category name, so categories of different users with the same name
+    share it), day (days since the epoch) and the row's index into
+    `user_ids`. Per-user sums are computed with np.bincount and memoised, so
+    rules that ask for the same total share one reduction.
+    """
+
+    def __init__(self, user_ids, users, amount, type_code, categories, category_code, day, today):
+        self.user_ids = user_ids
+        self.users = users
+        self.amount = amount
+        self.type_code = type_code
+        self.category_index = {name: code for code, name in enumerate(categories)}
+        self.category_code = category_code
+        self.day = day
+        self.today = np.datetime64(today, 'D').astype(np.int64)
+        self._totals = {}
+
+    @classmethod
+    def load(cls, user_ids=None, today=None, batch_size=10000):
+        """Load the last WINDOW_DAYS of entries for `user_ids` (all users if None).
+
+        One query for the entries (stored type codes and category ids, no
+        strings) and one for the users' category names.
+        """
+        today = today or date.today()
+        stmt = select(
+            BudgetEntry.user_id,
+            BudgetEntry.amount,
+            type_coerce(BudgetEntry.type, SmallInteger),
+            BudgetEntry.category_id,
+            BudgetEntry.date,
+        ).where(BudgetEntry.date >= today - timedelta(days=WINDOW_DAYS))
+        names = select(Category.id, func.lower(Category.name)).order_by(Category.id)
+        if user_ids is not None:
+            stmt = stmt.where(BudgetEntry.user_id.in_(user_ids))
+            names = names.where(Category.user_id.in_(user_ids))
+
+        columns = [[], [], [], [], []]
+        result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            for column, values in zip(columns, zip(*rows)):
+                column.extend(values)
+        owners, amount, type_code, category_id, day = columns
+
+        owners = np.asarray(owners, dtype=np.int64)
+        if user_ids is None:
+            user_ids = np.unique(owners)
+        else:
+            user_ids = np.asarray(sorted(set(user_ids)), dtype=np.int64)
+        known = db.session.execute(names).all()
+        known_ids = [category_id for category_id, _ in known]
+        categories, name_code = np.unique(np.asarray([name for _, name in known], dtype=str), return_inverse=True)
+        category_code = name_code.reshape(-1)[
+            np.searchsorted(np.asarray(known_ids, dtype=np.int64), np.asarray(category_id, dtype=np.int64))
+        ]
+        return cls(
+            user_ids,
+            np.searchsorted(user_ids, owners),
+            np.asarray(amount, dtype=np.float64),
+            np.asarray(type_code, dtype=np.int8),
+            categories.tolist(),
+            category_code,
+            np.asarray(day, dtype='datetime64[D]').astype(np.int64),
+            today,
+        )
+
+    def total(self, type, days, category=None):
+        """Per-user sum of `type` entries over the last `days` days, optionally for one category."""
+        if days > WINDOW_DAYS:
+            raise ValueError(f"Rules may look back at most WINDOW_DAYS ({WINDOW_DAYS}) days")
+        key = (type, days, category)
+        if key not in self._totals:
+            mask = (self.type_code == TYPE_CODES[type]) & (self.day >= self.today - days)
+            if category is not None:
+                code = self.category_index.get(category.lower())
+                mask &= self.category_code == (code if code is not None else -1)
+            self._totals[key] = np.bincount(
+                self.users[mask], weights=self.amount[mask], minlength=len(self.user_ids)
+            )
+        return self._totals[key]
+
+    def evaluate(self, rules=None):
+        """Boolean matrix of shape (len(rules), len(user_ids))."""
+        rules = RULES if rules is None else rules
+        if not rules:
+            return np.zeros((0, len(self.user_ids)), dtype=bool)
+        return np.vstack([np.asarray(rule.when(self), dtype=bool) for rule in rules])
+
+
+def tips_for_user(user_id, today=None):
+    """Tip messages for one user, in RULES order."""
+    return tips_for_users([user_id], today).get(user_id, [])
+
+
+def tips_for_users(user_ids=None, today=None):
+    """{user_id: [messages]} for every user in `user_ids` (everyone with recent entries if None).
+
+    All users are evaluated together from one load of their entries, e.g. for digest emails.
+    """
+    frame = EntryFrame.load(user_ids, today)
+    matches = frame.evaluate()
+    return {
+        int(user_id): [RULES[r].message for r in np.flatnonzero(matches[:, i])]
+        for i, user_id in enumerate(frame.user_ids)
+    }
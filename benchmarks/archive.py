@@ -0,0 +1,115 @@
+"""Hot table size and read latency before and after archiving old entries.
+
+Seeds users with several years of history, then times the dashboard (first
+page and a date range reaching into old years), the first entries page of
+/api/entries and a full CSV export. It archives as 'flask archive run' does,
+VACUUMs and times the same requests again, which now merge the memory-mapped
+year files back in. The exports are compared byte for byte.
+
+Usage: python benchmarks/archive.py [--users 5] [--entries 20000] [--days 2190] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+
+
+def build_app(tmp):
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'archive.db')
+    Config.AUDIT_LOG_PATH = os.path.join(tmp, 'audit.log')
+    Config.RATELIMIT_STORAGE_URI = 'memory://'
+    Config.PASSWORD_HASH_WORKERS = 0
+    Config.BCRYPT_LOG_ROUNDS = 4
+    Config.JOB_WORKERS = 0
+    Config.JOB_EXPORT_THRESHOLD = 0
+    Config.RESPONSE_CACHE_SIZE = 0
+    Config.RATELIMIT_ENABLED = False
+    Config.ARCHIVE_DIR = os.path.join(tmp, 'archive')
+    from app import create_app
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, SESSION_COOKIE_SECURE=False)
+    return app
+
+
+def vacuum(db):
+    """Compact the database; the checkpoint moves the result from the WAL into the file."""
+    db.session.commit()
+    db.session.execute(db.text("VACUUM"))
+    db.session.execute(db.text("PRAGMA wal_checkpoint(TRUNCATE)"))
+
+
+def du(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def measure(client, repeat):
+    """Median milliseconds per request, and the CSV export body."""
+    requests = {
+        'dashboard': '/dashboard',
+        'dashboard, 3-year range': '/dashboard?start_date=2022-01-01&end_date=2024-12-31',
+        'api entries, first page': '/api/entries',
+        'csv export': '/download_csv',
+    }
+    timings = {}
+    for name, path in requests.items():
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(path)
+            body = response.get_data()
+            samples.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, (path, response.status_code)
+        timings[name] = statistics.median(samples)
+    return timings, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--entries', type=int, default=20000)
+    parser.add_argument('--days', type=int, default=2190)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(tmp)
+        from app import db, hasher, seed, archive
+
+        with app.app_context():
+            seed.seed(args.users, args.entries, hasher.hash('pw'), days=args.days)
+            vacuum(db)
+        client = app.test_client()
+        client.post('/login', data=dict(email='seed0@example.com', password='pw'))
+
+        db_path = os.path.join(tmp, 'archive.db')
+        print(f"{args.users} users x {args.entries} entries over {args.days} days")
+        before, before_csv = measure(client, args.repeat)
+        size_before = du(db_path)
+
+        with app.app_context():
+            started = time.perf_counter()
+            archived = archive.run(Config.ARCHIVE_AFTER_DAYS)
+            elapsed = time.perf_counter() - started
+            vacuum(db)
+        print(f"archived {sum(archived.values())} entries in {elapsed:.2f}s "
+              f"(before {archive.cutoff_year(Config.ARCHIVE_AFTER_DAYS)})")
+        after, after_csv = measure(client, args.repeat)
+        assert after_csv == before_csv, "export changed after archiving"
+
+        print(f"{'':<28}{'before':>10}{'after':>10}")
+        print(f"{'database file (MiB)':<28}{size_before / 2**20:>10.1f}{du(db_path) / 2**20:>10.1f}")
+        print(f"{'archive files (MiB)':<28}{0:>10.1f}{du(Config.ARCHIVE_DIR) / 2**20:>10.1f}")
+        for name in before:
+            print(f"{name + ' (ms)':<28}{before[name]:>10.1f}{after[name]:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Compare export throughput of the old jsonify path with the streamed encoders.
+
+Usage: python benchmarks/export_throughput.py [--rows 100000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+
+
+def build_app(db_path):
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+    from app import create_app
+    return create_app()
+
+
+def seed(app, rows):
+    from app import db
+    from app.models import User, BudgetEntry, Category
+    with app.app_context():
+        user = User(email='bench@example.com', password='x', role='user')
+        categories = [Category(name=name, owner=user)
+                      for name in ['Food', 'Rent', 'Utilities', 'Salary', 'Entertainment', 'Other']]
+        db.session.add_all([user] + categories)
+        db.session.commit()
+        start = date(2020, 1, 1)
+        db.session.execute(BudgetEntry.__table__.insert(), [
+            dict(user_id=user.id, date=start + timedelta(days=i % 2000), category_id=categories[i % 6].id,
+                 amount=round(i * 0.37 % 500, 2), type='income' if i % 6 == 3 else 'expense')
+            for i in range(rows)
+        ])
+        db.session.commit()
+        return user.id
+
+
+def jsonify_export(user_id):
+    """The download_json implementation this benchmark is measured against."""
+    from flask import jsonify
+    from app.models import BudgetEntry
+    entries = BudgetEntry.query.filter_by(user_id=user_id).all()
+    data = [
+        {"date": e.date.strftime('%Y-%m-%d'), "category": e.category.name, "amount": e.amount, "type": e.type}
+        for e in entries
+    ]
+    return jsonify(data).get_data()
+
+
+def streamed_export(encode):
+    def run(user_id):
+        from app.exports import entry_batches
+        size = 0
+        for chunk in encode(entry_batches(user_id)):
+            size += len(chunk)
+        return size
+    return run
+
+
+def measure(app, label, fn, user_id, rows, repeat):
+    best = None
+    with app.test_request_context():
+        for _ in range(repeat):
+            tracemalloc.start()
+            started = time.perf_counter()
+            result = fn(user_id)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            if best is None or elapsed < best[0]:
+                best = (elapsed, peak)
+    size = result if isinstance(result, int) else len(result)
+    elapsed, peak = best
+    print(f"{label:<16} {elapsed * 1000:9.1f} ms {rows / elapsed:12,.0f} rows/s "
+          f"{size / 1e6:8.2f} MB out {peak / 1e6:8.2f} MB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    from app.exports import json_chunks, ndjson_chunks, msgpack_chunks
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, 'bench.db'))
+        user_id = seed(app, args.rows)
+        print(f"{args.rows:,} rows, best of {args.repeat}")
+        measure(app, 'jsonify', jsonify_export, user_id, args.rows, args.repeat)
+        measure(app, 'msgspec json', streamed_export(json_chunks), user_id, args.rows, args.repeat)
+        measure(app, 'msgspec ndjson', streamed_export(ndjson_chunks), user_id, args.rows, args.repeat)
+        measure(app, 'msgspec msgpack', streamed_export(msgpack_chunks), user_id, args.rows, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
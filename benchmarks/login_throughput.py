@@ -0,0 +1,78 @@
+"""Measure login throughput against the number of password hashing workers.
+
+Concurrent clients (threads, as in a gthread gunicorn worker) post to
+/login for a fixed time; successful logins per second and the number of
+503 back-pressure responses are reported for each PASSWORD_HASH_WORKERS
+setting.
+
+Usage: python benchmarks/login_throughput.py [--workers 0 1 2 4] [--clients 8] [--seconds 5] [--rounds 10]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+
+
+def build_app(db_path, workers, rounds, queue_depth):
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+    Config.BCRYPT_LOG_ROUNDS = rounds
+    Config.PASSWORD_HASH_WORKERS = workers
+    Config.PASSWORD_HASH_QUEUE_DEPTH = queue_depth
+    Config.RATELIMIT_ENABLED = False
+    from app import create_app
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, SESSION_COOKIE_SECURE=False)
+    return app
+
+
+def run(app, clients, seconds):
+    counts = {'ok': 0, 'busy': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client_loop():
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            response = client.post('/login', data=dict(email='bench@example.com', password='pw'))
+            key = 'busy' if response.status_code == 503 else 'ok'
+            with lock:
+                counts[key] += 1
+            client.get('/logout')
+
+    threads = [threading.Thread(target=client_loop) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--queue-depth', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, bcrypt cost {args.rounds}, queue depth {args.queue_depth}")
+    print(f"{'workers':>8}{'logins/s':>12}{'503s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            app = build_app(os.path.join(tmp, f'bench{workers}.db'), workers, args.rounds, args.queue_depth)
+            app.test_client().post('/register', data=dict(
+                email='bench@example.com', password='pw', confirm_password='pw'))
+            counts, elapsed = run(app, args.clients, args.seconds)
+            print(f"{workers:>8}{counts['ok'] / elapsed:>12.1f}{counts['busy']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Check that rate limits hold across several worker processes.
+
+Each worker process builds its own app (as gunicorn workers do) and posts
+failed logins as fast as it can. With shared storage the number of
+attempts let through across all workers should equal the per-client
+limit; with per-process memory:// storage it grows with the worker count.
+
+Usage: python benchmarks/ratelimit_workers.py [--workers 4] [--attempts 50] [--limit "20 per minute"]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+
+
+def worker(db_path, storage_uri, limit, attempts, start, results):
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+    Config.RATELIMIT_STORAGE_URI = storage_uri
+    Config.RATELIMIT_LOGIN = limit
+    Config.PASSWORD_HASH_WORKERS = 0
+    from app import create_app
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, SESSION_COOKIE_SECURE=False)
+    app.logger.setLevel(logging.ERROR)  # one warning per failed login otherwise
+    client = app.test_client()
+
+    start.wait()
+    allowed = limited = 0
+    for _ in range(attempts):
+        response = client.post('/login', data=dict(email='nobody@example.com', password='wrong'))
+        if response.status_code == 429:
+            limited += 1
+        else:
+            allowed += 1
+    results.put((allowed, limited))
+
+
+def run(tmp, storage_uri, args):
+    start = multiprocessing.Barrier(args.workers)
+    results = multiprocessing.Queue()
+    db_path = os.path.join(tmp, 'bench.db')
+    processes = [
+        multiprocessing.Process(target=worker, args=(db_path, storage_uri, args.limit, args.attempts, start, results))
+        for _ in range(args.workers)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+    return sum(a for a, _ in totals), sum(l for _, l in totals), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--attempts', type=int, default=50)
+    parser.add_argument('--limit', default='20 per minute')
+    args = parser.parse_args()
+
+    expected = int(args.limit.split()[0])
+    print(f"{args.workers} workers x {args.attempts} login attempts, limit {args.limit!r}")
+    print(f"{'storage':>10}{'allowed':>10}{'limited':>10}{'seconds':>10}  result")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Create the schema once so the workers do not race on create_all().
+        Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+        from app import create_app
+        create_app()
+        for name, uri in (('memory', 'memory://'), ('sqlite', 'sqlite:///' + os.path.join(tmp, 'limits.db'))):
+            allowed, limited, elapsed = run(tmp, uri, args)
+            verdict = "holds" if allowed == expected else f"expected {expected}"
+            print(f"{name:>10}{allowed:>10}{limited:>10}{elapsed:>10.2f}  {verdict}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""Latency, query count and memory benchmarks for the hot routes.
+
+For each data size (users x entries per user) a fresh database is seeded
+with app.seed and the dashboard (cold and warm response cache), the CSV,
+JSON and NDJSON exports, the admin dashboard, /admin/logs and a login POST
+are driven through the Flask test client. Each scenario reports p50, p90,
+p99 and max latency, SQL statements per request and the tracemalloc peak
+of one extra (untimed) request.
+
+Results can be saved as a JSON baseline and later runs compared against
+it; the script exits with status 1 if any scenario got slower than the
+tolerance allows, issues more queries or needs more memory.
+
+Usage: python benchmarks/run_benchmarks.py [--sizes 5x200 20x2000] [--repeat 30]
+                                           [--output baseline.json] [--compare baseline.json] [--tolerance 0.25]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+
+PASSWORD = 'bench-password'
+LOG_LINES = 20000
+
+
+def build_app(db_path, audit_path):
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+    Config.AUDIT_LOG_PATH = audit_path
+    Config.RATELIMIT_ENABLED = False
+    Config.RATELIMIT_STORAGE_URI = 'memory://'
+    Config.PASSWORD_HASH_WORKERS = 0
+    Config.BCRYPT_LOG_ROUNDS = 4
+    # Time the streamed exports at every size, never the hand-off to a job
+    Config.JOB_EXPORT_THRESHOLD = 0
+    Config.JOB_WORKERS = 0
+    from app import create_app
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, SESSION_COOKIE_SECURE=False)
+    return app
+
+
+def write_audit_log(path, lines):
+    levels = ['INFO'] * 8 + ['WARNING', 'ERROR']
+    with open(path, 'w') as f:
+        for i in range(lines):
+            f.write(f"[2026-01-01 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}] "
+                    f"{levels[i % len(levels)]} seed{i % 50}@example.com GET /dashboard 200 {i % 97}ms\n")
+
+
+def seed_database(app, users, entries):
+    from app import db, hasher, seed
+    from app.models import User
+    with app.app_context():
+        user_ids = seed.seed(users, entries, hasher.hash(PASSWORD), email_prefix='bench')
+        db.session.execute(db.update(User).where(User.id == user_ids[-1]).values(role='admin'))
+        db.session.commit()
+        emails = db.session.scalars(db.select(User.email).where(User.id.in_([user_ids[0], user_ids[-1]]))
+                                    .order_by(User.id)).all()
+    return emails[0], emails[-1]
+
+
+def logged_in(app, email):
+    client = app.test_client()
+    response = client.post('/login', data=dict(email=email, password=PASSWORD))
+    assert response.status_code == 302, f"login as {email} failed ({response.status_code})"
+    return client
+
+
+def scenarios(app, user_email, admin_email):
+    """(name, request, reset) triples; `reset` runs untimed before each request."""
+    from app.response_cache import response_cache
+    from app.routes import admin_stats_cache
+
+    user = logged_in(app, user_email)
+    admin = logged_in(app, admin_email)
+
+    def get(client, url):
+        def request():
+            response = client.get(url)
+            response.get_data()
+            assert response.status_code == 200, f"GET {url} returned {response.status_code}"
+        return request
+
+    def login():
+        response = app.test_client().post('/login', data=dict(email=user_email, password=PASSWORD))
+        assert response.status_code == 302, f"login returned {response.status_code}"
+
+    nothing = lambda: None  # noqa: E731
+    return [
+        ('dashboard_cold', get(user, '/dashboard'), response_cache.clear),
+        ('dashboard_warm', get(user, '/dashboard'), nothing),
+        ('download_csv', get(user, '/download_csv'), response_cache.clear),
+        ('download_json', get(user, '/download_json'), response_cache.clear),
+        ('download_ndjson', get(user, '/download_json?format=ndjson'), response_cache.clear),
+        ('admin_dashboard', get(admin, '/admin/dashboard'), admin_stats_cache.clear),
+        ('view_logs', get(admin, '/admin/logs'), nothing),
+        ('login', login, nothing),
+    ]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def measure(app, request, reset, repeat):
+    from app import db
+    from sqlalchemy import event
+
+    queries = [0]
+
+    def count(*args):
+        queries[0] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        reset()
+        request()  # warm up connections, templates and caches that are not under test
+        timings = []
+        queries[0] = 0
+        for _ in range(repeat):
+            reset()
+            started = time.perf_counter()
+            request()
+            timings.append((time.perf_counter() - started) * 1000)
+        per_request = queries[0] / repeat
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    reset()
+    tracemalloc.start()
+    request()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p90_ms': round(percentile(timings, 0.90), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': round(per_request, 2),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    for size, scenarios_ in results.items():
+        for name, current in scenarios_.items():
+            before = baseline.get(size, {}).get(name)
+            if before is None:
+                continue
+            for metric in ('p50_ms', 'p90_ms', 'peak_kib'):
+                if current[metric] > before[metric] * (1 + tolerance):
+                    regressions.append(f"{size} {name}: {metric} {before[metric]} -> {current[metric]}")
+            if current['queries'] > before['queries']:
+                regressions.append(f"{size} {name}: queries {before['queries']} -> {current['queries']}")
+    return regressions
+
+
+def parse_size(value):
+    users, _, entries = value.partition('x')
+    try:
+        return int(users), int(entries)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected USERSxENTRIES, got {value!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[(5, 200), (20, 2000)])
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--only', nargs='+', help="Run only these scenarios.")
+    parser.add_argument('--output', help="Write the results to this JSON file.")
+    parser.add_argument('--compare', help="Baseline JSON file to check the results against.")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed relative slowdown / memory growth before a regression is reported.")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        audit_path = os.path.join(tmp, 'audit.log')
+        write_audit_log(audit_path, LOG_LINES)
+        for users, entries in args.sizes:
+            size = f"{users}x{entries}"
+            app = build_app(os.path.join(tmp, f'bench-{size}.db'), audit_path)
+            started = time.perf_counter()
+            user_email, admin_email = seed_database(app, users, entries)
+            print(f"\n{size}: {users} users x {entries} entries (seeded in {time.perf_counter() - started:.1f}s)")
+            print(f"{'scenario':<18}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}{'queries':>9}{'peak KiB':>10}")
+            results[size] = {}
+            for name, request, reset in scenarios(app, user_email, admin_email):
+                if args.only and name not in args.only:
+                    continue
+                row = results[size][name] = measure(app, request, reset, args.repeat)
+                print(f"{name:<18}{row['p50_ms']:>9.2f}{row['p90_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+                      f"{row['max_ms']:>9.2f}{row['queries']:>9g}{row['peak_kib']:>10.1f}")
+            with app.app_context():
+                from app import db
+                db.engine.dispose()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'repeat': args.repeat,
+                'results': results,
+            }, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare} (tolerance {args.tolerance:.0%}).")
+
+
+if __name__ == '__main__':
+    main()
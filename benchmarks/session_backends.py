@@ -0,0 +1,71 @@
+"""Measure per-request session overhead for each SESSION_BACKEND.
+
+Each backend serves the same logged-in request (/_whoami, which loads the
+session and the current user) through the Flask test client; the overhead
+is reported relative to a request that carries no session cookie.
+
+Usage: python benchmarks/session_backends.py [--requests 2000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+
+BACKENDS = [
+    ('filesystem', {}),
+    ('sql', {}),
+    ('memory', {}),
+    ('redis', {'SESSION_REDIS_URL': 'local://'}),
+]
+
+
+def build_app(tmp, backend, overrides):
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, f'{backend}.db')
+    Config.SESSION_BACKEND = backend
+    Config.SESSION_FILE_DIR = os.path.join(tmp, f'{backend}_sessions')
+    for key, value in overrides.items():
+        setattr(Config, key, value)
+    from app import create_app
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, SESSION_COOKIE_SECURE=False)
+    return app
+
+
+def timed(client, path, count):
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        client.get(path)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'backend':<12}{'median ms':>12}{'p95 ms':>10}{'overhead ms':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend, overrides in BACKENDS:
+            app = build_app(tmp, backend, overrides)
+            client = app.test_client()
+            client.post('/register', data=dict(email='bench@example.com', password='pw', confirm_password='pw'))
+            client.post('/login', data=dict(email='bench@example.com', password='pw'))
+
+            samples = timed(client, '/_whoami', args.requests)
+            anonymous = timed(app.test_client(), '/_whoami', args.requests)
+            median = statistics.median(samples)
+            p95 = statistics.quantiles(samples, n=20)[-1]
+            overhead = median - statistics.median(anonymous)
+            print(f"{backend:<12}{median * 1000:>12.3f}{p95 * 1000:>10.3f}{overhead * 1000:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""Mixed read/write throughput of several processes sharing one SQLite file.
+
+Each process (standing in for a gunicorn worker) loops for a fixed time
+doing either a dashboard-style read (rollup totals and the latest page of
+entries) or an entry insert with its rollup and data-version updates, in
+the proportion given by --write-ratio. It runs once with SQLite's default
+settings (rollback journal, synchronous=FULL, the driver's 5 s lock wait)
+and once with the tuned PRAGMAs from Config, and reports operations per
+second, "database is locked" failures and p99 latencies.
+
+Usage: python benchmarks/sqlite_concurrency.py [--processes 4] [--seconds 10] [--write-ratio 0.2]
+                                               [--users 20] [--entries 500]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+
+MODES = {
+    'default': dict(SQLITE_JOURNAL_MODE='DELETE', SQLITE_SYNCHRONOUS='FULL', SQLITE_BUSY_TIMEOUT=5000,
+                    SQLITE_CACHE_SIZE=-2000, SQLITE_MMAP_SIZE=0),
+    'tuned': dict(SQLITE_JOURNAL_MODE=Config.SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS=Config.SQLITE_SYNCHRONOUS,
+                  SQLITE_BUSY_TIMEOUT=Config.SQLITE_BUSY_TIMEOUT, SQLITE_CACHE_SIZE=Config.SQLITE_CACHE_SIZE,
+                  SQLITE_MMAP_SIZE=Config.SQLITE_MMAP_SIZE),
+}
+
+
+def build_app(db_path, audit_path, settings):
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+    Config.AUDIT_LOG_PATH = audit_path
+    Config.RATELIMIT_STORAGE_URI = 'memory://'
+    Config.PASSWORD_HASH_WORKERS = 0
+    for name, value in settings.items():
+        setattr(Config, name, value)
+    from app import create_app
+    return create_app()
+
+
+def worker(db_path, audit_path, settings, user_ids, seconds, write_ratio, seed, start_at, results):
+    from app import db, rollups
+    from app.models import BudgetEntry, Category
+    from app.response_cache import bump_data_version
+    from sqlalchemy.exc import OperationalError
+
+    app = build_app(db_path, audit_path, settings)
+    rng = random.Random(seed)
+    counts = {'reads': 0, 'writes': 0, 'locked': 0}
+    read_ms, write_ms = [], []
+    with app.app_context():
+        food = dict(db.session.query(Category.user_id, Category.id).filter(Category.name == 'Food'))
+        db.session.rollback()
+        time.sleep(max(0.0, start_at - time.time()))
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            user_id = rng.choice(user_ids)
+            started = time.perf_counter()
+            try:
+                if rng.random() < write_ratio:
+                    entry = BudgetEntry(user_id=user_id, date=date.today(), category_id=food[user_id],
+                                        amount=round(rng.uniform(1, 50), 2), type='expense')
+                    db.session.add(entry)
+                    rollups.record_entry(entry)
+                    bump_data_version(user_id)
+                    db.session.commit()
+                    counts['writes'] += 1
+                    write_ms.append((time.perf_counter() - started) * 1000)
+                else:
+                    criteria = rollups.rollup_filters(user_id)
+                    rollups.summary_totals(criteria)
+                    rollups.category_totals(criteria, type='expense')
+                    BudgetEntry.query.filter_by(user_id=user_id).order_by(
+                        BudgetEntry.date.desc(), BudgetEntry.id.desc()).limit(50).all()
+                    db.session.rollback()
+                    counts['reads'] += 1
+                    read_ms.append((time.perf_counter() - started) * 1000)
+            except OperationalError as exc:
+                db.session.rollback()
+                if 'locked' not in str(exc):
+                    raise
+                counts['locked'] += 1
+    results.put((counts, read_ms, write_ms))
+
+
+def p99(samples):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(0.99 * (len(ordered) - 1)))]
+
+
+def run(mode, args, tmp):
+    from app import db, hasher, seed
+
+    db_path = os.path.join(tmp, f'{mode}.db')
+    audit_path = os.path.join(tmp, 'audit.log')
+    settings = MODES[mode]
+    app = build_app(db_path, audit_path, settings)
+    with app.app_context():
+        user_ids = seed.seed(args.users, args.entries, hasher.hash('pw'))
+        db.session.remove()
+        db.engine.dispose()
+
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    start_at = time.time() + 3  # let every process finish importing first
+    processes = [
+        ctx.Process(target=worker, args=(db_path, audit_path, settings, user_ids, args.seconds,
+                                         args.write_ratio, n, start_at, results))
+        for n in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    totals = {'reads': 0, 'writes': 0, 'locked': 0}
+    read_ms, write_ms = [], []
+    for _ in processes:
+        counts, reads, writes = results.get()
+        for key, value in counts.items():
+            totals[key] += value
+        read_ms += reads
+        write_ms += writes
+    for process in processes:
+        process.join()
+    return totals, p99(read_ms), p99(write_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--entries', type=int, default=500)
+    parser.add_argument('--modes', nargs='+', choices=sorted(MODES), default=['default', 'tuned'])
+    args = parser.parse_args()
+
+    print(f"{args.processes} processes, {args.seconds:g}s, {args.write_ratio:.0%} writes, "
+          f"{args.users} users x {args.entries} entries")
+    print(f"{'mode':<10}{'reads/s':>10}{'writes/s':>10}{'locked':>8}{'read p99 ms':>13}{'write p99 ms':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            totals, read_p99, write_p99 = run(mode, args, tmp)
+            print(f"{mode:<10}{totals['reads'] / args.seconds:>10.1f}{totals['writes'] / args.seconds:>10.1f}"
+                  f"{totals['locked']:>8}{read_p99:>13.1f}{write_p99:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Cold start: import time, create_app() time and the first requests.
+
+Every sample is a fresh interpreter (as a new container or gunicorn worker
+would be) that imports the app, builds it, then serves GET /login and,
+after logging in, the first GET /dashboard through the test client. The
+database is migrated (alembic_version at head), so DB_CREATE_ALL=auto can
+skip create_all while 'always' pays for it on every boot. The last column
+says whether NumPy was already imported once the app was built.
+
+Usage: python benchmarks/startup.py [--repeat 10] [--modes always auto never]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'bench-password'
+
+
+def configure(db_path, audit_path, mode):
+    from config import Config
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+    Config.AUDIT_LOG_PATH = audit_path
+    Config.RATELIMIT_STORAGE_URI = 'memory://'
+    Config.PASSWORD_HASH_WORKERS = 0
+    Config.BCRYPT_LOG_ROUNDS = 4
+    Config.JOB_WORKERS = 0
+    Config.DB_CREATE_ALL = mode
+
+
+def prepare(db_path, audit_path):
+    """Create and seed the database ('auto' stamps a new one at the migration head)."""
+    configure(db_path, audit_path, 'auto')
+    from app import create_app, hasher, seed
+    app = create_app()
+    with app.app_context():
+        seed.seed(1, 500, hasher.hash(PASSWORD))
+
+
+def child(db_path, audit_path, mode):
+    """One sample, printed as JSON: seconds for each startup step."""
+    started = time.perf_counter()
+    configure(db_path, audit_path, mode)
+    from app import create_app
+    imported = time.perf_counter()
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, SESSION_COOKIE_SECURE=False)
+    built = time.perf_counter()
+    numpy_loaded = 'numpy' in sys.modules
+
+    client = app.test_client()
+    client.get('/login')
+    first_request = time.perf_counter()
+    client.post('/login', data=dict(email='seed0@example.com', password=PASSWORD))
+    before_dashboard = time.perf_counter()
+    response = client.get('/dashboard')
+    assert response.status_code == 200, response.status_code
+    dashboard = time.perf_counter()
+
+    print(json.dumps(dict(
+        import_s=imported - started, create_app_s=built - imported, first_request_s=first_request - built,
+        first_dashboard_s=dashboard - before_dashboard, numpy_at_boot=numpy_loaded,
+    )))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--modes', nargs='+', choices=['always', 'auto', 'never'], default=['always', 'auto', 'never'])
+    parser.add_argument('--child', nargs=3, metavar=('DB', 'AUDIT_LOG', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'startup.db')
+        audit_path = os.path.join(tmp, 'audit.log')
+        prepare(db_path, audit_path)
+        # One untimed run so every mode starts with the same warm OS file cache
+        subprocess.run([sys.executable, __file__, '--child', db_path, audit_path, 'auto'],
+                       check=True, capture_output=True)
+
+        print(f"median of {args.repeat} fresh processes, milliseconds")
+        print(f"{'DB_CREATE_ALL':<14}{'process':>9}{'import':>9}{'create_app':>12}"
+              f"{'1st request':>13}{'1st dashboard':>15}  numpy at boot")
+        for mode in args.modes:
+            samples, walls = [], []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                result = subprocess.run([sys.executable, __file__, '--child', db_path, audit_path, mode],
+                                        check=True, capture_output=True, text=True)
+                walls.append(time.perf_counter() - started)
+                samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+            def median_ms(key):
+                return statistics.median(sample[key] for sample in samples) * 1000
+
+            print(f"{mode:<14}{statistics.median(walls) * 1000:>9.0f}{median_ms('import_s'):>9.0f}"
+                  f"{median_ms('create_app_s'):>12.1f}{median_ms('first_request_s'):>13.1f}"
+                  f"{median_ms('first_dashboard_s'):>15.1f}  {samples[-1]['numpy_at_boot']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,12 +5,162 @@ BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 class Config:
     SECRET_KEY = os.environ.get("FLASK_SECRET_KEY", "dev-secret-change-me")
 
-    # ✅ Store DB inside instance folder for persistence
+    # ✅ Store DB inside instance folder for persistence, unless DATABASE_URL
+    # names another database (postgres://... uses psycopg2-binary)
     INSTANCE_DIR = os.path.join(BASE_DIR, 'instance')
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(INSTANCE_DIR, 'smartbudget.db')
+    SQLALCHEMY_DATABASE_URI = (
+        os.environ.get("DATABASE_URL") or 'sqlite:///' + os.path.join(INSTANCE_DIR, 'smartbudget.db')
+    )
+
+    # Connection pool per process: persistent connections, extra ones under
+    # load, seconds to wait for one, seconds before a connection is replaced
+    # and whether to test it before use (survives database restarts).
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = 30
+    DB_POOL_RECYCLE = 1800
+    DB_POOL_PRE_PING = True
+
+    # SQLite connection PRAGMAs. WAL lets readers run alongside the single
+    # writer, NORMAL syncs at checkpoints instead of every commit, and
+    # writers wait up to SQLITE_BUSY_TIMEOUT ms for the lock instead of
+    # failing with "database is locked". Cache in KiB when negative.
+    SQLITE_JOURNAL_MODE = "WAL"
+    SQLITE_SYNCHRONOUS = "NORMAL"
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))
+    SQLITE_CACHE_SIZE = -20000
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Startup schema creation: 'auto' runs db.create_all() only on a database
+    # without an alembic_version table (stamping an empty one at the latest
+    # migration), 'always' on every boot, 'never' leaves it to
+    # 'flask db upgrade' (fastest cold start).
+    DB_CREATE_ALL = os.environ.get("DB_CREATE_ALL", "auto")
+
+    # Password hashing: bcrypt work factor, worker processes per app process
+    # (0 hashes inline) and how many more requests may wait before new ones
+    # are turned away with 503.
+    BCRYPT_LOG_ROUNDS = int(os.environ.get("BCRYPT_LOG_ROUNDS", 12))
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_QUEUE_DEPTH = int(os.environ.get("PASSWORD_HASH_QUEUE_DEPTH", 8))
+    PASSWORD_HASH_TIMEOUT = 10
+
+    # Per-process cache of (id, email, role) used by the user loader. The TTL
+    # bounds how long other workers may see a stale role.
+    USER_CACHE_SIZE = 10000
+    USER_CACHE_TTL = 30
+
+    # Per-process cache of dashboard summaries and export payloads, keyed by
+    # user data version: entry count, total bytes, largest payload kept and
+    # seconds before an unused entry expires
+    RESPONSE_CACHE_SIZE = 1000
+    RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    RESPONSE_CACHE_MAX_ENTRY_BYTES = 4 * 1024 * 1024
+    RESPONSE_CACHE_TTL = 600
+
+    # Entry listing page sizes (keyset pagination)
+    ENTRIES_PER_PAGE = 50
+    ENTRIES_MAX_PAGE_SIZE = 500
+
+    # Most buckets (days, weeks or months) one /api/chart response may hold
+    CHART_MAX_BUCKETS = 400
+
+    # Rows fetched per round-trip when streaming exports
+    EXPORT_BATCH_SIZE = 1000
+
+    # Rows inserted per transaction by the bulk importer
+    IMPORT_BATCH_SIZE = 5000
+
+    # Seconds to cache admin dashboard statistics (0 disables the cache)
+    ADMIN_STATS_TTL = 30
+
+    # Forecasts and anomaly detection ('flask analytics run'): months of
+    # history used, pool processes (0 runs inline), users per pool task,
+    # robust z-score above which an entry is flagged and the fewest entries
+    # a category needs before it is checked.
+    ANALYTICS_HISTORY_MONTHS = 12
+    ANALYTICS_WORKERS = int(os.environ.get("ANALYTICS_WORKERS", 2))
+    ANALYTICS_CHUNK_USERS = 200
+    ANALYTICS_ANOMALY_THRESHOLD = 3.5
+    ANALYTICS_MIN_SAMPLES = 8
+
+    # Background jobs (app/jobs.py). Exports of more than JOB_EXPORT_THRESHOLD
+    # entries and deletion of accounts with more than JOB_PURGE_THRESHOLD
+    # are queued instead of run in the request (0 keeps them inline). Each
+    # app process runs JOB_WORKERS threads (0 leaves the queue to 'flask jobs
+    # worker'), which poll every JOB_POLL_INTERVAL seconds. A running job's
+    # worker touches its heartbeat every JOB_HEARTBEAT_INTERVAL seconds; one
+    # not heard from for JOB_TIMEOUT seconds is assumed lost and retried, up
+    # to JOB_MAX_ATTEMPTS runs. Export files are kept in JOB_ARTIFACT_DIR
+    # (default instance/exports) for JOB_ARTIFACT_TTL seconds.
+    JOB_EXPORT_THRESHOLD = int(os.environ.get("JOB_EXPORT_THRESHOLD", 20000))
+    JOB_PURGE_THRESHOLD = int(os.environ.get("JOB_PURGE_THRESHOLD", 5000))
+    JOB_PURGE_BATCH_SIZE = 5000
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 1))
+    JOB_POLL_INTERVAL = 2.0
+    JOB_HEARTBEAT_INTERVAL = 30
+    JOB_TIMEOUT = 300
+    JOB_MAX_ATTEMPTS = 3
+    JOB_ARTIFACT_DIR = os.environ.get("JOB_ARTIFACT_DIR")
+    JOB_ARTIFACT_TTL = 24 * 3600
+
+    # Cold storage ('flask archive run' or an 'archive' job): entries from
+    # calendar years that ended more than ARCHIVE_AFTER_DAYS ago move out of
+    # budget_entry into one file per user and year under ARCHIVE_DIR
+    # (default instance/archive). Their sums stay in the rollups and reads
+    # merge them back in; they can no longer be edited. Keep it above
+    # ANALYTICS_HISTORY_MONTHS, as analytics and tips read live entries only.
+    ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", 730))
+    ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR")
+
+    # Audit log (rotated backups live next to it as audit.log.1, .2, ...)
+    AUDIT_LOG_PATH = os.path.join('logs', 'audit.log')
+    AUDIT_LOG_MAX_BYTES = int(os.environ.get("AUDIT_LOG_MAX_BYTES", 5 * 1024 * 1024))
+    AUDIT_LOG_BACKUP_COUNT = 3
+    AUDIT_LOG_FORMAT = os.environ.get("AUDIT_LOG_FORMAT", "text")  # 'text' or 'json' (JSON lines)
+
+    # Request profiling: per-endpoint timings and SQL counts at /admin/metrics
+    # and, with SERVER_TIMING_ENABLED, in Server-Timing headers of responses
+    # to admins (never to anyone else: they reveal work done per request,
+    # such as whether a login checked a password). Endpoints in PROFILE_ENDPOINTS (e.g.
+    # "main.dashboard,main.download_csv") are also stack-sampled every
+    # PROFILE_INTERVAL seconds into PROFILE_DIR/<endpoint>.folded.
+    PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "1") == "1"
+    SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED", "0") == "1"
+    PROFILE_ENDPOINTS = [name for name in os.environ.get("PROFILE_ENDPOINTS", "").split(",") if name]
+    PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", 0.005))
+    PROFILE_DIR = os.path.join('logs', 'profiles')
+
+    # Server-side sessions: 'sql' (app database), 'memory' (in-process LRU,
+    # single worker only), 'redis' (SESSION_REDIS_URL; 'local://' is an
+    # in-process stand-in) or 'filesystem' (instance/flask_session)
+    SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "sql")
+    SESSION_REDIS_URL = os.environ.get("SESSION_REDIS_URL", "redis://localhost:6379/0")
+    SESSION_LRU_SIZE = 10000
+    SESSION_CLEANUP_BATCH_SIZE = 1000
+    SESSION_CLEANUP_N_REQUESTS = 1000
+    # Only write the session back when it changes; sessions then expire
+    # PERMANENT_SESSION_LIFETIME after the last change (e.g. login).
+    SESSION_REFRESH_EACH_REQUEST = False
+
+    # Rate limit counters shared by all workers. Defaults to a SQLite file in
+    # the instance folder (one host); use redis://host:6379 (needs the redis
+    # package) when workers run on several hosts, or memory:// for a single
+    # process.
+    RATELIMIT_STORAGE_URI = os.environ.get("RATELIMIT_STORAGE_URI")
+    RATELIMIT_HEADERS_ENABLED = True
+    RATELIMIT_LOGIN = os.environ.get("RATELIMIT_LOGIN", "10 per minute")
+    RATELIMIT_REGISTER = os.environ.get("RATELIMIT_REGISTER", "5 per hour")
+    RATELIMIT_EXPORT = os.environ.get("RATELIMIT_EXPORT", "30 per hour")
+
+    # Reverse proxies in front of the app (e.g. 1 behind a load balancer).
+    # Their X-Forwarded-For/-Proto headers are trusted, so rate limits see
+    # the client's address instead of the proxy's. Leave at 0 when clients
+    # connect directly, or they could spoof their address.
+    TRUSTED_PROXIES = int(os.environ.get("TRUSTED_PROXIES", 0))
+
     # ✅ Session cookie settings
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_SAMESITE = 'None'
@@ -0,0 +1,20 @@
+"""Gunicorn settings, read automatically from the working directory.
+
+Each worker imports run.py and so builds the app once. With
+GUNICORN_PRELOAD=1 the master builds it instead and the workers share
+those pages copy-on-write: faster worker boots and less memory, at the
+cost of restarting the master to deploy code. Database connections, the
+audit log thread and the worker pools are re-created in each worker
+after the fork.
+"""
+import os
+
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "0") == "1"
+
+
+def when_ready(server):
+    # Runs in the master before any worker is forked.
+    if preload_app:
+        from app.routes import preload_views
+        preload_views()
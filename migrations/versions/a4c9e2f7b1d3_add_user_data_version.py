@@ -0,0 +1,23 @@
+"""Add data_version column to user
+
+Revision ID: a4c9e2f7b1d3
+Revises: f3b8d5a1c7e2
+Create Date: 2026-10-16 20:10:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a4c9e2f7b1d3'
+down_revision = 'f3b8d5a1c7e2'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
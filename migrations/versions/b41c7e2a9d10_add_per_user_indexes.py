@@ -0,0 +1,27 @@
+"""Add per-user indexes on budget_entry and category
+
+Revision ID: b41c7e2a9d10
+Revises: 5f5fdf0f3a3c
+Create Date: 2026-10-16 09:30:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b41c7e2a9d10'
+down_revision = '5f5fdf0f3a3c'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_budget_entry_user_date', 'budget_entry', ['user_id', 'date'])
+    op.create_index('ix_budget_entry_user_type_date', 'budget_entry', ['user_id', 'type', 'date', 'amount'])
+    op.create_index('ix_budget_entry_user_category_date', 'budget_entry', ['user_id', 'category', 'date'])
+    op.create_index('uq_category_user_name', 'category', ['user_id', 'name'], unique=True)
+
+def downgrade():
+    op.drop_index('uq_category_user_name', table_name='category')
+    op.drop_index('ix_budget_entry_user_category_date', table_name='budget_entry')
+    op.drop_index('ix_budget_entry_user_type_date', table_name='budget_entry')
+    op.drop_index('ix_budget_entry_user_date', table_name='budget_entry')
@@ -0,0 +1,71 @@
+"""Add category_id, type_code and amount_cents to budget_entry (expand)
+
+Revision ID: b6e3d9f2a8c1
+Revises: a4c9e2f7b1d3
+Create Date: 2026-10-16 23:00:00.000000
+
+The new columns are added next to the old ones and filled in id ranges of
+BATCH_SIZE rows, each range committed on its own, so the table stays
+writable while this runs and an interrupted run resumes where it stopped.
+Rows the previous release writes in the meantime are filled in by the
+contract revision (c8f4a1e7d2b5) before it drops the old columns.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b6e3d9f2a8c1'
+down_revision = 'a4c9e2f7b1d3'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+# Entries may name a category the user never created; give those a row.
+MISSING_CATEGORIES = sa.text("""
+    INSERT INTO category (name, user_id)
+    SELECT DISTINCT e.category, e.user_id FROM budget_entry e
+    WHERE e.amount_cents IS NULL AND NOT EXISTS (
+        SELECT 1 FROM category c WHERE c.user_id = e.user_id AND c.name = e.category
+    )
+""")
+
+FILL_RANGE = sa.text("""
+    UPDATE budget_entry SET
+        category_id = (
+            SELECT c.id FROM category c
+            WHERE c.user_id = budget_entry.user_id AND c.name = budget_entry.category
+        ),
+        type_code = CASE WHEN type = 'income' THEN 1 ELSE 2 END,
+        amount_cents = CAST(ROUND(amount * 100) AS INTEGER)
+    WHERE id >= :start AND id < :stop AND amount_cents IS NULL
+""")
+
+
+def backfill(bind, batch_size=BATCH_SIZE):
+    """Fill the new columns of every row that lacks them, one id range per statement."""
+    bind.execute(MISSING_CATEGORIES)
+    low, high = bind.execute(
+        sa.text("SELECT MIN(id), MAX(id) FROM budget_entry WHERE amount_cents IS NULL")
+    ).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, batch_size):
+        bind.execute(FILL_RANGE, dict(start=start, stop=start + batch_size))
+
+def upgrade():
+    with op.batch_alter_table('budget_entry', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('category_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('type_code', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('amount_cents', sa.Integer(), nullable=True))
+
+    # Outside the migration transaction: every range commits as it goes.
+    with op.get_context().autocommit_block():
+        backfill(op.get_bind())
+
+def downgrade():
+    with op.batch_alter_table('budget_entry', schema=None) as batch_op:
+        batch_op.drop_column('amount_cents')
+        batch_op.drop_column('type_code')
+        batch_op.drop_column('category_id')
@@ -0,0 +1,195 @@
+"""Drop the string category, type and float amount columns (contract)
+
+Revision ID: c8f4a1e7d2b5
+Revises: b6e3d9f2a8c1
+Create Date: 2026-10-16 23:05:00.000000
+
+Run with the release that reads the new columns, once the previous release
+has stopped writing. Rows it wrote after the expand revision are filled in
+first (same batched statements), then the old columns and their indexes are
+replaced. monthly_rollup is derived data: it is recreated keyed by
+category_id and type_code with totals in cents, and rebuilt from the
+entries USER_BATCH_SIZE users at a time. spending_forecast keeps its rows
+but names the category by category_id as well.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c8f4a1e7d2b5'
+down_revision = 'b6e3d9f2a8c1'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+USER_BATCH_SIZE = 500
+
+MISSING_CATEGORIES = sa.text("""
+    INSERT INTO category (name, user_id)
+    SELECT DISTINCT e.category, e.user_id FROM budget_entry e
+    WHERE e.amount_cents IS NULL AND NOT EXISTS (
+        SELECT 1 FROM category c WHERE c.user_id = e.user_id AND c.name = e.category
+    )
+""")
+
+FILL_RANGE = sa.text("""
+    UPDATE budget_entry SET
+        category_id = (
+            SELECT c.id FROM category c
+            WHERE c.user_id = budget_entry.user_id AND c.name = budget_entry.category
+        ),
+        type_code = CASE WHEN type = 'income' THEN 1 ELSE 2 END,
+        amount_cents = CAST(ROUND(amount * 100) AS INTEGER)
+    WHERE id >= :start AND id < :stop AND amount_cents IS NULL
+""")
+
+# Lightweight table definitions for building the rollup rebuild
+budget_entry = sa.table(
+    'budget_entry',
+    sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('date', sa.Date),
+    sa.column('category', sa.String), sa.column('type', sa.String), sa.column('amount', sa.Float),
+    sa.column('category_id', sa.Integer), sa.column('type_code', sa.SmallInteger),
+    sa.column('amount_cents', sa.Integer),
+)
+
+
+def backfill(bind, batch_size=BATCH_SIZE):
+    bind.execute(MISSING_CATEGORIES)
+    low, high = bind.execute(
+        sa.text("SELECT MIN(id), MAX(id) FROM budget_entry WHERE amount_cents IS NULL")
+    ).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, batch_size):
+        bind.execute(FILL_RANGE, dict(start=start, stop=start + batch_size))
+
+
+def rebuild_rollups(bind, key_columns, total_column, total, batch_size=USER_BATCH_SIZE):
+    """Fill monthly_rollup from budget_entry, one range of user ids per statement."""
+    year = sa.extract('year', budget_entry.c.date)
+    month = sa.extract('month', budget_entry.c.date)
+    keys = [budget_entry.c[name] for name in key_columns]
+    rollup = sa.table('monthly_rollup', *(sa.column(name) for name in
+                      ['user_id', 'year', 'month'] + key_columns + [total_column, 'count']))
+    low, high = bind.execute(sa.select(sa.func.min(budget_entry.c.user_id), sa.func.max(budget_entry.c.user_id))).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, batch_size):
+        grouped = (
+            sa.select(budget_entry.c.user_id, year, month, *keys, sa.func.sum(total), sa.func.count(budget_entry.c.id))
+            .where(budget_entry.c.user_id >= start, budget_entry.c.user_id < start + batch_size)
+            .group_by(budget_entry.c.user_id, year, month, *keys)
+        )
+        bind.execute(rollup.insert().from_select([c.name for c in rollup.columns], grouped))
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        backfill(op.get_bind())
+
+    op.drop_index('ix_budget_entry_user_type_date', table_name='budget_entry')
+    op.drop_index('ix_budget_entry_user_category_date', table_name='budget_entry')
+    with op.batch_alter_table('budget_entry', schema=None) as batch_op:
+        batch_op.alter_column('category_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('type_code', existing_type=sa.SmallInteger(), nullable=False)
+        batch_op.alter_column('amount_cents', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_budget_entry_category_id', 'category', ['category_id'], ['id'])
+        batch_op.drop_column('category')
+        batch_op.drop_column('type')
+        batch_op.drop_column('amount')
+    op.create_index('ix_budget_entry_user_type_date', 'budget_entry',
+                    ['user_id', 'type_code', 'date', 'amount_cents'])
+    op.create_index('ix_budget_entry_user_category_date', 'budget_entry', ['user_id', 'category_id', 'date'])
+
+    op.drop_index('uq_monthly_rollup_key', table_name='monthly_rollup')
+    op.drop_table('monthly_rollup')
+    op.create_table('monthly_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('type_code', sa.SmallInteger(), nullable=False),
+    sa.Column('total_cents', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['category_id'], ['category.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_monthly_rollup_key', 'monthly_rollup',
+                    ['user_id', 'year', 'month', 'category_id', 'type_code'], unique=True)
+    with op.get_context().autocommit_block():
+        rebuild_rollups(op.get_bind(), ['category_id', 'type_code'], 'total_cents', budget_entry.c.amount_cents)
+
+    op.drop_index('uq_spending_forecast_key', table_name='spending_forecast')
+    with op.batch_alter_table('spending_forecast', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('category_id', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE spending_forecast SET category_id = (
+            SELECT c.id FROM category c
+            WHERE c.user_id = spending_forecast.user_id AND c.name = spending_forecast.category
+        )
+    """)
+    op.execute("DELETE FROM spending_forecast WHERE category_id IS NULL")
+    with op.batch_alter_table('spending_forecast', schema=None) as batch_op:
+        batch_op.alter_column('category_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_spending_forecast_category_id', 'category', ['category_id'], ['id'])
+        batch_op.drop_column('category')
+    op.create_index('uq_spending_forecast_key', 'spending_forecast',
+                    ['user_id', 'year', 'month', 'category_id'], unique=True)
+
+def downgrade():
+    op.drop_index('uq_spending_forecast_key', table_name='spending_forecast')
+    with op.batch_alter_table('spending_forecast', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('category', sa.String(length=50), nullable=True))
+    op.execute("""
+        UPDATE spending_forecast SET
+            category = (SELECT c.name FROM category c WHERE c.id = spending_forecast.category_id)
+    """)
+    with op.batch_alter_table('spending_forecast', schema=None) as batch_op:
+        batch_op.alter_column('category', existing_type=sa.String(length=50), nullable=False)
+        batch_op.drop_constraint('fk_spending_forecast_category_id', type_='foreignkey')
+        batch_op.drop_column('category_id')
+    op.create_index('uq_spending_forecast_key', 'spending_forecast',
+                    ['user_id', 'year', 'month', 'category'], unique=True)
+
+    op.drop_index('ix_budget_entry_user_category_date', table_name='budget_entry')
+    op.drop_index('ix_budget_entry_user_type_date', table_name='budget_entry')
+    with op.batch_alter_table('budget_entry', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('category', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('type', sa.String(length=10), nullable=True))
+        batch_op.add_column(sa.Column('amount', sa.Float(), nullable=True))
+    op.execute("""
+        UPDATE budget_entry SET
+            category = (SELECT c.name FROM category c WHERE c.id = budget_entry.category_id),
+            type = CASE WHEN type_code = 1 THEN 'income' ELSE 'expense' END,
+            amount = amount_cents / 100.0
+    """)
+    with op.batch_alter_table('budget_entry', schema=None) as batch_op:
+        batch_op.alter_column('category', existing_type=sa.String(length=50), nullable=False)
+        batch_op.alter_column('type', existing_type=sa.String(length=10), nullable=False)
+        batch_op.alter_column('amount', existing_type=sa.Float(), nullable=False)
+        batch_op.drop_constraint('fk_budget_entry_category_id', type_='foreignkey')
+        batch_op.alter_column('category_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.alter_column('type_code', existing_type=sa.SmallInteger(), nullable=True)
+        batch_op.alter_column('amount_cents', existing_type=sa.Integer(), nullable=True)
+    op.create_index('ix_budget_entry_user_type_date', 'budget_entry', ['user_id', 'type', 'date', 'amount'])
+    op.create_index('ix_budget_entry_user_category_date', 'budget_entry', ['user_id', 'category', 'date'])
+
+    op.drop_index('uq_monthly_rollup_key', table_name='monthly_rollup')
+    op.drop_table('monthly_rollup')
+    op.create_table('monthly_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('type', sa.String(length=10), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_monthly_rollup_key', 'monthly_rollup',
+                    ['user_id', 'year', 'month', 'category', 'type'], unique=True)
+    rebuild_rollups(op.get_bind(), ['category', 'type'], 'total', budget_entry.c.amount)
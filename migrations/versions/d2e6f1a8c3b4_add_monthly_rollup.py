@@ -0,0 +1,36 @@
+"""Add monthly_rollup table
+
+Revision ID: d2e6f1a8c3b4
+Revises: b41c7e2a9d10
+Create Date: 2026-10-16 11:05:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd2e6f1a8c3b4'
+down_revision = 'b41c7e2a9d10'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('monthly_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('type', sa.String(length=10), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_monthly_rollup_key', 'monthly_rollup',
+                    ['user_id', 'year', 'month', 'category', 'type'], unique=True)
+    # Populate with 'flask rollups rebuild' after upgrading.
+
+def downgrade():
+    op.drop_index('uq_monthly_rollup_key', table_name='monthly_rollup')
+    op.drop_table('monthly_rollup')
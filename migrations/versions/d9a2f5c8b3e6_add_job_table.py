@@ -0,0 +1,39 @@
+"""Add job table for background work
+
+Revision ID: d9a2f5c8b3e6
+Revises: c8f4a1e7d2b5
+Create Date: 2026-10-17 09:30:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd9a2f5c8b3e6'
+down_revision = 'c8f4a1e7d2b5'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('kind', sa.String(length=30), nullable=False),
+    sa.Column('params', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('artifact', sa.String(length=255), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_job_status_id', 'job', ['status', 'id'], unique=False)
+    op.create_index('ix_job_user_id', 'job', ['user_id', 'id'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_job_user_id', table_name='job')
+    op.drop_index('ix_job_status_id', table_name='job')
+    op.drop_table('job')
@@ -0,0 +1,23 @@
+"""Add heartbeat_at to job
+
+Revision ID: e4f1a7c9d2b8
+Revises: d9a2f5c8b3e6
+Create Date: 2026-10-17 10:15:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e4f1a7c9d2b8'
+down_revision = 'd9a2f5c8b3e6'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_column('heartbeat_at')
@@ -0,0 +1,30 @@
+"""Add session_store table for server-side sessions
+
+Revision ID: e7a9c4b2f6d1
+Revises: d2e6f1a8c3b4
+Create Date: 2026-10-16 14:20:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e7a9c4b2f6d1'
+down_revision = 'd2e6f1a8c3b4'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('session_store',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('session_id', sa.String(length=255), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('expiry', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('session_id')
+    )
+    op.create_index('ix_session_store_expiry', 'session_store', ['expiry'])
+
+def downgrade():
+    op.drop_index('ix_session_store_expiry', table_name='session_store')
+    op.drop_table('session_store')
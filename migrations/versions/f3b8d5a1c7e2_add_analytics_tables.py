@@ -0,0 +1,50 @@
+"""Add spending_forecast and entry_anomaly tables
+
+Revision ID: f3b8d5a1c7e2
+Revises: e7a9c4b2f6d1
+Create Date: 2026-10-16 17:40:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d5a1c7e2'
+down_revision = 'e7a9c4b2f6d1'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('spending_forecast',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_spending_forecast_key', 'spending_forecast',
+                    ['user_id', 'year', 'month', 'category'], unique=True)
+    op.create_table('entry_anomaly',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('entry_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('typical', sa.Float(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['entry_id'], ['budget_entry.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('entry_id')
+    )
+    op.create_index('ix_entry_anomaly_user_id', 'entry_anomaly', ['user_id'], unique=False)
+    # Populate with 'flask analytics run' after upgrading.
+
+def downgrade():
+    op.drop_index('ix_entry_anomaly_user_id', table_name='entry_anomaly')
+    op.drop_table('entry_anomaly')
+    op.drop_index('uq_spending_forecast_key', table_name='spending_forecast')
+    op.drop_table('spending_forecast')
@@ -0,0 +1,28 @@
+"""Store monthly_rollup.total_cents as BIGINT
+
+Revision ID: f6c2d8a4b1e9
+Revises: e4f1a7c9d2b8
+Create Date: 2026-10-17 11:00:00.000000
+
+A rollup adds up every entry of a user, month, category and type, which can
+pass the 32-bit range of a single entry's cents.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f6c2d8a4b1e9'
+down_revision = 'e4f1a7c9d2b8'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('monthly_rollup', schema=None) as batch_op:
+        batch_op.alter_column('total_cents', existing_type=sa.Integer(), type_=sa.BigInteger(),
+                              existing_nullable=False)
+
+def downgrade():
+    with op.batch_alter_table('monthly_rollup', schema=None) as batch_op:
+        batch_op.alter_column('total_cents', existing_type=sa.BigInteger(), type_=sa.Integer(),
+                              existing_nullable=False)
@@ -1,3 +1,8 @@
+"""WSGI entry point: `gunicorn run:app` (see gunicorn.conf.py) or `python run.py` for development.
+
+The app is built once per process here; nothing else should call
+create_app() for serving.
+"""
 from app import create_app
 
 app = create_app()
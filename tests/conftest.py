@@ -0,0 +1,49 @@
+from app.models import Category, User
+from config import Config
+import pytest
+
+PASSWORD = 'password'
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(tmp_path / 'test.db'))
+    monkeypatch.setattr(Config, 'AUDIT_LOG_PATH', str(tmp_path / 'audit.log'))
+    monkeypatch.setattr(Config, 'RATELIMIT_STORAGE_URI', 'memory://')
+    monkeypatch.setattr(Config, 'PASSWORD_HASH_WORKERS', 0)
+    monkeypatch.setattr(Config, 'JOB_WORKERS', 0)
+    monkeypatch.setattr(Config, 'JOB_ARTIFACT_DIR', str(tmp_path / 'exports'))
+    monkeypatch.setattr(Config, 'ARCHIVE_DIR', str(tmp_path / 'archive'))
+    monkeypatch.setattr(Config, 'BCRYPT_LOG_ROUNDS', 4)
+    from app import create_app
+    from app.models import user_cache
+    from app.response_cache import response_cache
+    from app.routes import admin_stats_cache
+    # Module-level caches outlive each test's app and database
+    for cache in (user_cache, response_cache, admin_stats_cache):
+        cache.clear()
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, SESSION_COOKIE_SECURE=False)
+    return app
+
+
+@pytest.fixture
+def user(app):
+    """Id of a user with 'Food' and 'Salary' categories."""
+    from app import db, hasher
+    with app.app_context():
+        user = User(email='user@example.com', password=hasher.hash(PASSWORD), role='user')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all([Category(name='Food', user_id=user.id), Category(name='Salary', user_id=user.id)])
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def client(app, user):
+    """A test client logged in as `user`."""
+    client = app.test_client()
+    response = client.post('/login', data=dict(email='user@example.com', password=PASSWORD))
+    assert response.status_code == 302
+    return client
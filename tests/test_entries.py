@@ -0,0 +1,85 @@
+from app.models import BudgetEntry, Category
+from app.pagination import keyset_page, decode_cursor
+from datetime import date, timedelta
+import pytest
+
+BAD_AMOUNTS = ['-inf', 'inf', 'nan', '-1e300', '1e300', '-5', '0', '0.001', '1000000.01']
+
+
+def add_entry(client, amount, category='Food', type='expense', day='2026-01-15'):
+    return client.post('/dashboard', data=dict(date=day, category=category, amount=amount, type=type))
+
+
+def entry_count(app):
+    with app.app_context():
+        return BudgetEntry.query.count()
+
+
+@pytest.mark.parametrize('amount', BAD_AMOUNTS)
+def test_dashboard_rejects_out_of_range_amount(app, client, amount):
+    response = add_entry(client, amount)
+    assert response.status_code == 200
+    assert entry_count(app) == 0
+
+
+@pytest.mark.parametrize('amount', BAD_AMOUNTS)
+def test_edit_rejects_out_of_range_amount(app, client, amount):
+    assert add_entry(client, '12.50').status_code == 302
+    with app.app_context():
+        entry_id = BudgetEntry.query.one().id
+
+    response = client.post(f'/edit/{entry_id}', data=dict(date='2026-01-15', category='Food',
+                                                         amount=amount, type='expense'))
+    assert response.status_code == 200
+    with app.app_context():
+        assert BudgetEntry.query.one().amount == 12.5
+
+
+def test_rollups_follow_add_edit_and_delete(app, client):
+    from app import rollups
+
+    assert add_entry(client, '12.50').status_code == 302
+    assert add_entry(client, '1000000', category='Salary', type='income').status_code == 302
+    with app.app_context():
+        assert rollups.check() == []
+        entry_id = BudgetEntry.query.filter_by(type='expense').one().id
+
+    response = client.post(f'/edit/{entry_id}', data=dict(date='2025-12-31', category='Salary',
+                                                         amount='7.25', type='income'))
+    assert response.status_code == 302
+    with app.app_context():
+        assert rollups.check() == []
+
+    assert client.post(f'/delete/{entry_id}').status_code == 302
+    with app.app_context():
+        assert BudgetEntry.query.count() == 1
+        assert rollups.check() == []
+
+
+def test_keyset_pages_cover_every_entry_once(app, user):
+    from app import db
+    with app.app_context():
+        category_id = Category.query.filter_by(user_id=user, name='Food').one().id
+        start = date(2026, 1, 1)
+        # Several entries share a date, so the cursor has to break ties on id
+        db.session.add_all([
+            BudgetEntry(user_id=user, date=start + timedelta(days=n // 3), category_id=category_id,
+                        amount=n + 1, type='expense')
+            for n in range(25)
+        ])
+        db.session.commit()
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(BudgetEntry.query.filter_by(user_id=user), cursor, limit=7)
+            seen.extend((row.date, row.id) for row in rows)
+            if cursor is None:
+                break
+            assert decode_cursor(cursor) == seen[-1]
+        assert len(seen) == 25
+        assert seen == sorted(seen, reverse=True)
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
@@ -0,0 +1,96 @@
+from app.models import BudgetEntry, Category
+from datetime import date, timedelta
+import csv
+import gzip
+import io
+import json
+import threading
+import pytest
+
+
+@pytest.fixture
+def entries(app, user):
+    """Thirty days of entries for `user`, newest on 2026-01-30."""
+    from app import db, rollups
+    from app.response_cache import bump_data_version
+    with app.app_context():
+        category_id = Category.query.filter_by(user_id=user, name='Food').one().id
+        for n in range(30):
+            entry = BudgetEntry(user_id=user, date=date(2026, 1, 1) + timedelta(days=n),
+                                category_id=category_id, amount=n + 0.5, type='expense')
+            db.session.add(entry)
+            db.session.flush()
+            rollups.record_entry(entry)
+        bump_data_version(user)
+        db.session.commit()
+
+
+def csv_rows(data):
+    return list(csv.reader(io.StringIO(data.decode())))
+
+
+def test_csv_export_streams_every_entry_newest_first(app, client, entries):
+    app.config['EXPORT_BATCH_SIZE'] = 7
+    response = client.get('/download_csv')
+    assert response.status_code == 200
+    rows = csv_rows(response.data)
+    assert rows[0] == ['Date', 'Category', 'Amount', 'Type']
+    assert len(rows) == 31
+    assert rows[1] == ['2026-01-30', 'Food', '29.5', 'expense']
+    assert rows[-1] == ['2026-01-01', 'Food', '0.5', 'expense']
+
+    gzipped = client.get('/download_csv?gzip=1')
+    assert gzipped.mimetype == 'application/gzip'
+    assert csv_rows(gzip.decompress(gzipped.data)) == rows
+
+
+def test_export_date_range(app, client, entries):
+    response = client.get('/download_json?start_date=2026-01-10&end_date=2026-01-12')
+    assert [item['date'] for item in json.loads(response.data)] == ['2026-01-12', '2026-01-11', '2026-01-10']
+
+
+def test_export_round_trips_through_import(app, client, entries):
+    from app import rollups
+
+    exported = client.get('/download_csv').data
+    report = client.post('/import', data=dict(file=(io.BytesIO(exported), 'entries.csv')),
+                         headers={'Accept': 'application/json'}).get_json()
+    assert report == {'inserted': 30, 'failed': 0, 'errors': []}
+    with app.app_context():
+        assert BudgetEntry.query.count() == 60
+        assert rollups.check() == []
+
+
+def test_large_export_runs_as_a_job(app, client, entries):
+    from app import jobs
+
+    app.config['JOB_EXPORT_THRESHOLD'] = 10
+    response = client.get('/download_csv', headers={'Accept': 'application/json'})
+    assert response.status_code == 202
+    status_url = response.headers['Location']
+    assert response.get_json()['status'] == 'queued'
+    assert client.get(f"{status_url}/download").status_code == 409
+
+    jobs.work(app, threading.Event(), burst=True)
+
+    info = client.get(status_url, headers={'Accept': 'application/json'}).get_json()
+    assert info['status'] == 'done'
+    download = client.get(info['download'])
+    assert download.status_code == 200
+    rows = csv_rows(download.data)
+    assert len(rows) == 31
+    assert rows[1] == ['2026-01-30', 'Food', '29.5', 'expense']
+
+
+def test_jobs_are_private_to_their_owner(app, client, entries):
+    from app import db, jobs
+    from app.models import User
+
+    with app.app_context():
+        other = User(email='other@example.com', password='x', role='user')
+        db.session.add(other)
+        db.session.commit()
+        job_id = jobs.enqueue('export', other.id, format='csv', compress=False,
+                              start_date=None, end_date=None, data_version=0).id
+    assert client.get(f'/jobs/{job_id}', headers={'Accept': 'application/json'}).status_code == 404
+    assert client.get(f'/jobs/{job_id}/download').status_code == 404
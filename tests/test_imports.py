@@ -0,0 +1,83 @@
+from app.models import BudgetEntry
+from io import BytesIO
+import json
+import pytest
+
+CSV = b"""Date,Category,Amount,Type
+2026-01-02,Food,12.50,expense
+2026-01-03,Salary,2500,income
+not-a-date,Food,1,expense
+2026-01-04,Rent,10,expense
+2026-01-05,Food,-inf,expense
+2026-01-06,Food,-5,expense
+2026-01-07,Food,1e300,expense
+2026-01-08,food,3.20,Expense
+2026-01-09,Food,4,gift
+"""
+
+RECORDS = [
+    {"date": "2026-01-02", "category": "Food", "amount": 12.5, "type": "expense"},
+    {"date": "2026-01-03", "category": "Salary", "amount": 2500, "type": "income"},
+    {"date": "2026-01-04", "category": "Food", "amount": "abc", "type": "expense"},
+    {"date": "2026-01-05", "category": "Food", "amount": 0, "type": "expense"},
+    {"date": "2026-01-06", "category": "Food", "amount": 1e300, "type": "expense"},
+    [1, 2, 3],
+    {"date": "2026-01-08", "category": "food", "amount": 3.2, "type": "Expense"},
+]
+
+
+def upload(client, data, filename):
+    return client.post('/import', data=dict(file=(BytesIO(data), filename)),
+                       headers={'Accept': 'application/json'})
+
+
+def entry_amounts(app):
+    with app.app_context():
+        return sorted(entry.amount for entry in BudgetEntry.query)
+
+
+def test_csv_import_keeps_valid_rows_and_reports_the_rest(app, client):
+    from app import rollups
+
+    report = upload(client, CSV, 'entries.csv').get_json()
+    assert report['inserted'] == 3
+    assert report['failed'] == 6
+    assert [error['row'] for error in report['errors']] == [4, 5, 6, 7, 8, 10]
+    assert report['errors'][1]['error'] == "Unknown category: 'Rent'"
+    assert entry_amounts(app) == [3.2, 12.5, 2500]
+    with app.app_context():
+        assert rollups.check() == []
+
+
+@pytest.mark.parametrize('filename, data', [
+    ('entries.json', json.dumps(RECORDS).encode()),
+    ('entries.ndjson', b'\n'.join(json.dumps(record).encode() for record in RECORDS) + b'\n{broken\n'),
+])
+def test_json_import_keeps_valid_rows_and_reports_the_rest(app, client, filename, data):
+    from app import rollups
+
+    report = upload(client, data, filename).get_json()
+    assert report['inserted'] == 3
+    assert [error['row'] for error in report['errors']] == [3, 4, 5, 6] + ([8] if filename.endswith('ndjson') else [])
+    assert report['failed'] == len(report['errors'])
+    assert entry_amounts(app) == [3.2, 12.5, 2500]
+    with app.app_context():
+        assert rollups.check() == []
+
+
+def test_import_in_several_batches(app, client):
+    from app import rollups
+
+    app.config['IMPORT_BATCH_SIZE'] = 2
+    report = upload(client, CSV, 'entries.csv').get_json()
+    assert (report['inserted'], report['failed']) == (3, 6)
+    with app.app_context():
+        assert rollups.check() == []
+
+
+def test_import_rejects_unreadable_files(app, client):
+    response = upload(client, b'when,what\n2026-01-01,x\n', 'entries.csv')
+    assert response.status_code == 400
+    assert 'Missing CSV columns' in response.get_json()['error']
+    assert upload(client, b'', 'entries.xlsx').status_code == 400
+    assert entry_amounts(app) == []
@@ -0,0 +1,43 @@
+from app.models import BudgetEntry, Category, MonthlyRollup, User, MAX_AMOUNT, MAX_CENTS
+from datetime import date
+from sqlalchemy.exc import StatementError
+import pytest
+
+
+@pytest.mark.parametrize('amount', [MAX_CENTS / 100 + 1, 1e300, float('inf'), float('nan')])
+def test_out_of_range_amount_is_rejected(app, amount):
+    from app import db
+    with app.app_context():
+        user = User(email='a@example.com', password='x')
+        db.session.add(user)
+        db.session.flush()
+        category = Category(name='Food', user_id=user.id)
+        db.session.add(category)
+        db.session.flush()
+        db.session.add(BudgetEntry(user_id=user.id, date=date(2026, 1, 1), category_id=category.id,
+                                   amount=amount, type='expense'))
+        with pytest.raises(StatementError) as exc_info:
+            db.session.flush()
+        assert isinstance(exc_info.value.orig, ValueError)
+        assert 'Amount out of range' in str(exc_info.value.orig)
+        db.session.rollback()
+
+
+def test_rollup_total_can_exceed_the_entry_range(app):
+    from app import db, rollups
+    with app.app_context():
+        user = User(email='a@example.com', password='x')
+        db.session.add(user)
+        db.session.flush()
+        category = Category(name='Salary', user_id=user.id)
+        db.session.add(category)
+        db.session.flush()
+        for _ in range(30):
+            entry = BudgetEntry(user_id=user.id, date=date(2026, 1, 1), category_id=category.id,
+                                amount=MAX_AMOUNT, type='income')
+            db.session.add(entry)
+            db.session.flush()
+            rollups.record_entry(entry)
+        db.session.commit()
+        assert MonthlyRollup.query.one().total == 30 * MAX_AMOUNT > MAX_CENTS / 100
+        assert rollups.check() == []